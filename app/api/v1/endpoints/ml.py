@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Union
-from app.ml.grading_model import AutoGradingModel
-from app.ml.performance_predictor import PerformancePredictor
-from app.core.auth import get_current_user
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, List, Dict, Iterable, Optional, Union, Iterator
+from datetime import datetime
+from app.ml.jobs import job_manager, JobStatus
+from app.ml.registry import model_registry
+from app.services.performance_service import PerformanceService
+from app.api.deps import get_current_user
+from app.api import deps
+from app.db.session import SessionLocal
 from pydantic import BaseModel
+import csv
+import io
+import json
 import os
 
 router = APIRouter()
 
-# Initialize models
-grading_model = AutoGradingModel()
-performance_predictor = PerformancePredictor()
+# Batches larger than this are streamed back as NDJSON, one chunk at a time
+GRADING_BATCH_STREAM_THRESHOLD = 500
+GRADING_BATCH_CHUNK_SIZE = 250
+
+# Rows serialized per chunk when streaming cohort exports
+COHORT_EXPORT_CHUNK_SIZE = 1000
 
 class GradingRequest(BaseModel):
     answer: str
@@ -20,6 +31,12 @@ class GradingResponse(BaseModel):
     predicted_grade: int
     confidence: float
 
+class BatchGradingRequest(BaseModel):
+    items: List[GradingRequest]
+
+class BatchGradingResponse(BaseModel):
+    results: List[GradingResponse]
+
 class PerformanceData(BaseModel):
     attendance_rate: float
     assignment_completion: float
@@ -30,78 +47,171 @@ class PerformancePrediction(BaseModel):
     predicted_performance: float
     confidence_interval: Dict[str, float]
 
-class TrainingResponse(BaseModel):
-    status: str
-    metrics: Dict[str, float]
+class TrainingJobResponse(BaseModel):
+    id: str
+    model_name: str
+    status: JobStatus
+    progress: float
+    version: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
-@router.post("/train/grading", response_model=TrainingResponse)
+@router.post("/train/grading", response_model=TrainingJobResponse, status_code=202)
 async def train_grading_model(current_user: dict = Depends(get_current_user)):
-    """Train the auto-grading model with sample data."""
+    """Queue training of the auto-grading model with sample data."""
     try:
-        # Generate sample data and train model
-        sample_data = grading_model.generate_sample_data(100)
-        metrics = grading_model.train(sample_data)
-        
-        return {
-            "status": "success",
-            "metrics": metrics
-        }
+        job = job_manager.submit("grading_model", n_samples=100)
+        return job.to_dict()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/train/performance", response_model=TrainingResponse)
+@router.post("/train/performance", response_model=TrainingJobResponse, status_code=202)
 async def train_performance_model(current_user: dict = Depends(get_current_user)):
-    """Train the performance prediction model with sample data."""
+    """Queue training of the performance prediction model with sample data."""
     try:
-        # Generate sample data and train model
-        sample_data = performance_predictor.generate_sample_data(100)
-        metrics = performance_predictor.train(sample_data)
-        
-        return {
-            "status": "success",
-            "metrics": metrics
-        }
+        job = job_manager.submit("performance_model", n_samples=100)
+        return job.to_dict()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/{job_id}", response_model=TrainingJobResponse)
+async def get_training_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get the progress and metrics of a training job."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Inference is CPU-bound, so the predict routes are plain def and FastAPI runs
+# them in its threadpool instead of blocking the event loop
 @router.post("/predict/grade", response_model=GradingResponse)
-async def predict_grade(
+def predict_grade(
     request: GradingRequest,
     current_user: dict = Depends(get_current_user)
 ):
     """Predict the grade for a given answer."""
     try:
-        prediction = grading_model.predict(request.answer, request.correct_answer)
+        prediction = model_registry.get("grading_model").predict(request.answer, request.correct_answer)
         return prediction
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/predict/grade/batch", response_model=BatchGradingResponse)
+def predict_grade_batch(
+    request: BatchGradingRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Predict grades for a batch of answers, preserving input order."""
+    answers = [item.answer for item in request.items]
+    correct_answers = [item.correct_answer for item in request.items]
+    grading_model = model_registry.get("grading_model")
+
+    if len(answers) > GRADING_BATCH_STREAM_THRESHOLD:
+        if not grading_model.is_trained and not os.path.exists(grading_model.model_path):
+            raise HTTPException(status_code=400, detail="Model not trained yet!")
+        return StreamingResponse(
+            _stream_grade_predictions(grading_model, answers, correct_answers),
+            media_type="application/x-ndjson"
+        )
+
+    try:
+        return {"results": grading_model.predict_many(answers, correct_answers)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _stream_grade_predictions(grading_model, answers: List[str], correct_answers: List[str]) -> Iterator[str]:
+    """Yield one NDJSON line per prediction, scoring the batch chunk by chunk."""
+    for start in range(0, len(answers), GRADING_BATCH_CHUNK_SIZE):
+        end = start + GRADING_BATCH_CHUNK_SIZE
+        predictions = grading_model.predict_many(answers[start:end], correct_answers[start:end])
+        for index, prediction in enumerate(predictions, start=start):
+            yield json.dumps({"index": index, **prediction}) + "\n"
+
 @router.post("/predict/performance", response_model=PerformancePrediction)
-async def predict_performance(
+def predict_performance(
     data: PerformanceData,
     current_user: dict = Depends(get_current_user)
 ):
     """Predict student performance based on current metrics."""
     try:
-        prediction = performance_predictor.predict(data.dict())
+        prediction = model_registry.get("performance_model").predict(data.dict())
         return prediction
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/predict/performance/cohort")
+def predict_performance_cohort(
+    format: str = Query("json", pattern="^(json|csv)$"),
+    organization_id: int = Depends(deps.get_current_tenant_id),
+    current_user: dict = Depends(get_current_user)
+):
+    """Predict performance for every student of the current organization."""
+    performance_model = model_registry.get("performance_model")
+    if not performance_model.is_trained and not os.path.exists(performance_model.model_path):
+        raise HTTPException(status_code=400, detail="Model not trained yet!")
+
+    chunks = _cohort_prediction_chunks(organization_id)
+    if format == "csv":
+        return StreamingResponse(
+            _stream_cohort_csv(chunks),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=performance_predictions.csv"}
+        )
+    return StreamingResponse(_stream_cohort_json(chunks), media_type="application/json")
+
+def _cohort_prediction_chunks(organization_id: int) -> Iterator[List[Dict[str, Any]]]:
+    """Fetch and score the cohort chunk by chunk while the response is being sent.
+
+    The session is opened here rather than taken from a dependency, so it
+    stays open for as long as the stream runs.
+    """
+    db = SessionLocal()
+    try:
+        yield from PerformanceService.iter_cohort_predictions(db, organization_id, COHORT_EXPORT_CHUNK_SIZE)
+    finally:
+        db.close()
+
+def _stream_cohort_csv(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Yield the cohort predictions as CSV, a chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["student_id", "student_number", "predicted_performance", "lower", "upper"])
+    for chunk in chunks:
+        for item in chunk:
+            interval = item["confidence_interval"]
+            writer.writerow([
+                item["student_id"],
+                item["student_number"],
+                item["predicted_performance"],
+                interval["lower"],
+                interval["upper"]
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _stream_cohort_json(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Yield the cohort predictions as a JSON array, a chunk of rows at a time."""
+    yield "["
+    prefix = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        yield prefix + ",".join(json.dumps(item) for item in chunk)
+        prefix = ","
+    yield "]"
+
 @router.get("/models/status")
 async def get_models_status(current_user: dict = Depends(get_current_user)):
-    """Get the training status of all ML models."""
-    return {
-        "grading_model": {
-            "trained": grading_model.is_trained,
-            "model_file_exists": os.path.exists(grading_model.model_path)
-        },
-        "performance_model": {
-            "trained": performance_predictor.is_trained,
-            "model_file_exists": os.path.exists(performance_predictor.model_path)
-        }
-    } 
\ No newline at end of file
+    """Get the version, load time and size of all served ML models."""
+    return model_registry.status()
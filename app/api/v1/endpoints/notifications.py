@@ -1,50 +1,33 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Query
-from typing import List, Optional
+import asyncio
+import time
+from fastapi import APIRouter, Depends, BackgroundTasks, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from app.services.notification_service import (
-    notification_service,
-    Notification,
-    NotificationType,
-    NotificationPriority,
-    NotificationChannel
-)
-from app.core.auth import get_current_user
-from pydantic import BaseModel, EmailStr
+from app.api.deps import get_current_user
+from app.core.notification_templates import template_registry
+from app.core.pagination import NEXT_CURSOR_HEADER, next_cursor
+from app.core.config import settings
+from app.core.principal_cache import CurrentUser
+from app.db.session import SessionLocal
 from app.api import deps
 from app.schemas.notification import (
     NotificationCreate,
     NotificationUpdate,
     NotificationResponse,
-    NotificationStatus
+    NotificationStatus,
+    NotificationBulkSelection,
+    NotificationBulkResult,
+    NotificationAudienceType,
+    NotificationFanoutCreate,
+    NotificationFanoutResult
 )
 from app.services.notification_service import NotificationService
+from app.services.notification_gateway import CLOSED, Connection, notification_gateway
 
 router = APIRouter()
 
-class NotificationRequest(BaseModel):
-    recipient_id: int
-    recipient_email: EmailStr
-    template_name: str
-    notification_type: NotificationType
-    priority: NotificationPriority
-    channels: List[NotificationChannel]
-    data: dict
-    scheduled_for: Optional[datetime] = None
-
-class NotificationResponse(BaseModel):
-    id: int
-    recipient_id: int
-    recipient_email: EmailStr
-    notification_type: NotificationType
-    priority: NotificationPriority
-    template: dict
-    data: dict
-    channels: List[NotificationChannel]
-    scheduled_for: Optional[datetime]
-    created_at: datetime
-    status: str
-
 @router.post("/", response_model=NotificationResponse)
 def create_notification(
     *,
@@ -61,27 +44,231 @@ def create_notification(
     )
     return notification
 
+@router.post("/fan-out", response_model=NotificationFanoutResult)
+def fan_out_notification(
+    *,
+    db: Session = Depends(deps.get_db),
+    fanout_in: NotificationFanoutCreate,
+    organization_id: int = Depends(deps.get_current_tenant_id),
+    current_user: CurrentUser = Depends(deps.get_current_active_user)
+):
+    """
+    Send a notification to every member of a course, a role or the whole
+    organization. Teachers may only address courses.
+    """
+    if not (current_user.is_superuser or current_user.role == "admin"):
+        if current_user.role != "teacher" or fanout_in.audience.type != NotificationAudienceType.COURSE:
+            raise HTTPException(status_code=403, detail="Not enough privileges")
+    return NotificationService.fan_out(
+        db=db,
+        organization_id=organization_id,
+        fanout_in=fanout_in
+    )
+
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications(
     *,
     db: Session = Depends(deps.get_db),
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     unread_only: bool = Query(False),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user_id: int = Depends(deps.get_current_user_id)
 ):
     """
-    Get notifications for the current user.
+    Get notifications for the current user, newest first. The cursor for the
+    next page is returned in the X-Next-Cursor header.
     """
     notifications = NotificationService.get_user_notifications(
         db=db,
         user_id=current_user_id,
         skip=skip,
         limit=limit,
-        unread_only=unread_only
+        unread_only=unread_only,
+        cursor=cursor
     )
+    cursor = next_cursor(notifications, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
     return notifications
 
+@router.post("/mark-read", response_model=NotificationBulkResult)
+def mark_notifications_as_read(
+    *,
+    db: Session = Depends(deps.get_db),
+    selection: NotificationBulkSelection,
+    current_user_id: int = Depends(deps.get_current_user_id)
+):
+    """
+    Mark several notifications, or all up to a timestamp, as read.
+    """
+    ids = NotificationService.mark_many_as_read(
+        db=db,
+        user_id=current_user_id,
+        ids=selection.ids,
+        all_before=selection.all_before
+    )
+    return {"count": len(ids), "ids": ids}
+
+@router.post("/delete", response_model=NotificationBulkResult)
+def delete_notifications(
+    *,
+    db: Session = Depends(deps.get_db),
+    selection: NotificationBulkSelection,
+    current_user_id: int = Depends(deps.get_current_user_id)
+):
+    """
+    Delete several notifications, or all up to a timestamp.
+    """
+    ids = NotificationService.delete_many(
+        db=db,
+        user_id=current_user_id,
+        ids=selection.ids,
+        all_before=selection.all_before
+    )
+    return {"count": len(ids), "ids": ids}
+
+@router.get("/unread-count")
+def get_unread_count(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user_id: int = Depends(deps.get_current_user_id)
+):
+    """
+    Get the number of unread notifications of the current user.
+    """
+    return {
+        "unread_count": NotificationService.get_unread_count(db=db, user_id=current_user_id)
+    }
+
+@router.get("/templates", response_model=List[str])
+async def get_notification_templates(current_user: dict = Depends(get_current_user)):
+    """Get list of available notification templates."""
+    return template_registry.names()
+
+@router.get("/status/{notification_id}", response_model=NotificationResponse)
+async def get_notification_status(
+    notification_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the status of a specific notification."""
+    # TODO: Implement database integration
+    raise HTTPException(status_code=501, detail="Not implemented yet")
+
+def _authenticate(token: Optional[str]) -> Optional[CurrentUser]:
+    # Browsers cannot set headers on WebSocket or EventSource requests,
+    # so the token may also come as a query parameter
+    if not token:
+        return None
+    db = SessionLocal()
+    try:
+        return deps.get_current_user(db=db, token=token)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+def _bearer_token(authorization: Optional[str], token: Optional[str]) -> Optional[str]:
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return token
+
+@router.websocket("/ws")
+async def notifications_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    last_id: Optional[int] = None
+):
+    """
+    Push the current user's new notifications as they are created.
+    Reconnect with last_id to receive the ones missed in between.
+    """
+    user = await asyncio.to_thread(_authenticate, token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    connection = await notification_gateway.connect(user.id, last_id)
+    sender = asyncio.create_task(_push_to_websocket(websocket, connection))
+    try:
+        while True:
+            # Clients answer pings; silence for two intervals means a dead peer
+            await asyncio.wait_for(websocket.receive_text(), timeout=settings.WS_HEARTBEAT_INTERVAL * 2)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        pass
+    finally:
+        sender.cancel()
+        await notification_gateway.disconnect(connection)
+
+async def _with_heartbeat(connection: Connection) -> AsyncIterator[Optional[Tuple[int, str]]]:
+    """
+    Yield a connection's events, and None every WS_HEARTBEAT_INTERVAL
+    seconds whether events are flowing or not. Clients that have not
+    answered within two intervals are dropped, so a ping cannot wait for
+    the connection to go idle.
+    """
+    next_ping = time.monotonic() + settings.WS_HEARTBEAT_INTERVAL
+    while True:
+        timeout = next_ping - time.monotonic()
+        if timeout <= 0:
+            next_ping = time.monotonic() + settings.WS_HEARTBEAT_INTERVAL
+            yield None
+            continue
+        try:
+            yield await asyncio.wait_for(connection.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+async def _push_to_websocket(websocket: WebSocket, connection: Connection) -> None:
+    try:
+        async for event in _with_heartbeat(connection):
+            if event is None:
+                await websocket.send_text('{"type":"ping"}')
+                continue
+            if event == CLOSED:
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            _, data = event
+            await websocket.send_text('{"type":"notification","data":' + data + '}')
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+@router.get("/stream")
+async def notifications_stream(
+    token: Optional[str] = None,
+    last_id: Optional[int] = None,
+    authorization: Optional[str] = Header(None),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Server-Sent Events fallback for clients that cannot use the WebSocket.
+    Browsers resume automatically through the Last-Event-ID header.
+    """
+    user = await asyncio.to_thread(_authenticate, _bearer_token(authorization, token))
+    if user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    connection = await notification_gateway.connect(user.id, last_event_id or last_id)
+
+    async def events():
+        try:
+            async for event in _with_heartbeat(connection):
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                if event == CLOSED:
+                    return
+                event_id, data = event
+                yield f"id: {event_id}\nevent: notification\ndata: {data}\n\n"
+        finally:
+            await notification_gateway.disconnect(connection)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{notification_id}", response_model=NotificationResponse)
 def get_notification(
     *,
@@ -167,17 +354,3 @@ def delete_notification(
         notification_id=notification_id
     )
     return {"message": "Notification deleted successfully"}
-
-@router.get("/templates", response_model=List[str])
-async def get_notification_templates(current_user: dict = Depends(get_current_user)):
-    """Get list of available notification templates."""
-    return list(notification_service.email_templates.keys())
-
-@router.get("/status/{notification_id}", response_model=NotificationResponse)
-async def get_notification_status(
-    notification_id: int,
-    current_user: dict = Depends(get_current_user)
-):
-    """Get the status of a specific notification."""
-    # TODO: Implement database integration
-    raise HTTPException(status_code=501, detail="Not implemented yet") 
\ No newline at end of file
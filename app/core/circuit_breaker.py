@@ -0,0 +1,77 @@
+import time
+from enum import Enum
+from typing import Awaitable, Callable, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately with CircuitOpenError. Once ``recovery_timeout``
+    seconds have passed a single trial call is let through: success closes
+    the circuit again, failure re-opens it. Only exceptions in
+    ``failure_exceptions`` count as failures; anything else is passed on
+    without saying anything about the dependency's health.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,)
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failure_exceptions = failure_exceptions
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        if not self._allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        try:
+            result = await func()
+        except self.failure_exceptions:
+            self._record_failure()
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        self._record_success()
+        return result
+
+    def _allow(self) -> bool:
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            # Let exactly one trial call through
+            self.state = CircuitState.HALF_OPEN
+            return True
+        return False
+
+    def _record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def _release_trial(self) -> None:
+        # The trial call proved nothing either way; let the next call try again
+        if self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.OPEN
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
@@ -0,0 +1,33 @@
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr
+from typing import Optional
+
+from app.core.config import settings
+from app.core.smtp_pool import smtp_pool
+
+def build_message(
+    to: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None
+) -> MIMEMultipart:
+    """Build a plain-text (and optionally HTML) email from the configured sender."""
+    message = MIMEMultipart("alternative")
+    sender = settings.EMAILS_FROM_EMAIL or settings.SMTP_USER
+    message["From"] = formataddr((settings.EMAILS_FROM_NAME, sender)) if settings.EMAILS_FROM_NAME else sender
+    message["To"] = to
+    message["Subject"] = subject
+    message.attach(MIMEText(body, "plain"))
+    if html_body:
+        message.attach(MIMEText(html_body, "html"))
+    return message
+
+async def send_email(
+    to: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None
+) -> None:
+    """Send an email over the shared SMTP connection pool without blocking the event loop."""
+    await smtp_pool.send_message_async(build_message(to, subject, body, html_body))
@@ -0,0 +1,260 @@
+import binascii
+import string
+import threading
+import uuid
+from email.header import Header
+from email.utils import formataddr
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.tenant_cache import get_tenant
+
+# Built-in templates: name -> {"channels": [...], locale: {"subject", "body", "html_body"}}.
+# An organization can override any of them, per locale, under
+# settings["notification_templates"] and bump settings["notification_templates_version"]
+# to have every worker recompile.
+DEFAULT_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    # Wraps a stored notification, already rendered, for the email channel
+    "notification": {
+        "channels": ["email"],
+        "en": {
+            "subject": "{title}",
+            "body": "{message}"
+        },
+        "ar": {
+            "subject": "{title}",
+            "body": "{message}"
+        }
+    },
+    "welcome": {
+        "channels": ["email"],
+        "en": {
+            "subject": "Welcome to Smart Education ERP",
+            "body": "Welcome {name}! We're excited to have you on board."
+        },
+        "ar": {
+            "subject": "مرحبًا بك في نظام التعليم الذكي",
+            "body": "مرحبًا {name}! يسعدنا انضمامك إلينا."
+        }
+    },
+    "password_reset": {
+        "channels": ["email"],
+        "en": {
+            "subject": "Password Reset Request",
+            "body": "Click here to reset your password: {reset_link}"
+        },
+        "ar": {
+            "subject": "طلب إعادة تعيين كلمة المرور",
+            "body": "اضغط هنا لإعادة تعيين كلمة المرور: {reset_link}"
+        }
+    },
+    "assignment_due": {
+        "channels": ["email", "in_app"],
+        "en": {
+            "subject": "Assignment Due Soon",
+            "body": "Your assignment '{assignment_name}' is due on {due_date}"
+        },
+        "ar": {
+            "subject": "موعد تسليم الواجب يقترب",
+            "body": "موعد تسليم الواجب '{assignment_name}' هو {due_date}"
+        }
+    },
+    "digest": {
+        "channels": ["email"],
+        "en": {
+            "subject": "You have {count} new notifications",
+            "body": "Here is what you missed:\n\n{items}"
+        },
+        "ar": {
+            "subject": "لديك {count} إشعارات جديدة",
+            "body": "إليك ما فاتك:\n\n{items}"
+        }
+    }
+}
+
+_CRLF = b"\r\n"
+
+class RenderedTemplate(NamedTuple):
+    subject: str
+    body: str
+    html_body: Optional[str]
+
+def _compile(source: Optional[str]) -> Tuple[Optional[Callable[[Dict[str, Any]], str]], frozenset]:
+    """Parse a ``str.format`` template once; return its renderer and field names.
+
+    Templates without fields render to the constant string itself.
+    """
+    if source is None:
+        return None, frozenset()
+    fields = frozenset(
+        field.split(".", 1)[0].split("[", 1)[0]
+        for _, field, _, _ in string.Formatter().parse(source)
+        if field is not None
+    )
+    if "" in fields:
+        raise ValueError("Templates must use named fields")
+    if not fields:
+        return (lambda data: source), fields
+    return source.format_map, fields
+
+def _encode_part(content_type: str, text: str) -> bytes:
+    # base64 keeps Arabic text 7-bit clean and can never contain a boundary line
+    raw = text.encode("utf-8")
+    lines = [binascii.b2a_base64(raw[i:i + 57], newline=False) for i in range(0, len(raw), 57)]
+    return _CRLF.join([
+        f"Content-Type: {content_type}; charset=\"utf-8\"".encode(),
+        b"Content-Transfer-Encoding: base64",
+        b"",
+        *lines
+    ])
+
+class CompiledTemplate:
+    """A template for one (name, locale, tenant), ready to render.
+
+    Field names are extracted and validated at compile time, and every
+    header that does not depend on the recipient (From, MIME-Version,
+    Content-Language, Content-Type and, when it has no fields, Subject)
+    is encoded to bytes once. Rendering an email then only substitutes
+    the variables and base64-encodes the resulting body.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        locale: str,
+        version: int,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None,
+        channels: Optional[List[str]] = None
+    ):
+        self.name = name
+        self.locale = locale
+        self.version = version
+        self.channels = channels or ["email"]
+        self._subject, subject_fields = _compile(subject)
+        self._body, body_fields = _compile(body)
+        self._html_body, html_fields = _compile(html_body)
+        self.fields = subject_fields | body_fields | html_fields
+
+        sender = settings.EMAILS_FROM_EMAIL or settings.SMTP_USER or ""
+        self.sender = sender
+        from_header = formataddr((settings.EMAILS_FROM_NAME, sender)) if settings.EMAILS_FROM_NAME else sender
+        self._boundary = f"=_{uuid.uuid4().hex}".encode()
+        head = [
+            b"From: " + from_header.encode(),
+            b"MIME-Version: 1.0",
+            b"Content-Language: " + locale.encode()
+        ]
+        if html_body is not None:
+            head.append(b'Content-Type: multipart/alternative; boundary="' + self._boundary + b'"')
+        self._head = _CRLF.join(head) + _CRLF
+        self._static_subject = self._encode_subject(subject) if not subject_fields else None
+
+    def render(self, data: Dict[str, Any]) -> RenderedTemplate:
+        """Substitute ``data`` into the subject and bodies."""
+        missing = self.fields.difference(data)
+        if missing:
+            raise ValueError(f"Template '{self.name}' is missing variables: {', '.join(sorted(missing))}")
+        return RenderedTemplate(
+            self._subject(data),
+            self._body(data),
+            self._html_body(data) if self._html_body else None
+        )
+
+    def render_email(self, to: str, data: Dict[str, Any]) -> bytes:
+        """Render a complete RFC 5322 message for one recipient."""
+        rendered = self.render(data)
+        subject = self._static_subject or self._encode_subject(rendered.subject)
+        message = [self._head, b"To: ", to.encode(), _CRLF, subject]
+        if rendered.html_body is None:
+            message.append(_encode_part("text/plain", rendered.body))
+        else:
+            delimiter = b"--" + self._boundary
+            message += [
+                _CRLF, delimiter, _CRLF, _encode_part("text/plain", rendered.body), _CRLF,
+                delimiter, _CRLF, _encode_part("text/html", rendered.html_body), _CRLF,
+                delimiter, b"--"
+            ]
+        message.append(_CRLF)
+        return b"".join(message)
+
+    @staticmethod
+    def _encode_subject(subject: str) -> bytes:
+        # Substituted values must not be able to start a new header
+        subject = " ".join(subject.splitlines())
+        charset = "us-ascii" if subject.isascii() else "utf-8"
+        return b"Subject: " + Header(subject, charset).encode().encode() + _CRLF
+
+class TemplateRegistry:
+    """Process-wide cache of compiled notification templates.
+
+    Templates are keyed by ``(name, locale, tenant)`` and compiled on first
+    use. Each entry remembers the tenant's template version; when an
+    organization bumps ``notification_templates_version`` in its settings
+    (which invalidates the tenant cache in every worker), its entries are
+    recompiled on next use.
+    """
+
+    def __init__(self, templates: Dict[str, Dict[str, Any]], default_locale: str = "en"):
+        self.templates = templates
+        self.default_locale = default_locale
+        self._compiled: Dict[Tuple[str, str, Optional[int]], CompiledTemplate] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self.templates)
+
+    def get(self, name: str, locale: Optional[str] = None, tenant_id: Optional[int] = None) -> CompiledTemplate:
+        """Return the compiled template, raising ValueError if it does not exist."""
+        tenant_settings = self._tenant_settings(tenant_id)
+        locale = locale or tenant_settings.get("default_locale") or self.default_locale
+        version = tenant_settings.get("notification_templates_version", 0)
+
+        key = (name, locale, tenant_id)
+        template = self._compiled.get(key)
+        if template is not None and template.version == version:
+            return template
+
+        template = self._compile(name, locale, version, tenant_settings.get("notification_templates") or {})
+        with self._lock:
+            self._compiled[key] = template
+        return template
+
+    def clear(self) -> None:
+        with self._lock:
+            self._compiled.clear()
+
+    def _compile(self, name: str, locale: str, version: int, overrides: Dict[str, Any]) -> CompiledTemplate:
+        default = self.templates.get(name)
+        override = overrides.get(name) or {}
+        if default is None and not override:
+            raise ValueError(f"Template '{name}' not found")
+        default = default or {}
+
+        # Tenant override for the locale, then the built-in one, then the default locale
+        for candidate in (locale, self.default_locale):
+            source = override.get(candidate) or default.get(candidate)
+            if source:
+                break
+        else:
+            raise ValueError(f"Template '{name}' has no '{locale}' version")
+
+        return CompiledTemplate(
+            name,
+            candidate,
+            version,
+            source["subject"],
+            source["body"],
+            source.get("html_body"),
+            override.get("channels") or default.get("channels")
+        )
+
+    @staticmethod
+    def _tenant_settings(tenant_id: Optional[int]) -> Dict[str, Any]:
+        if tenant_id is None:
+            return {}
+        tenant = get_tenant(tenant_id)
+        return tenant.settings if tenant else {}
+
+template_registry = TemplateRegistry(DEFAULT_TEMPLATES, default_locale=settings.NOTIFICATION_DEFAULT_LOCALE)
@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Encode the sort key of the last row of a page as an opaque token."""
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(
+    query: Query,
+    model: Any,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Any]:
+    """Return one page of ``query``, newest first.
+
+    With a cursor the page starts right after the row it was issued for,
+    using a ``(created_at, id) < (...)`` comparison that the composite
+    indexes on those columns can seek to directly. Without one it falls
+    back to OFFSET, which gets slower the deeper the page.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        return query.filter(tuple_(model.created_at, model.id) < (created_at, id)).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+def next_cursor(items: List[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after ``items``, or None when it was the last page."""
+    if len(items) < limit or not items:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from app.core import invalidation
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Redis channel used to tell every worker that a user changed
+USER_INVALIDATION_CHANNEL = "principal-cache:invalidate"
+
+class CurrentUser(NamedTuple):
+    """Compact snapshot of the authenticated user, cheap to cache and compare."""
+    id: int
+    email: str
+    organization_id: Optional[int]
+    role: Optional[str]
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: Any) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            organization_id=user.organization_id,
+            role=user.role,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser)
+        )
+
+class Principal(NamedTuple):
+    claims: Dict[str, Any]
+    user: CurrentUser
+
+# user id -> token keys currently cached for that user, for invalidation
+_keys_by_user: Dict[int, Set[str]] = {}
+_lock = threading.Lock()
+
+def _forget_key(key: str, principal: "Principal") -> None:
+    """Keep ``_keys_by_user`` in step with entries the cache drops on its own."""
+    with _lock:
+        keys = _keys_by_user.get(principal.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _keys_by_user[principal.user.id]
+
+# sha256(token) -> Principal
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    on_evict=_forget_key
+)
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def get_principal(token: str) -> Optional[Principal]:
+    """Return the verified claims and user for a token seen recently, if any."""
+    return principal_cache.get(token_key(token))
+
+def cache_principal(token: str, claims: Dict[str, Any], user: CurrentUser) -> None:
+    """Remember a verified token until the cache TTL or the token expiry, whichever is first."""
+    ttl = float(settings.PRINCIPAL_CACHE_TTL)
+    if claims.get("exp"):
+        ttl = min(ttl, claims["exp"] - time.time())
+    if ttl <= 0:
+        return
+    key = token_key(token)
+    with _lock:
+        _keys_by_user.setdefault(user.id, set()).add(key)
+    principal_cache.set(key, Principal(claims, user), ttl=ttl)
+
+def invalidate_user(user_id: int) -> None:
+    """Forget every cached token of a user in this worker and in every other worker."""
+    _drop_user(user_id)
+    invalidation.publish(USER_INVALIDATION_CHANNEL, str(user_id))
+
+def _drop_user(user_id: int) -> None:
+    with _lock:
+        keys = _keys_by_user.pop(user_id, set())
+    for key in keys:
+        principal_cache.invalidate(key)
+
+def _clear() -> None:
+    with _lock:
+        _keys_by_user.clear()
+    principal_cache.clear()
+
+invalidation.register(
+    USER_INVALIDATION_CHANNEL,
+    lambda payload: _drop_user(int(payload)),
+    on_reconnect=_clear
+)
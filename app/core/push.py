@@ -0,0 +1,31 @@
+import asyncio
+
+import requests
+
+from app.core.config import settings
+
+class PushError(Exception):
+    """The push gateway is not configured, could not be reached, or rejected the notification."""
+
+# Shared so connections to the gateway are kept alive between notifications
+_session = requests.Session()
+
+def send_push_notification_sync(user_id: int, title: str, body: str) -> None:
+    """Hand a push notification for every device of a user to the configured gateway."""
+    if not settings.PUSH_API_URL:
+        raise PushError("No push gateway is configured")
+    headers = {"Authorization": f"Bearer {settings.PUSH_API_KEY}"} if settings.PUSH_API_KEY else {}
+    try:
+        response = _session.post(
+            settings.PUSH_API_URL,
+            json={"user_id": user_id, "title": title, "body": body},
+            headers=headers,
+            timeout=settings.NOTIFICATION_CHANNEL_TIMEOUTS.get("push", settings.NOTIFICATION_CHANNEL_TIMEOUT)
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise PushError(str(e)) from e
+
+async def send_push_notification(user_id: int, title: str, body: str) -> None:
+    """Send a push notification without blocking the event loop."""
+    await asyncio.to_thread(send_push_notification_sync, user_id, title, body)
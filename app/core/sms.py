@@ -0,0 +1,31 @@
+import asyncio
+
+import requests
+
+from app.core.config import settings
+
+class SMSError(Exception):
+    """The SMS gateway is not configured, could not be reached, or rejected the message."""
+
+# Shared so connections to the gateway are kept alive between messages
+_session = requests.Session()
+
+def send_sms_sync(to: str, body: str) -> None:
+    """Hand a text message to the configured SMS gateway, blocking until it is accepted."""
+    if not settings.SMS_API_URL:
+        raise SMSError("No SMS gateway is configured")
+    headers = {"Authorization": f"Bearer {settings.SMS_API_KEY}"} if settings.SMS_API_KEY else {}
+    try:
+        response = _session.post(
+            settings.SMS_API_URL,
+            json={"from": settings.SMS_FROM_NUMBER, "to": to, "body": body},
+            headers=headers,
+            timeout=settings.NOTIFICATION_CHANNEL_TIMEOUTS.get("sms", settings.NOTIFICATION_CHANNEL_TIMEOUT)
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise SMSError(str(e)) from e
+
+async def send_sms(to: str, body: str) -> None:
+    """Send a text message without blocking the event loop."""
+    await asyncio.to_thread(send_sms_sync, to, body)
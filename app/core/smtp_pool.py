@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import Message
+from typing import Any, Callable, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection is dropped and the message retried on a fresh one
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+
+class SMTPConnectionPool:
+    """Bounded pool of authenticated SMTP connections.
+
+    Connections are opened lazily, upgraded with STARTTLS and logged in
+    once, then reused for many messages. At most ``size`` connections are
+    open at a time; callers beyond that wait for one to be released.
+    A connection idle for longer than ``idle_timeout`` is checked with
+    NOOP before reuse, and one that fails mid-send is replaced and the
+    message retried once.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 4,
+        timeout: float = 30.0,
+        idle_timeout: float = 60.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def send_message(self, message: Message) -> None:
+        """Send a message on a pooled connection, blocking until it is accepted."""
+        self._send(lambda smtp: smtp.send_message(message))
+
+    def sendmail(self, from_addr: str, to_addrs: List[str], message: bytes) -> None:
+        """Send an already serialized message, skipping the email package entirely."""
+        self._send(lambda smtp: smtp.sendmail(from_addr, to_addrs, message))
+
+    def _send(self, send: Callable[[smtplib.SMTP], Any]) -> None:
+        for attempt in (1, 2):
+            with self._connection() as connection:
+                try:
+                    send(connection.smtp)
+                    return
+                except _CONNECTION_ERRORS:
+                    self._quit(connection.smtp)
+                    connection.smtp = None
+                    if attempt == 2:
+                        raise
+                    logger.warning("SMTP connection to %s lost, reconnecting", self.host)
+
+    async def send_message_async(self, message: Message) -> None:
+        """Send a message without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), self.send_message, message)
+
+    async def sendmail_async(self, from_addr: str, to_addrs: List[str], message: bytes) -> None:
+        """Send an already serialized message without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), self.sendmail, from_addr, to_addrs, message)
+
+    def close(self) -> None:
+        """Close every idle connection and stop the worker threads."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(connection.smtp)
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    @contextmanager
+    def _connection(self) -> Iterator[_PooledConnection]:
+        self._slots.acquire()
+        connection = None
+        try:
+            connection = self._checkout()
+            yield connection
+        finally:
+            if connection is not None and connection.smtp is not None:
+                connection.last_used = time.monotonic()
+                self._idle.put(connection)
+            self._slots.release()
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return _PooledConnection(self._connect())
+            if time.monotonic() - connection.last_used < self.idle_timeout or self._is_alive(connection.smtp):
+                return connection
+            self._quit(connection.smtp)
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._quit(smtp)
+            raise
+        return smtp
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="smtp")
+            return self._executor
+
+    @staticmethod
+    def _is_alive(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(smtp: Optional[smtplib.SMTP]) -> None:
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.SMTP_HOST or "localhost",
+    port=settings.SMTP_PORT or 587,
+    username=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_TLS,
+    size=settings.SMTP_POOL_SIZE,
+    timeout=settings.SMTP_TIMEOUT,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT
+)
@@ -1,12 +1,16 @@
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
 from typing import Optional
 
 # Context variable to store the current tenant ID
 tenant_context: ContextVar[Optional[int]] = ContextVar("tenant_context", default=None)
 
-def set_tenant_context(tenant_id: int) -> None:
+def set_tenant_context(tenant_id: int) -> Token:
     """Set the current tenant ID in the context."""
-    tenant_context.set(tenant_id)
+    return tenant_context.set(tenant_id)
+
+def reset_tenant_context(token: Token) -> None:
+    """Restore the tenant context to what it was before ``set_tenant_context``."""
+    tenant_context.reset(token)
 
 def get_tenant_context() -> Optional[int]:
     """Get the current tenant ID from the context."""
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.core import invalidation
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis channel used to tell every worker to drop a cached organization
+TENANT_INVALIDATION_CHANNEL = "tenant-cache:invalidate"
+
+class TenantInfo(NamedTuple):
+    is_active: bool
+    settings: Dict[str, Any]
+
+# organization_id -> TenantInfo, or None for ids that do not exist
+tenant_cache = TTLCache(maxsize=settings.TENANT_CACHE_SIZE, ttl=settings.TENANT_CACHE_TTL)
+
+class TenantDomainIndex:
+    """In-memory map from request hosts to organization ids.
+
+    Built from ``Organization.domain`` (custom domains) and ``Organization.code``
+    (subdomains) at startup and refreshed one organization at a time when an
+    organization changes, so resolving a host never issues SQL. Full rebuilds
+    after a Redis reconnect and on a timer catch changes that were missed.
+    """
+
+    def __init__(self):
+        self._domains: Dict[str, int] = {}
+        self._codes: Dict[str, int] = {}
+        self._keys_by_org: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def load(self, organizations) -> None:
+        """Rebuild the index from ``(id, code, domain)`` rows."""
+        domains, codes, keys_by_org = {}, {}, {}
+        for organization_id, code, domain in organizations:
+            keys = (_normalize(domain), _normalize(code))
+            if keys[0]:
+                domains[keys[0]] = organization_id
+            if keys[1]:
+                codes[keys[1]] = organization_id
+            keys_by_org[organization_id] = keys
+        with self._lock:
+            self._domains, self._codes, self._keys_by_org = domains, codes, keys_by_org
+
+    def update(self, organization_id: int, code: Optional[str], domain: Optional[str]) -> None:
+        with self._lock:
+            self._discard(organization_id)
+            keys = (_normalize(domain), _normalize(code))
+            if keys[0]:
+                self._domains[keys[0]] = organization_id
+            if keys[1]:
+                self._codes[keys[1]] = organization_id
+            self._keys_by_org[organization_id] = keys
+
+    def remove(self, organization_id: int) -> None:
+        with self._lock:
+            self._discard(organization_id)
+
+    def resolve(self, host: str) -> Optional[int]:
+        """Return the organization for a ``Host`` header value, if any."""
+        host = _normalize(host.rsplit(":", 1)[0] if host.count(":") == 1 else host)
+        if not host:
+            return None
+        organization_id = self._domains.get(host)
+        if organization_id is None and "." in host:
+            organization_id = self._codes.get(host.split(".", 1)[0])
+        return organization_id
+
+    def _discard(self, organization_id: int) -> None:
+        domain, code = self._keys_by_org.pop(organization_id, (None, None))
+        if domain and self._domains.get(domain) == organization_id:
+            del self._domains[domain]
+        if code and self._codes.get(code) == organization_id:
+            del self._codes[code]
+
+tenant_domain_index = TenantDomainIndex()
+_index_refresher: Optional[threading.Thread] = None
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower().rstrip(".") if value else None
+
+def get_tenant(organization_id: int) -> Optional[TenantInfo]:
+    """Resolve an organization, only touching the database on a cache miss."""
+    cached = tenant_cache.get(organization_id, MISSING)
+    if cached is not MISSING:
+        return cached
+
+    from app.db.session import SessionLocal
+    from app.models.organization import Organization
+
+    db = SessionLocal()
+    try:
+        row = db.query(Organization.is_active, Organization.settings).filter(
+            Organization.id == organization_id
+        ).first()
+    finally:
+        db.close()
+
+    tenant = TenantInfo(bool(row.is_active), row.settings or {}) if row else None
+    # Unknown ids are cached briefly so bad headers cannot hammer the database
+    tenant_cache.set(organization_id, tenant, ttl=None if tenant else settings.TENANT_CACHE_NEGATIVE_TTL)
+    return tenant
+
+def load_domain_index() -> None:
+    """Build the host index from every organization."""
+    from app.db.session import SessionLocal
+    from app.models.organization import Organization
+
+    db = SessionLocal()
+    try:
+        tenant_domain_index.load(
+            db.query(Organization.id, Organization.code, Organization.domain).all()
+        )
+    finally:
+        db.close()
+
+def start_domain_index_refresh() -> None:
+    """Rebuild the host index every TENANT_DOMAIN_INDEX_REFRESH_INTERVAL seconds.
+
+    Picks up organization changes this worker was never told about: those
+    published while its Redis subscription was down, and, without
+    REDIS_URL, every change made through another worker.
+    """
+    global _index_refresher
+    if settings.TENANT_DOMAIN_INDEX_REFRESH_INTERVAL <= 0 or _index_refresher is not None:
+        return
+    _index_refresher = threading.Thread(target=_refresh_domain_index, name="tenant-domain-index", daemon=True)
+    _index_refresher.start()
+
+def _refresh_domain_index() -> None:
+    while True:
+        time.sleep(settings.TENANT_DOMAIN_INDEX_REFRESH_INTERVAL)
+        try:
+            load_domain_index()
+        except Exception:
+            logger.exception("Failed to refresh the tenant domain index")
+
+def resolve_tenant_host(host: str) -> Optional[int]:
+    """Resolve a subdomain or custom domain to an organization id without SQL."""
+    return tenant_domain_index.resolve(host)
+
+def invalidate_tenant(organization_id: int) -> None:
+    """Refresh an organization in this worker's caches and in every other worker's."""
+    _refresh_tenant(organization_id)
+    invalidation.publish(TENANT_INVALIDATION_CHANNEL, str(organization_id))
+
+def _refresh_tenant(organization_id: int) -> None:
+    """Drop the cached status of an organization and re-read its host index entry."""
+    from app.db.session import SessionLocal
+    from app.models.organization import Organization
+
+    tenant_cache.invalidate(organization_id)
+    db = SessionLocal()
+    try:
+        row = db.query(Organization.code, Organization.domain).filter(
+            Organization.id == organization_id
+        ).first()
+    finally:
+        db.close()
+    if row:
+        tenant_domain_index.update(organization_id, row.code, row.domain)
+    else:
+        tenant_domain_index.remove(organization_id)
+
+def _resync() -> None:
+    """Forget everything that may have changed while invalidations could not be received."""
+    tenant_cache.clear()
+    try:
+        load_domain_index()
+    except Exception:
+        # The periodic refresh tries again
+        logger.exception("Failed to rebuild the tenant domain index")
+
+invalidation.register(
+    TENANT_INVALIDATION_CHANNEL,
+    lambda payload: _refresh_tenant(int(payload)),
+    on_reconnect=_resync
+)
@@ -0,0 +1,81 @@
+import time
+from typing import Any, Dict
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["engine"]
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond pool_size",
+    ["engine"]
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+
+class _InstrumentedPool:
+    """Publishes checkout wait time, checked-out and overflow counts of a QueuePool."""
+
+    _engine_name = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self._engine_name).observe(time.perf_counter() - start)
+            self._update_gauges()
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        DB_POOL_CHECKED_OUT.labels(self._engine_name).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(self._engine_name).set(max(self.overflow(), 0))
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    _engine_name = "async"
+
+def engine_options(is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine from Settings.
+
+    With DB_PGBOUNCER the application keeps no pool of its own: PgBouncer
+    in transaction mode does the pooling, and server-side prepared
+    statements are disabled because consecutive transactions may land on
+    different server connections.
+    """
+    if settings.DB_PGBOUNCER:
+        options: Dict[str, Any] = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {"statement_cache_size": 0}
+        return options
+
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
+def async_database_url(url: str) -> Any:
+    """Disable asyncpg's prepared statement cache when running behind PgBouncer."""
+    if not settings.DB_PGBOUNCER:
+        return url
+    return make_url(url).update_query_dict({"prepared_statement_cache_size": "0"})
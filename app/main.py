@@ -1,8 +1,18 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.invalidation import start_invalidation_listener
+from app.core.smtp_pool import smtp_pool
+from app.core.tenant_cache import load_domain_index, start_domain_index_refresh
 from app.middleware.tenant import TenantMiddleware
+from app.services.delivery_queue import deliver_batch, delivery_queue, requeue_stale_pending
+from app.services.notification_gateway import notification_gateway
+from app.services.notification_scheduler import scheduled_dispatcher
+from app.ml.jobs import job_manager
+from app.ml.registry import model_registry
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -24,6 +34,58 @@ app.add_middleware(TenantMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Prometheus metrics (connection pool gauges, ...)
+app.mount("/metrics", make_asgi_app())
+
+@app.on_event("startup")
+def warm_models():
+    # Load ML artifacts before the first request instead of inside it
+    model_registry.warm()
+
+@app.on_event("startup")
+def prepare_caches():
+    # Build the host -> organization index so subdomain lookups need no SQL
+    load_domain_index()
+    start_domain_index_refresh()
+    start_invalidation_listener()
+
+@app.on_event("startup")
+async def start_notification_scheduler():
+    # Safe to run in every worker: due rows are claimed with SKIP LOCKED
+    if settings.NOTIFICATION_SCHEDULER_ENABLED:
+        scheduled_dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_notification_scheduler():
+    await scheduled_dispatcher.stop()
+
+@app.on_event("startup")
+async def start_notification_gateway():
+    notification_gateway.start()
+
+@app.on_event("shutdown")
+async def stop_notification_gateway():
+    await notification_gateway.stop()
+
+@app.on_event("startup")
+async def start_delivery_queue():
+    if settings.NOTIFICATION_QUEUE_CONSUMER_ENABLED:
+        # Notifications whose batch was lost with a crashed worker
+        await asyncio.to_thread(requeue_stale_pending, settings.NOTIFICATION_QUEUE_STALE_AFTER)
+        delivery_queue.start(deliver_batch)
+
+@app.on_event("shutdown")
+async def stop_delivery_queue():
+    await delivery_queue.stop()
+
+@app.on_event("shutdown")
+def stop_ml_jobs():
+    job_manager.shutdown()
+
+@app.on_event("shutdown")
+def close_smtp_connections():
+    smtp_pool.close()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Smart Education ERP System"}
@@ -1,71 +1,94 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.organization import Organization
-from app.core.tenant import set_tenant_context, clear_tenant_context
+from typing import Optional
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.tenant import set_tenant_context, reset_tenant_context
+from app.core.tenant_cache import get_tenant, resolve_tenant_host
 
-class TenantMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Skip tenant resolution for certain paths
-        if self._should_skip_tenant_resolution(request.url.path):
-            return await call_next(request)
+# Paths that never carry a tenant
+SKIP_PATHS = (
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/health",
+    "/metrics",
+    "/auth/login",
+    "/auth/register",
+    "/organizations"
+)
+
+class TenantMiddleware:
+    """Pure ASGI middleware that resolves the tenant and sets the tenant context.
+
+    Unlike ``BaseHTTPMiddleware`` it does not wrap the response in an extra task
+    and memory stream, so it adds no per-request overhead and leaves streaming
+    responses untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip tenant resolution for lifespan events and certain paths
+        if scope["type"] not in ("http", "websocket") or self._should_skip_tenant_resolution(scope["path"]):
+            await self.app(scope, receive, send)
+            return
         
         # Get tenant from request
-        tenant_id = self._get_tenant_id(request)
+        try:
+            tenant_id = self._get_tenant_id(scope)
+        except ValueError:
+            await self._reject(scope, receive, send, 400, "Invalid tenant ID")
+            return
         if not tenant_id:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+        
+        # Validate tenant exists; the database is only queried on a cache miss
+        tenant = get_tenant(tenant_id)
+        if not tenant or not tenant.is_active:
+            await self._reject(scope, receive, send, 404, "Organization not found or inactive")
+            return
         
-        # Validate tenant exists
-        db = SessionLocal()
+        # Expose the tenant on request.state and in the context for this request only
+        scope.setdefault("state", {})["tenant_id"] = tenant_id
+        token = set_tenant_context(tenant_id)
         try:
-            tenant = db.query(Organization).filter(Organization.id == tenant_id).first()
-            if not tenant or not tenant.is_active:
-                raise HTTPException(status_code=404, detail="Organization not found or inactive")
-            
-            # Set tenant context
-            set_tenant_context(tenant_id)
-            
-            # Process request
-            response = await call_next(request)
-            
-            return response
+            await self.app(scope, receive, send)
         finally:
-            # Clear tenant context
-            clear_tenant_context()
-            db.close()
+            reset_tenant_context(token)
     
     def _should_skip_tenant_resolution(self, path: str) -> bool:
         """Check if tenant resolution should be skipped for this path."""
-        skip_paths = [
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/health",
-            "/auth/login",
-            "/auth/register",
-            "/organizations"
-        ]
-        return any(path.startswith(skip_path) for skip_path in skip_paths)
+        return path.startswith(SKIP_PATHS)
     
-    def _get_tenant_id(self, request: Request) -> int:
+    def _get_tenant_id(self, scope: Scope) -> Optional[int]:
         """Extract tenant ID from request."""
+        headers = Headers(scope=scope)
+        
         # Try to get from header
-        tenant_id = request.headers.get("X-Tenant-ID")
+        tenant_id = headers.get("x-tenant-id")
         if tenant_id:
             return int(tenant_id)
         
-        # Try to get from subdomain
-        host = request.headers.get("host", "")
-        if "." in host:
-            subdomain = host.split(".")[0]
-            # In a real implementation, you would look up the tenant by subdomain
-            # For now, we'll just return None
-            return None
+        # Try to get from custom domain or subdomain (an in-memory lookup, no SQL)
+        host = headers.get("host", "")
+        if host:
+            tenant_id = resolve_tenant_host(host)
+            if tenant_id:
+                return tenant_id
         
         # Try to get from query parameter (for development/testing)
-        tenant_id = request.query_params.get("tenant_id")
+        tenant_id = QueryParams(scope.get("query_string", b"")).get("tenant_id")
         if tenant_id:
             return int(tenant_id)
         
-        return None 
\ No newline at end of file
+        return None
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, status_code: int, detail: str) -> None:
+        if scope["type"] == "websocket":
+            # Close the handshake; 4000-4999 are application-defined close codes
+            await send({"type": "websocket.close", "code": 4000 + status_code})
+            return
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
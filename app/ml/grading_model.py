@@ -1,22 +1,33 @@
 import numpy as np
+from scipy import sparse
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
-from typing import List, Dict, Union, Tuple
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Union, Tuple, Optional
+
+# Bumped whenever the layout of the persisted pipeline artifact changes
+PIPELINE_FORMAT = 1
 
 class AutoGradingModel:
     def __init__(self):
         self.vectorizer = TfidfVectorizer(max_features=1000)
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.is_trained = False
-        self.model_path = "app/ml/models/grading_model.joblib"
-        self.vectorizer_path = "app/ml/models/vectorizer.joblib"
+        self.version: Optional[str] = None
+        # The fitted vectorizer and classifier are persisted together as one artifact
+        self.model_path = "app/ml/models/grading_pipeline.joblib"
+
+    def preprocess_data(self, answers: List[str], correct_answers: List[str], fit: bool = False) -> sparse.csr_matrix:
+        """Preprocess the text data for training or prediction.
 
-    def preprocess_data(self, answers: List[str], correct_answers: List[str]) -> Tuple[np.ndarray, np.ndarray]:
-        """Preprocess the text data for training or prediction."""
+        The TF-IDF vocabulary is only learned when ``fit`` is set, which happens
+        once during training; inference reuses the fitted vectorizer.
+        """
         # Create features by comparing student answers with correct answers
         features = []
         for answer, correct in zip(answers, correct_answers):
@@ -28,11 +39,15 @@ class AutoGradingModel:
             features.append(feature)
 
         # Convert text to TF-IDF features
-        text_features = self.vectorizer.fit_transform([f['answer_text'] for f in features])
+        texts = [f['answer_text'] for f in features]
+        if fit:
+            text_features = self.vectorizer.fit_transform(texts)
+        else:
+            text_features = self.vectorizer.transform(texts)
         
-        # Combine with other features
+        # Combine with other features, keeping the matrix sparse
         additional_features = np.array([[f['length_ratio'], f['common_words']] for f in features])
-        X = np.hstack((text_features.toarray(), additional_features))
+        X = sparse.hstack((text_features, sparse.csr_matrix(additional_features)), format='csr')
         
         return X
 
@@ -44,7 +59,7 @@ class AutoGradingModel:
         grades = [item['grade'] for item in training_data]
 
         # Preprocess data
-        X = self.preprocess_data(answers, correct_answers)
+        X = self.preprocess_data(answers, correct_answers, fit=True)
         y = np.array(grades)
 
         # Split data
@@ -59,37 +74,82 @@ class AutoGradingModel:
         accuracy = accuracy_score(y_test, y_pred)
         report = classification_report(y_test, y_pred, output_dict=True)
 
-        # Save model and vectorizer
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.vectorizer, self.vectorizer_path)
+        # Save the fitted pipeline as a single versioned artifact
+        self.version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        self.save()
 
         return {
             'accuracy': accuracy,
             'report': report
         }
 
+    def save(self, path: Optional[str] = None) -> str:
+        """Persist the fitted vectorizer and classifier as one artifact."""
+        path = path or self.model_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a unique file next to the target and rename it, so readers never
+        # see a partial file and concurrent trainings do not share a temp file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            joblib.dump({
+                'format': PIPELINE_FORMAT,
+                'version': self.version,
+                'vectorizer': self.vectorizer,
+                'model': self.model
+            }, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def load(self, path: Optional[str] = None, mmap_mode: Optional[str] = None) -> None:
+        """Load a fitted pipeline artifact written by ``save``."""
+        artifact = joblib.load(path or self.model_path, mmap_mode=mmap_mode)
+        if not isinstance(artifact, dict) or artifact.get('format') != PIPELINE_FORMAT:
+            raise ValueError("Unsupported grading pipeline artifact, retrain the model")
+        self.vectorizer = artifact['vectorizer']
+        self.model = artifact['model']
+        self.version = artifact['version']
+        self.is_trained = True
+
     def predict(self, answer: str, correct_answer: str) -> Dict[str, Union[int, float]]:
         """Predict the grade for a given answer."""
+        return self.predict_many([answer], [correct_answer])[0]
+
+    def predict_many(self, answers: List[str], correct_answers: List[str]) -> List[Dict[str, Union[int, float]]]:
+        """Predict grades for a batch of answers in a single model invocation.
+
+        Results are returned in the same order as the inputs.
+        """
+        if len(answers) != len(correct_answers):
+            raise ValueError("answers and correct_answers must have the same length")
+        if not answers:
+            return []
+
         if not self.is_trained:
-            if os.path.exists(self.model_path) and os.path.exists(self.vectorizer_path):
-                self.model = joblib.load(self.model_path)
-                self.vectorizer = joblib.load(self.vectorizer_path)
-                self.is_trained = True
+            if os.path.exists(self.model_path):
+                self.load()
             else:
                 raise ValueError("Model not trained yet!")
 
-        # Preprocess single answer
-        X = self.preprocess_data([answer], [correct_answer])
-        
-        # Make prediction
-        grade = self.model.predict(X)[0]
-        confidence = np.max(self.model.predict_proba(X)[0])
+        # Featurize the whole batch into one sparse matrix
+        X = self.preprocess_data(answers, correct_answers)
 
-        return {
-            'predicted_grade': int(grade),
-            'confidence': float(confidence)
-        }
+        # One predict_proba call gives both the grade and its confidence
+        probabilities = self.model.predict_proba(X)
+        best = np.argmax(probabilities, axis=1)
+        grades = self.model.classes_[best]
+        confidences = probabilities[np.arange(len(best)), best]
+
+        return [
+            {
+                'predicted_grade': int(grade),
+                'confidence': float(confidence)
+            }
+            for grade, confidence in zip(grades, confidences)
+        ]
 
     def generate_sample_data(self, n_samples: int = 100) -> List[Dict[str, Union[str, int]]]:
         """Generate sample training data."""
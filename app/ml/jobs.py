@@ -0,0 +1,309 @@
+import json
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.ml.grading_model import AutoGradingModel
+from app.ml.performance_predictor import PerformancePredictor
+from app.ml.registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+TRAINERS = {
+    "grading_model": AutoGradingModel,
+    "performance_model": PerformancePredictor
+}
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+def run_training(
+    model_name: str,
+    n_samples: int = 100,
+    report: Optional[Callable[[float], None]] = None
+) -> Dict[str, Any]:
+    """Train a model and publish its artifact. Runs inside a worker process."""
+    report = report or (lambda progress: None)
+    model = TRAINERS[model_name]()
+
+    report(0.1)
+    sample_data = model.generate_sample_data(n_samples)
+    report(0.3)
+    # train() writes the artifact atomically; serving processes pick it up from disk
+    metrics = model.train(sample_data)
+    report(1.0)
+
+    return {"version": model.version, "metrics": metrics}
+
+# Redis hash holding one job's fields, JSON-encoded
+JOB_KEY = "ml-job:{}"
+
+class MemoryJobStore:
+    """Job state held in this process. Only the API worker that queued a job can see it."""
+
+    def __init__(self, retention: int):
+        self.retention = retention
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            self._prune()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _prune(self) -> None:
+        # Finished jobs stay queryable for ``retention`` seconds
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+class RedisJobStore:
+    """Job state shared by every API worker and training process.
+
+    Each job is a hash, so the training process can write its progress
+    while the API worker writes the final result, without overwriting
+    each other. Keys expire ``retention`` seconds after their last write.
+    """
+
+    def __init__(self, url: str, retention: int):
+        import redis
+        self.retention = retention
+        self._redis = redis.Redis.from_url(url)
+
+    def save(self, job: Dict[str, Any]) -> None:
+        self.update(job["id"], **job)
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        pipe = self._redis.pipeline()
+        pipe.hset(JOB_KEY.format(job_id), mapping={
+            name: json.dumps(value, default=str) for name, value in fields.items()
+        })
+        pipe.expire(JOB_KEY.format(job_id), self.retention)
+        pipe.execute()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        fields = self._redis.hgetall(JOB_KEY.format(job_id))
+        if not fields:
+            return None
+        return {name.decode(): json.loads(value) for name, value in fields.items()}
+
+job_store = (
+    RedisJobStore(settings.REDIS_URL, settings.ML_JOB_RETENTION)
+    if settings.REDIS_URL else MemoryJobStore(settings.ML_JOB_RETENTION)
+)
+
+def _report_progress(progress: Dict[str, float], job_id: str, value: float) -> None:
+    progress[job_id] = value
+    # Runs in the training process; API workers other than the submitting one read the shared store
+    if isinstance(job_store, RedisJobStore):
+        try:
+            job_store.update(job_id, status=JobStatus.RUNNING, progress=value)
+        except Exception:
+            logger.exception("Failed to record progress of training job %s", job_id)
+
+class TrainingJob:
+    def __init__(self, model_name: str, n_samples: int):
+        self.id = uuid.uuid4().hex
+        self.model_name = model_name
+        self.n_samples = n_samples
+        self.status = JobStatus.QUEUED
+        self.progress = 0.0
+        self.version: Optional[str] = None
+        self.metrics: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "model_name": self.model_name,
+            "status": self.status,
+            "progress": self.progress,
+            "version": self.version,
+            "metrics": self.metrics,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+class JobManager:
+    """Runs model training off the request path.
+
+    With the default ``process`` backend jobs run in a local process pool.
+    With the ``celery`` backend they are sent to the worker defined in
+    ``app.worker`` and their progress is read back from the Celery result
+    backend. Job state is kept in ``store``; use the Redis store when
+    several API workers serve ``/ml/jobs``.
+    """
+
+    def __init__(self, store: Any, backend: str = "process", max_workers: int = 1):
+        if backend not in ("process", "celery"):
+            raise ValueError(f"Unknown ML job backend '{backend}'")
+        self.backend = backend
+        self.max_workers = max_workers
+        self.store = store
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._lock = threading.Lock()
+
+    def submit(self, model_name: str, n_samples: int = 100) -> TrainingJob:
+        """Queue a training job and return immediately."""
+        if model_name not in TRAINERS:
+            raise ValueError(f"Unknown model '{model_name}'")
+
+        job = TrainingJob(model_name, n_samples)
+        self.store.save(job.to_dict())
+        if self.backend == "celery":
+            from app.worker import train_model
+            train_model.apply_async(args=(model_name, n_samples), task_id=job.id)
+            return job
+
+        executor = self._get_executor()
+        try:
+            future = self._submit(executor, job)
+        except BrokenProcessPool:
+            # A training process died and took the pool with it; start a fresh one
+            logger.warning("ML training pool is broken, recreating it")
+            self._reset_executor(executor)
+            executor = self._get_executor()
+            future = self._submit(executor, job)
+        future.add_done_callback(partial(self._on_done, job, executor))
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the current state of a job, or None if it is unknown."""
+        if self.backend == "celery":
+            return self._get_celery_job(job_id)
+
+        job = self.store.get(job_id)
+        if not job:
+            return None
+        if job["status"] in (JobStatus.QUEUED, JobStatus.RUNNING) and self._progress is not None:
+            # Fresher than the store for jobs this process submitted
+            progress = self._progress.get(job_id)
+            if progress is not None:
+                job["status"] = JobStatus.RUNNING
+                job["progress"] = progress
+        return job
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager:
+            self._manager.shutdown()
+            self._manager = None
+
+    def _submit(self, executor: ProcessPoolExecutor, job: TrainingJob) -> Future:
+        return executor.submit(
+            run_training,
+            job.model_name,
+            job.n_samples,
+            partial(_report_progress, self._progress, job.id)
+        )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                if self._manager is None:
+                    # Progress is reported through a manager dict shared with the workers
+                    self._manager = multiprocessing.Manager()
+                    self._progress = self._manager.dict()
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            # Another job may already have replaced it
+            if self._executor is broken:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _on_done(self, job: TrainingJob, executor: ProcessPoolExecutor, future: Future) -> None:
+        finished_at = datetime.utcnow()
+        try:
+            error = future.exception()
+            if error:
+                if isinstance(error, BrokenProcessPool):
+                    self._reset_executor(executor)
+                raise error
+            result = future.result()
+            # Publish the new artifact to the serving models before reporting success
+            model_registry.reload(job.model_name)
+        except Exception as error:
+            logger.error("Training job %s for %s failed: %s", job.id, job.model_name, error)
+            self.store.update(
+                job.id,
+                status=JobStatus.FAILED,
+                error=str(error) or type(error).__name__,
+                finished_at=finished_at
+            )
+        else:
+            self.store.update(
+                job.id,
+                status=JobStatus.SUCCEEDED,
+                progress=1.0,
+                version=result["version"],
+                metrics=result["metrics"],
+                finished_at=finished_at
+            )
+        finally:
+            self._progress.pop(job.id, None)
+
+    def _get_celery_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        from app.worker import celery_app
+
+        job = self.store.get(job_id)
+        result = celery_app.AsyncResult(job_id)
+        if not job and result.state == "PENDING":
+            return None
+
+        state = {
+            "PENDING": JobStatus.QUEUED,
+            "STARTED": JobStatus.RUNNING,
+            "PROGRESS": JobStatus.RUNNING,
+            "SUCCESS": JobStatus.SUCCEEDED,
+            "FAILURE": JobStatus.FAILED
+        }.get(result.state, JobStatus.QUEUED)
+        info = result.info if isinstance(result.info, dict) else {}
+        return {
+            "id": job_id,
+            "model_name": job["model_name"] if job else info.get("model_name"),
+            "status": state,
+            "progress": 1.0 if state == JobStatus.SUCCEEDED else info.get("progress", 0.0),
+            "version": info.get("version"),
+            "metrics": info.get("metrics"),
+            "error": str(result.info) if state == JobStatus.FAILED else None,
+            "created_at": job["created_at"] if job else None,
+            "finished_at": result.date_done
+        }
+
+job_manager = JobManager(job_store, backend=settings.ML_JOB_BACKEND, max_workers=settings.ML_JOB_WORKERS)
@@ -6,85 +6,187 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 import os
-from typing import List, Dict, Union, Tuple
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Union, Tuple, Optional
+
+# Bumped whenever the layout of the persisted artifact changes
+ARTIFACT_FORMAT = 2
+
+# Quantiles bounding the reported prediction interval (an 80% interval)
+INTERVAL_QUANTILES = (0.1, 0.9)
+
+# The bounds need less precision than the point estimate, so the quantile
+# models use half the trees at twice the learning rate to keep batch
+# inference under 2x the cost of the point model alone
+QUANTILE_N_ESTIMATORS = 50
+QUANTILE_LEARNING_RATE = 0.2
+
+# Column order of the feature matrix fed to the scaler and model
+FEATURES = ['attendance_rate', 'assignment_completion', 'quiz_average', 'study_hours']
 
 class PerformancePredictor:
     def __init__(self):
-        self.model = GradientBoostingRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=3,
-            random_state=42
-        )
+        self.model = self._build_regressor()
+        # Quantile regressors trained alongside the point model for the interval
+        self.lower_model = self._build_regressor(quantile=INTERVAL_QUANTILES[0])
+        self.upper_model = self._build_regressor(quantile=INTERVAL_QUANTILES[1])
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.version: Optional[str] = None
+        # The fitted scaler and regressors are persisted together as one artifact
         self.model_path = "app/ml/models/performance_model.joblib"
-        self.scaler_path = "app/ml/models/performance_scaler.joblib"
 
-    def preprocess_data(self, data: List[Dict[str, Union[float, int]]]) -> Tuple[np.ndarray, np.ndarray]:
-        """Preprocess the student data for training or prediction."""
+    @staticmethod
+    def _build_regressor(quantile: Optional[float] = None) -> GradientBoostingRegressor:
+        """Build the point regressor, or a quantile regressor when ``quantile`` is set."""
+        if quantile is None:
+            return GradientBoostingRegressor(
+                n_estimators=100,
+                learning_rate=0.1,
+                max_depth=3,
+                random_state=42
+            )
+        return GradientBoostingRegressor(
+            loss='quantile',
+            alpha=quantile,
+            n_estimators=QUANTILE_N_ESTIMATORS,
+            learning_rate=QUANTILE_LEARNING_RATE,
+            max_depth=3,
+            random_state=42
+        )
+
+    def preprocess_data(self, data: List[Dict[str, Union[float, int]]], fit: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Preprocess the student data for training or prediction.
+
+        The scaler is only fitted when ``fit`` is set, which happens once during
+        training; inference reuses the persisted scaler.
+        """
         df = pd.DataFrame(data)
         
         # Extract features and target
-        features = ['attendance_rate', 'assignment_completion', 'quiz_average', 'study_hours']
-        X = df[features].values
+        X = df[FEATURES].values
         y = df['performance_score'].values if 'performance_score' in df.columns else None
         
         # Scale features
-        X = self.scaler.fit_transform(X)
+        X = self.scaler.fit_transform(X) if fit else self.scaler.transform(X)
         
         return X, y
 
     def train(self, training_data: List[Dict[str, Union[float, int]]]) -> Dict[str, float]:
         """Train the model with student performance data."""
         # Preprocess data
-        X, y = self.preprocess_data(training_data)
+        X, y = self.preprocess_data(training_data, fit=True)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Train model
+        # Train the point model and the interval bounds
         self.model.fit(X_train, y_train)
+        self.lower_model.fit(X_train, y_train)
+        self.upper_model.fit(X_train, y_train)
         self.is_trained = True
         
         # Evaluate model
         y_pred = self.model.predict(X_test)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
+        lower, upper = self._predict_bounds(X_test, y_pred)
+        coverage = np.mean((y_test >= lower) & (y_test <= upper))
         
-        # Save model and scaler
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.scaler, self.scaler_path)
+        # Save model and scaler as a single versioned artifact
+        self.version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        self.save()
         
         return {
             'mean_squared_error': float(mse),
-            'r2_score': float(r2)
+            'r2_score': float(r2),
+            'interval_coverage': float(coverage)
         }
 
+    def save(self, path: Optional[str] = None) -> str:
+        """Persist the fitted scaler and model as one artifact."""
+        path = path or self.model_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a unique file next to the target and rename it, so readers never
+        # see a partial file and concurrent trainings do not share a temp file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            joblib.dump({
+                'format': ARTIFACT_FORMAT,
+                'version': self.version,
+                'scaler': self.scaler,
+                'model': self.model,
+                'lower_model': self.lower_model,
+                'upper_model': self.upper_model
+            }, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
+
+    def load(self, path: Optional[str] = None, mmap_mode: Optional[str] = None) -> None:
+        """Load a fitted artifact written by ``save``."""
+        artifact = joblib.load(path or self.model_path, mmap_mode=mmap_mode)
+        if not isinstance(artifact, dict) or artifact.get('format') != ARTIFACT_FORMAT:
+            raise ValueError("Unsupported performance model artifact, retrain the model")
+        self.scaler = artifact['scaler']
+        self.model = artifact['model']
+        self.lower_model = artifact['lower_model']
+        self.upper_model = artifact['upper_model']
+        self.version = artifact['version']
+        self.is_trained = True
+
     def predict(self, student_data: Dict[str, Union[float, int]]) -> Dict[str, float]:
         """Predict student performance based on current metrics."""
+        X = np.array([[student_data[feature] for feature in FEATURES]], dtype=float)
+        return self.predict_many(X)[0]
+
+    def predict_many(self, X: np.ndarray) -> List[Dict[str, float]]:
+        """Predict performance for many students at once.
+
+        ``X`` holds one row per student with columns in ``FEATURES`` order.
+        Missing values (NaN) are replaced by the training mean of their column,
+        which the scaler maps to zero, so they do not push the score either way.
+        """
         if not self.is_trained:
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
-                self.is_trained = True
+            if os.path.exists(self.model_path):
+                self.load()
             else:
                 raise ValueError("Model not trained yet!")
 
-        # Preprocess single student data
-        X, _ = self.preprocess_data([student_data])
-        
-        # Make prediction
-        predicted_score = self.model.predict(X)[0]
+        X = np.asarray(X, dtype=float)
+        if X.size == 0:
+            return []
+        X = np.where(np.isnan(X), self.scaler.mean_, X)
+
+        # Scale once and score the whole batch with all three models
+        X = self.scaler.transform(X)
+        predicted_scores = self.model.predict(X)
+        lower, upper = self._predict_bounds(X, predicted_scores)
         
-        return {
-            'predicted_performance': float(predicted_score),
-            'confidence_interval': {
-                'lower': float(predicted_score - 5),  # Simplified confidence interval
-                'upper': float(predicted_score + 5)
+        return [
+            {
+                'predicted_performance': float(score),
+                'confidence_interval': {
+                    'lower': float(low),
+                    'upper': float(high)
+                }
             }
-        }
+            for score, low, high in zip(predicted_scores, lower, upper)
+        ]
+
+    def _predict_bounds(self, X: np.ndarray, predicted_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict the interval bounds for already-scaled features.
+
+        Independently trained quantile models can cross each other or the point
+        estimate, so the bounds are clipped to always contain it.
+        """
+        lower = np.minimum(self.lower_model.predict(X), predicted_scores)
+        upper = np.maximum(self.upper_model.predict(X), predicted_scores)
+        return lower, upper
 
     def generate_sample_data(self, n_samples: int = 100) -> List[Dict[str, Union[float, int]]]:
         """Generate sample training data for student performance."""
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.ml.grading_model import AutoGradingModel
+from app.ml.performance_predictor import PerformancePredictor
+
+logger = logging.getLogger(__name__)
+
+def mapped_memory(path: str) -> Tuple[Optional[int], Optional[int]]:
+    """Resident and proportional (PSS) bytes of this process's mappings of ``path``.
+
+    PSS splits each shared page evenly between the processes mapping it, so
+    summing it across workers gives the real cost of the shared arrays.
+    Returns ``(None, None)`` where /proc/self/smaps is not available.
+    """
+    rss = pss = 0
+    current = False
+    try:
+        with open("/proc/self/smaps") as smaps:
+            for line in smaps:
+                field, _, rest = line.partition(" ")
+                if not field.endswith(":"):
+                    # Mapping header: address perms offset dev inode [path]
+                    current = line.split(None, 5)[5:] == [path + "\n"]
+                elif current and field == "Rss:":
+                    rss += int(rest.split()[0]) * 1024
+                elif current and field == "Pss:":
+                    pss += int(rest.split()[0]) * 1024
+    except OSError:
+        return None, None
+    return rss, pss
+
+class ModelEntry:
+    """Book-keeping for one served model."""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.model = factory()
+        self.artifact_path: str = self.model.model_path
+        self.artifact_mtime: Optional[float] = None
+        self.artifact_bytes: int = 0
+        self.loaded_at: Optional[datetime] = None
+        self.load_seconds: Optional[float] = None
+        self.last_checked: float = 0.0
+
+class ModelRegistry:
+    """Process-wide registry of the models served by the ML endpoints.
+
+    Artifacts are loaded with ``mmap_mode='r'`` so the numpy arrays inside
+    them live in the OS page cache and are shared by every worker process
+    on the host. A newer artifact on disk is loaded into a fresh model
+    instance and swapped in with a single reference assignment, so requests
+    already holding the previous instance finish against it undisturbed.
+    """
+
+    def __init__(self, check_interval: float = 30.0):
+        self.check_interval = check_interval
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register a model under ``name``; ``factory`` builds an untrained instance."""
+        self._entries[name] = ModelEntry(name, factory)
+
+    def warm(self) -> None:
+        """Load every registered model whose artifact exists. Called at startup."""
+        for name in self._entries:
+            try:
+                self.reload(name)
+            except Exception:
+                logger.exception("Failed to warm model %s", name)
+
+    def get(self, name: str) -> Any:
+        """Return the current instance of a model, picking up newer artifacts."""
+        entry = self._get_entry(name)
+        now = time.monotonic()
+        if now - entry.last_checked >= self.check_interval:
+            entry.last_checked = now
+            if self._artifact_changed(entry):
+                try:
+                    self.reload(name)
+                except Exception:
+                    # Keep serving the model we already have
+                    logger.exception("Failed to hot-reload model %s", name)
+        return entry.model
+
+    def reload(self, name: str) -> bool:
+        """Load the artifact for ``name`` from disk and swap it in.
+
+        Returns False when there is no artifact to load yet.
+        """
+        entry = self._get_entry(name)
+        with self._lock:
+            try:
+                stat = os.stat(entry.artifact_path)
+            except FileNotFoundError:
+                return False
+            if entry.artifact_mtime == stat.st_mtime and entry.model.is_trained:
+                return True
+
+            start = time.perf_counter()
+            model = entry.factory()
+            model.load(entry.artifact_path, mmap_mode="r")
+
+            entry.load_seconds = time.perf_counter() - start
+            entry.loaded_at = datetime.utcnow()
+            entry.artifact_mtime = stat.st_mtime
+            entry.artifact_bytes = stat.st_size
+            # Atomic swap: in-flight requests keep the instance they already hold
+            entry.model = model
+            logger.info("Loaded model %s version %s", name, model.version)
+            return True
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Describe the version, load time and memory footprint of every model."""
+        status = {}
+        for name, entry in self._entries.items():
+            resident_bytes, shared_pss_bytes = mapped_memory(os.path.abspath(entry.artifact_path))
+            status[name] = {
+                "trained": entry.model.is_trained,
+                "version": entry.model.version,
+                "model_file_exists": os.path.exists(entry.artifact_path),
+                "loaded_at": entry.loaded_at.isoformat() if entry.loaded_at else None,
+                "load_seconds": entry.load_seconds,
+                "artifact_bytes": entry.artifact_bytes,
+                # Pages of the memory-mapped arrays resident in this worker
+                "resident_bytes": resident_bytes,
+                # This worker's share of those pages
+                "shared_pss_bytes": shared_pss_bytes
+            }
+        return status
+
+    def _get_entry(self, name: str) -> ModelEntry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise ValueError(f"Unknown model '{name}'")
+
+    def _artifact_changed(self, entry: ModelEntry) -> bool:
+        try:
+            return os.stat(entry.artifact_path).st_mtime != entry.artifact_mtime
+        except FileNotFoundError:
+            return False
+
+model_registry = ModelRegistry(check_interval=settings.ML_MODEL_RELOAD_INTERVAL)
+model_registry.register("grading_model", AutoGradingModel)
+model_registry.register("performance_model", PerformancePredictor)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, Text, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class Grade(Base):
+    __tablename__ = "grades"
+    __table_args__ = (
+        Index("ix_grades_student_id_course_id", "student_id", "course_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    score = Column(Float, nullable=False)  # percentage, 0-100
+    feedback = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    student = relationship("Student", back_populates="grades")
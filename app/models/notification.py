@@ -1,7 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
+import enum
+
 from app.db.base_class import Base
 
+class NotificationStatus(str, enum.Enum):
+    PENDING = "pending"
+    SCHEDULED = "scheduled"
+    SENT = "sent"
+    DELIVERED = "delivered"
+    READ = "read"
+    FAILED = "failed"
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -15,5 +25,49 @@ class Notification(Base):
     metadata = Column(JSON, nullable=True)
     is_read = Column(Boolean, default=False)
     is_delivered = Column(Boolean, default=False)
+    # Channels to deliver on, and the outcome of each: {"email": {"status": "sent", ...}}
+    channels = Column(JSON, nullable=True)
+    delivery_status = Column(JSON, nullable=True)
+    status = Column(String(20), nullable=False, default=NotificationStatus.PENDING.value, server_default="pending")
+    scheduled_for = Column(DateTime(timezone=True), nullable=True)
+    # When the delivery pipeline last put the row on a lane; rows it never queued are never swept
+    queued_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class UserNotificationStats(Base):
+    """Per-user notification counters, maintained alongside the notifications themselves."""
+    __tablename__ = "user_notification_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Listing a user's notifications newest first, with (created_at, id) keyset pagination
+Index(
+    "ix_notifications_user_created_at",
+    Notification.organization_id,
+    Notification.user_id,
+    Notification.created_at.desc(),
+    Notification.id.desc()
+)
+# Unread badge and unread-only listings only ever touch unread rows
+Index(
+    "ix_notifications_unread",
+    Notification.organization_id,
+    Notification.user_id,
+    Notification.created_at.desc(),
+    postgresql_where=Notification.is_read == False
+)
+# Scheduled notifications still waiting to be dispatched, in due order
+Index(
+    "ix_notifications_scheduled_for",
+    Notification.scheduled_for,
+    postgresql_where=Notification.status == NotificationStatus.SCHEDULED.value
+)
+# Pending notifications by the time they were queued, for the stale-batch sweep
+Index(
+    "ix_notifications_queued_at",
+    Notification.queued_at,
+    postgresql_where=Notification.status == NotificationStatus.PENDING.value
+)
@@ -1 +1,16 @@
- 
\ No newline at end of file
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class Organization(Base):
+    __tablename__ = "organizations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    code = Column(String(50), unique=True, index=True, nullable=False)
+    domain = Column(String(255), unique=True, index=True, nullable=True)
+    logo_url = Column(String(255), nullable=True)
+    settings = Column(JSON, nullable=True)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Boolean, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        # Keyset pagination: newest first within a tenant
+        Index("ix_students_organization_id_created_at", "organization_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
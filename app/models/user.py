@@ -1,9 +1,13 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination: newest first within a tenant
+        Index("ix_users_organization_id_created_at", "organization_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -1,7 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
+from app.core.pagination import NEXT_CURSOR_HEADER, next_cursor
 from app.database import get_db
 from app.services.notification import NotificationService
 from app.schemas.notification import (
@@ -34,12 +35,18 @@ def get_notification(
 @router.get("/user/{user_id}", response_model=List[NotificationResponse])
 def get_user_notifications(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     notification_service = NotificationService(db)
-    return notification_service.get_user_notifications(user_id, skip, limit)
+    notifications = notification_service.get_user_notifications(user_id, skip, limit, cursor)
+    cursor = next_cursor(notifications, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return notifications
 
 @router.put("/{notification_id}", response_model=NotificationResponse)
 def update_notification(
@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import datetime
 from enum import Enum
 
@@ -19,6 +19,7 @@ class NotificationPriority(str, Enum):
 
 class NotificationStatus(str, Enum):
     PENDING = "pending"
+    SCHEDULED = "scheduled"
     SENT = "sent"
     DELIVERED = "delivered"
     READ = "read"
@@ -39,6 +40,9 @@ class NotificationBase(BaseModel):
 
 class NotificationCreate(NotificationBase):
     user_id: int
+    channels: List[NotificationChannel] = Field(default_factory=lambda: [NotificationChannel.IN_APP])
+    # Deliver at this time instead of straight away
+    scheduled_for: Optional[datetime] = None
 
 class NotificationUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -54,8 +58,53 @@ class NotificationResponse(NotificationBase):
     user_id: int
     is_read: bool
     is_delivered: bool
+    channels: Optional[List[str]] = None
+    delivery_status: Optional[Dict[str, Dict[str, Any]]] = None
+    status: NotificationStatus = NotificationStatus.PENDING
+    scheduled_for: Optional[datetime] = None
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class NotificationBulkSelection(BaseModel):
+    """Selects the current user's notifications by id, or everything up to a point in time."""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    all_before: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "NotificationBulkSelection":
+        if (self.ids is None) == (self.all_before is None):
+            raise ValueError("Provide exactly one of 'ids' or 'all_before'")
+        return self
+
+class NotificationBulkResult(BaseModel):
+    count: int
+    ids: List[int]
+
+class NotificationAudienceType(str, Enum):
+    COURSE = "course"
+    ROLE = "role"
+    ORGANIZATION = "organization"
+
+class NotificationAudience(BaseModel):
+    type: NotificationAudienceType
+    course_id: Optional[int] = None
+    role: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_selector(self) -> "NotificationAudience":
+        if self.type == NotificationAudienceType.COURSE and self.course_id is None:
+            raise ValueError("'course_id' is required for a course audience")
+        if self.type == NotificationAudienceType.ROLE and not self.role:
+            raise ValueError("'role' is required for a role audience")
+        return self
+
+class NotificationFanoutCreate(NotificationBase):
+    audience: NotificationAudience
+    channels: List[NotificationChannel] = Field(default_factory=lambda: [NotificationChannel.IN_APP])
+
+class NotificationFanoutResult(BaseModel):
+    recipients: int
+    batches: int
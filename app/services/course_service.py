@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.course import Course
 from app.schemas.course import CourseCreate, CourseUpdate
+from app.core.pagination import paginate
 from app.core.tenant import get_tenant_id
 
 class CourseService:
@@ -40,10 +41,12 @@ class CourseService:
         skip: int = 0,
         limit: int = 100,
         teacher_id: Optional[int] = None,
-        active_only: bool = False
+        active_only: bool = False,
+        cursor: Optional[str] = None
     ) -> List[Course]:
         """
-        Get all courses.
+        Get all courses, newest first. Pass the cursor returned for the
+        previous page to continue from it; skip is used without one.
         """
         tenant_id = get_tenant_id()
         query = db.query(Course)
@@ -58,7 +61,7 @@ class CourseService:
         if active_only:
             query = query.filter(Course.is_active == True)
             
-        return query.offset(skip).limit(limit).all()
+        return paginate(query, Course, skip=skip, limit=limit, cursor=cursor)
 
     @staticmethod
     def create_course(db: Session, course_in: CourseCreate) -> Course:
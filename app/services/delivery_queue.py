@@ -0,0 +1,383 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import Integer, all_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_QUEUE_DEPTH = Gauge(
+    "notification_queue_depth",
+    "Delivery batches waiting in a priority lane",
+    ["lane"]
+)
+NOTIFICATION_QUEUE_IN_FLIGHT = Gauge(
+    "notification_queue_in_flight",
+    "Delivery batches of a priority lane being sent right now",
+    ["lane"]
+)
+NOTIFICATION_QUEUE_WAIT = Histogram(
+    "notification_queue_wait_seconds",
+    "Time a delivery batch waited in its lane before being picked up",
+    ["lane"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+
+# Redis list holding one lane, oldest batch at the right
+QUEUE_KEY = "notification-queue:{}"
+# Batches a consumer has taken from a lane and not finished yet
+PROCESSING_KEY = "notification-queue:{}:processing:{}"
+# Consumers that may hold batches, and the key each one keeps alive while it runs
+CONSUMERS_KEY = "notification-queue:consumers"
+CONSUMER_KEY = "notification-queue:consumer:{}"
+
+def _batch_ids(items: Iterable[Any]) -> Set[int]:
+    return {notification_id for item in items for notification_id in json.loads(item)["ids"]}
+
+class MemoryQueueBackend:
+    """Lanes held in this process. For development and tests.
+
+    Batches taken by the consumer are kept until acknowledged, like the
+    Redis backend, but the lanes die with the process; the notifications
+    they held are still PENDING and ``requeue_stale_pending`` puts them
+    back on the next start.
+    """
+
+    def __init__(self):
+        self._lanes: Dict[str, Deque[str]] = {}
+        self._processing: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def push(self, lane: str, item: str) -> int:
+        with self._lock:
+            queue = self._lanes.setdefault(lane, deque())
+            queue.append(item)
+            return len(queue)
+
+    def pop(self, lane: str) -> Tuple[Optional[str], int]:
+        with self._lock:
+            queue = self._lanes.get(lane)
+            if not queue:
+                return None, 0
+            item = queue.popleft()
+            self._processing.setdefault(lane, []).append(item)
+            return item, len(queue)
+
+    def ack(self, lane: str, item: str) -> None:
+        with self._lock:
+            self._processing[lane].remove(item)
+
+    def maintain(self, lanes: List[str]) -> None:
+        # There is no other consumer whose batches could be orphaned
+        pass
+
+    def queued_ids(self, lanes: List[str]) -> Set[int]:
+        with self._lock:
+            items = [item for lane in lanes for item in self._lanes.get(lane, ())]
+            items += [item for lane in lanes for item in self._processing.get(lane, ())]
+        return _batch_ids(items)
+
+class RedisQueueBackend:
+    """Lanes shared by every worker.
+
+    A batch is moved atomically from its lane to this consumer's processing
+    list when taken, and removed from there only once it has been handled,
+    so a worker that dies mid-delivery does not take its batches with it.
+    Every consumer refreshes a heartbeat key; the processing lists of a
+    consumer whose heartbeat has expired are pushed back onto the front of
+    their lanes by whichever consumer notices first.
+    """
+
+    def __init__(self, url: str, consumer_ttl: int = 30):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.consumer_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.consumer_ttl = consumer_ttl
+        self._maintained_at = 0.0
+
+    def push(self, lane: str, item: str) -> int:
+        return self._redis.lpush(QUEUE_KEY.format(lane), item)
+
+    def pop(self, lane: str) -> Tuple[Optional[str], int]:
+        pipe = self._redis.pipeline()
+        pipe.lmove(QUEUE_KEY.format(lane), PROCESSING_KEY.format(lane, self.consumer_id), "RIGHT", "LEFT")
+        pipe.llen(QUEUE_KEY.format(lane))
+        item, depth = pipe.execute()
+        return (item.decode() if item is not None else None), depth
+
+    def ack(self, lane: str, item: str) -> None:
+        self._redis.lrem(PROCESSING_KEY.format(lane, self.consumer_id), 1, item)
+
+    def maintain(self, lanes: List[str]) -> None:
+        """Refresh this consumer's heartbeat and recover dead consumers' batches, a few times per TTL."""
+        now = time.monotonic()
+        if now - self._maintained_at < self.consumer_ttl / 3:
+            return
+        self._maintained_at = now
+        pipe = self._redis.pipeline()
+        pipe.set(CONSUMER_KEY.format(self.consumer_id), 1, ex=self.consumer_ttl)
+        pipe.sadd(CONSUMERS_KEY, self.consumer_id)
+        pipe.execute()
+
+        for consumer in self._redis.smembers(CONSUMERS_KEY):
+            consumer = consumer.decode()
+            if consumer == self.consumer_id or self._redis.exists(CONSUMER_KEY.format(consumer)):
+                continue
+            recovered = 0
+            for lane in lanes:
+                # Onto the consuming end: these batches were already first in line
+                while self._redis.lmove(
+                    PROCESSING_KEY.format(lane, consumer), QUEUE_KEY.format(lane), "RIGHT", "RIGHT"
+                ) is not None:
+                    recovered += 1
+            self._redis.srem(CONSUMERS_KEY, consumer)
+            if recovered:
+                logger.warning("Requeued %d delivery batches held by dead consumer %s", recovered, consumer)
+
+    def queued_ids(self, lanes: List[str]) -> Set[int]:
+        consumers = [consumer.decode() for consumer in self._redis.smembers(CONSUMERS_KEY)]
+        pipe = self._redis.pipeline()
+        for lane in lanes:
+            pipe.lrange(QUEUE_KEY.format(lane), 0, -1)
+            for consumer in consumers:
+                pipe.lrange(PROCESSING_KEY.format(lane, consumer), 0, -1)
+        return _batch_ids(item for items in pipe.execute() for item in items)
+
+class DeliveryQueue:
+    """Priority lanes for notification delivery.
+
+    Every priority has its own lane, so a large low-priority fan-out can
+    never sit in front of a password reset. Lanes are served by smooth
+    weighted round-robin: with weights 8/4/2/1 an urgent batch is picked
+    eight times as often as a low one while both have work, and an idle
+    lane's share goes to the others. At most ``max_in_flight`` batches are
+    sent at once, and each lane also has its own limit, so one lane cannot
+    take every slot.
+
+    A batch is acknowledged to the backend only after its handler returns.
+    One whose handler fails is queued again, up to ``max_attempts`` times.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, int],
+        concurrency: Dict[str, int],
+        backend: Any,
+        max_in_flight: int = 16,
+        poll_interval: float = 0.5,
+        max_attempts: int = 3
+    ):
+        self.weights = weights
+        self.concurrency = concurrency
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.backend = backend
+        # Redis lanes are filled by other processes, so idle consumers re-check them
+        self.poll_interval = poll_interval if isinstance(backend, RedisQueueBackend) else None
+        self._credit = {lane: 0 for lane in weights}
+        self._in_flight = {lane: 0 for lane in weights}
+        self._handler: Optional[Callable[[List[int]], Awaitable[Any]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def lane_for(self, priority: Any) -> str:
+        lane = getattr(priority, "value", priority)
+        return lane if lane in self.weights else min(self.weights, key=self.weights.get)
+
+    def enqueue(self, notification_ids: List[int], priority: Any, batch_size: int = 500) -> int:
+        """Queue notifications for delivery in batches. Returns the number of batches."""
+        lane = self.lane_for(priority)
+        batches = 0
+        for start in range(0, len(notification_ids), batch_size):
+            item = json.dumps({"ids": notification_ids[start:start + batch_size], "enqueued_at": time.time()})
+            NOTIFICATION_QUEUE_DEPTH.labels(lane).set(self.backend.push(lane, item))
+            batches += 1
+        if batches and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return batches
+
+    def queued_ids(self) -> Set[int]:
+        """Ids of every notification waiting on a lane or being delivered."""
+        return self.backend.queued_ids(list(self.weights))
+
+    def start(self, handler: Callable[[List[int]], Awaitable[Any]]) -> None:
+        """Consume the lanes on the current event loop, passing each batch of ids to ``handler``."""
+        if self._task is None:
+            self._handler = handler
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            try:
+                picked = await asyncio.to_thread(self._next)
+            except Exception:
+                logger.exception("Failed to read the notification delivery queue")
+                picked = None
+            if picked is not None:
+                lane, item = picked
+                self._in_flight[lane] += 1
+                NOTIFICATION_QUEUE_IN_FLIGHT.labels(lane).inc()
+                self._loop.create_task(self._handle(lane, item))
+                continue
+            # Woken by a new batch or a freed slot
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _next(self) -> Optional[Tuple[str, str]]:
+        """Take the next batch by smooth weighted round-robin over lanes with free slots."""
+        self.backend.maintain(list(self.weights))
+        if sum(self._in_flight.values()) >= self.max_in_flight:
+            return None
+        ready = [lane for lane in self.weights if self._in_flight[lane] < self.concurrency[lane]]
+        for lane in ready:
+            self._credit[lane] += self.weights[lane]
+        total = sum(self.weights[lane] for lane in ready)
+
+        for lane in sorted(ready, key=self._credit.get, reverse=True):
+            item, depth = self.backend.pop(lane)
+            NOTIFICATION_QUEUE_DEPTH.labels(lane).set(depth)
+            if item is None:
+                # Idle lanes do not bank credit for later
+                self._credit[lane] = 0
+                continue
+            self._credit[lane] -= total
+            batch = json.loads(item)
+            NOTIFICATION_QUEUE_WAIT.labels(lane).observe(max(time.time() - batch["enqueued_at"], 0))
+            return lane, item
+        return None
+
+    async def _handle(self, lane: str, item: str) -> None:
+        batch = json.loads(item)
+        try:
+            try:
+                await self._handler(batch["ids"])
+            except Exception:
+                attempts = batch.get("attempts", 1)
+                logger.exception(
+                    "Failed to deliver %d notifications from the %s lane (attempt %d of %d)",
+                    len(batch["ids"]), lane, attempts, self.max_attempts
+                )
+                if attempts < self.max_attempts:
+                    retry = json.dumps({"ids": batch["ids"], "enqueued_at": time.time(), "attempts": attempts + 1})
+                    await asyncio.to_thread(self.backend.push, lane, retry)
+            await asyncio.to_thread(self.backend.ack, lane, item)
+        except Exception:
+            logger.exception("Failed to acknowledge a delivery batch from the %s lane", lane)
+        finally:
+            self._in_flight[lane] -= 1
+            NOTIFICATION_QUEUE_IN_FLIGHT.labels(lane).dec()
+            self._wakeup.set()
+
+delivery_queue = DeliveryQueue(
+    weights=settings.NOTIFICATION_QUEUE_WEIGHTS,
+    concurrency=settings.NOTIFICATION_QUEUE_CONCURRENCY,
+    backend=(
+        RedisQueueBackend(settings.REDIS_URL, consumer_ttl=settings.NOTIFICATION_QUEUE_CONSUMER_TTL)
+        if settings.REDIS_URL else MemoryQueueBackend()
+    ),
+    max_in_flight=settings.NOTIFICATION_QUEUE_MAX_IN_FLIGHT,
+    poll_interval=settings.NOTIFICATION_QUEUE_POLL_INTERVAL,
+    max_attempts=settings.NOTIFICATION_QUEUE_MAX_ATTEMPTS
+)
+
+async def deliver_batch(notification_ids: List[int]) -> int:
+    """Queue handler: send a batch of notifications on their channels."""
+    from app.db.session import SessionLocal
+    from app.services.notification_delivery import NotificationDelivery
+
+    db = SessionLocal()
+    try:
+        return await NotificationDelivery.send_many(db, notification_ids)
+    finally:
+        db.close()
+
+def requeue_stale_pending(
+    stale_after: int,
+    batch_size: int = 500,
+    scheduled_only: bool = False,
+    window: int = settings.NOTIFICATION_QUEUE_SWEEP_WINDOW
+) -> int:
+    """
+    Queue again the PENDING notifications put on a lane more than
+    ``stale_after`` seconds ago and that are on no lane any more: their
+    batch was lost with a crashed worker or an in-memory queue. Only rows
+    whose queued_at falls within the last ``window`` seconds are swept, so
+    rows the pipeline never queued, or gave up on long ago, are not sent
+    again. Each batch is claimed with SKIP LOCKED and its rows' queued_at
+    bumped, so workers sweeping at the same time do not both take a row.
+    ``scheduled_only`` limits the sweep to scheduled notifications that
+    were due at least ``stale_after`` seconds ago. Returns the number
+    requeued.
+    """
+    from app.db.session import SessionLocal
+    from app.models.notification import Notification, NotificationStatus
+
+    queued = sorted(delivery_queue.queued_ids())
+    requeued = 0
+    db = SessionLocal()
+    try:
+        while True:
+            now = datetime.now(timezone.utc)
+            cutoff = now - timedelta(seconds=stale_after)
+            stale = (
+                select(Notification.id)
+                .where(
+                    Notification.status == NotificationStatus.PENDING.value,
+                    Notification.queued_at < cutoff,
+                    Notification.queued_at >= now - timedelta(seconds=window),
+                    Notification.id != all_(bindparam("queued", queued, type_=ARRAY(Integer)))
+                )
+                .order_by(Notification.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            if scheduled_only:
+                stale = stale.where(Notification.scheduled_for < cutoff)
+            claimed = db.execute(
+                update(Notification)
+                .where(Notification.id.in_(stale.scalar_subquery()))
+                .values(queued_at=func.now())
+                .returning(Notification.id, Notification.priority)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+            by_priority: Dict[str, List[int]] = {}
+            for notification_id, priority in claimed:
+                by_priority.setdefault(priority, []).append(notification_id)
+            for priority, notification_ids in by_priority.items():
+                delivery_queue.enqueue(notification_ids, priority, batch_size=batch_size)
+            requeued += len(claimed)
+            if len(claimed) < batch_size:
+                break
+    finally:
+        db.close()
+    if requeued:
+        logger.warning("Requeued %d stale pending notifications", requeued)
+    return requeued
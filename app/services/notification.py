@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from app.core.pagination import paginate
 from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate, NotificationUpdate
 
@@ -30,15 +31,10 @@ class NotificationService:
         return self.db.query(Notification).filter(Notification.id == notification_id).first()
 
     def get_user_notifications(
-        self, user_id: int, skip: int = 0, limit: int = 100
+        self, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[Notification]:
-        return (
-            self.db.query(Notification)
-            .filter(Notification.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = self.db.query(Notification).filter(Notification.user_id == user_id)
+        return paginate(query, Notification, skip=skip, limit=limit, cursor=cursor)
 
     def update_notification(
         self, notification_id: int, notification: NotificationUpdate
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import smtplib
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import Integer, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+from app.core.notification_templates import template_registry
+from app.core.push import PushError, send_push_notification
+from app.core.smtp_pool import smtp_pool
+from app.core.sms import SMSError, send_sms
+from app.models.notification import Notification, NotificationStatus
+from app.models.student import Student
+from app.models.user import User
+from app.services.notification_digest import digest_buffer
+from app.services.notification_gateway import notification_event, notification_gateway
+
+logger = logging.getLogger(__name__)
+
+class ChannelStatus:
+    SENT = "sent"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    # Held back to go out in the user's next digest
+    DIGESTED = "digested"
+    # Not attempted because the channel's circuit breaker is open
+    SKIPPED = "skipped"
+
+# Failures of a provider or of the network to it. Anything else is a bug on our
+# side and must not open a provider's circuit breaker.
+PROVIDER_ERRORS = (OSError, smtplib.SMTPException, SMSError, PushError)
+
+class Recipient(NamedTuple):
+    """Where a user's notifications go on each outbound channel."""
+    user_id: int
+    email: Optional[str]
+    phone_number: Optional[str]
+
+class MissingAddressError(Exception):
+    """The recipient has no address on the channel."""
+
+async def _send_email(notification: Any, recipient: Recipient) -> None:
+    if not recipient.email:
+        raise MissingAddressError(f"User {recipient.user_id} has no email address")
+    # Compiled headers and a pooled, authenticated connection: no MIME tree
+    # is built and no handshake made per message
+    template = template_registry.get("notification", None, getattr(notification, "organization_id", None))
+    message = template.render_email(recipient.email, {"title": notification.title, "message": notification.message})
+    await smtp_pool.sendmail_async(template.sender, [recipient.email], message)
+
+async def _send_sms(notification: Any, recipient: Recipient) -> None:
+    if not recipient.phone_number:
+        raise MissingAddressError(f"User {recipient.user_id} has no phone number")
+    await send_sms(recipient.phone_number, notification.message)
+
+async def _send_push(notification: Any, recipient: Recipient) -> None:
+    await send_push_notification(recipient.user_id, notification.title, notification.message)
+
+async def _send_in_app(notification: Any, recipient: Recipient) -> None:
+    # The stored row is the in-app notification; this only tells connected clients
+    await asyncio.to_thread(notification_gateway.publish, recipient.user_id, notification_event(notification))
+
+CHANNEL_SENDERS: Dict[str, Callable[[Any, Recipient], Awaitable[None]]] = {
+    "email": _send_email,
+    "sms": _send_sms,
+    "push": _send_push,
+    "in_app": _send_in_app
+}
+
+# One breaker per provider, shared by every delivery in this process
+channel_breakers: Dict[str, CircuitBreaker] = {
+    channel: CircuitBreaker(
+        channel,
+        failure_threshold=settings.NOTIFICATION_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout=settings.NOTIFICATION_BREAKER_RECOVERY_TIMEOUT,
+        failure_exceptions=PROVIDER_ERRORS
+    )
+    for channel in CHANNEL_SENDERS
+}
+
+class NotificationDelivery:
+    @staticmethod
+    def load_recipients(db: Session, user_ids: Iterable[int]) -> Dict[int, Recipient]:
+        """
+        Look up the email address and phone number of each user in one
+        query, keyed by user id. Phone numbers come from the student profile.
+        """
+        ids = list(set(user_ids))
+        if not ids:
+            return {}
+        rows = (
+            db.query(User.id, User.email, Student.phone_number)
+            .outerjoin(Student, Student.user_id == User.id)
+            .filter(User.id == any_(bindparam("user_ids", ids, type_=ARRAY(Integer))))
+            .all()
+        )
+        return {row.id: Recipient(row.id, row.email, row.phone_number) for row in rows}
+
+    @staticmethod
+    async def deliver(
+        notification: Any,
+        channels: List[str],
+        recipient: Optional[Recipient] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send a notification on all of its channels concurrently. Each channel
+        has its own timeout and circuit breaker, so a slow or failing
+        provider neither delays nor fails the others. Returns the outcome of
+        every channel keyed by channel name.
+        """
+        recipient = recipient or Recipient(notification.user_id, None, None)
+        results = await asyncio.gather(*[
+            NotificationDelivery._buffer_or_deliver(str(channel), notification, recipient)
+            for channel in channels
+        ])
+        return {str(channel): result for channel, result in zip(channels, results)}
+
+    @staticmethod
+    async def flush_digests() -> int:
+        """
+        Send every digest whose window has closed, one message per user and
+        channel. Returns how many were sent.
+        """
+        digests = await asyncio.to_thread(digest_buffer.take_due)
+        if not digests:
+            return 0
+        recipients = await asyncio.to_thread(
+            NotificationDelivery._load_recipients_in_session,
+            [digest.user_id for _, digest in digests]
+        )
+        results = await asyncio.gather(*[
+            NotificationDelivery._deliver_channel(
+                channel,
+                digest,
+                recipients.get(digest.user_id) or Recipient(digest.user_id, None, None)
+            )
+            for channel, digest in digests
+        ])
+        return sum(result["status"] == ChannelStatus.SENT for result in results)
+
+    @staticmethod
+    def _load_recipients_in_session(user_ids: List[int]) -> Dict[int, Recipient]:
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return NotificationDelivery.load_recipients(db, user_ids)
+        finally:
+            db.close()
+
+    @staticmethod
+    def record(notification: Notification, results: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Store the per-channel outcome on a notification. It counts as sent
+        when at least one channel got through or was handed to a digest.
+        """
+        notification.delivery_status = results
+        statuses = {result["status"] for result in results.values()}
+        if ChannelStatus.SENT in statuses or ChannelStatus.DIGESTED in statuses:
+            notification.status = NotificationStatus.SENT.value
+            notification.is_delivered = ChannelStatus.SENT in statuses
+        else:
+            notification.status = NotificationStatus.FAILED.value
+
+    @staticmethod
+    async def send_many(db: Session, notification_ids: List[int]) -> int:
+        """
+        Deliver a batch of pending notifications concurrently and record the
+        outcome of each. Returns how many were sent.
+        """
+        notifications = db.query(Notification).filter(
+            Notification.id == any_(bindparam("ids", notification_ids, type_=ARRAY(Integer))),
+            Notification.status == NotificationStatus.PENDING.value
+        ).all()
+        recipients = NotificationDelivery.load_recipients(db, [n.user_id for n in notifications])
+        results = await asyncio.gather(*[
+            NotificationDelivery.deliver(
+                notification, notification.channels or ["in_app"], recipients.get(notification.user_id)
+            )
+            for notification in notifications
+        ])
+        for notification, result in zip(notifications, results):
+            NotificationDelivery.record(notification, result)
+        db.commit()
+        return sum(notification.status == NotificationStatus.SENT.value for notification in notifications)
+
+    @staticmethod
+    async def _buffer_or_deliver(channel: str, notification: Any, recipient: Recipient) -> Dict[str, Any]:
+        if digest_buffer.accepts(notification, channel):
+            try:
+                await asyncio.to_thread(digest_buffer.add, notification, channel)
+                return {"status": ChannelStatus.DIGESTED}
+            except Exception:
+                # Better an individual message than none at all
+                logger.exception("Failed to buffer notification %s for a digest", notification.id)
+        return await NotificationDelivery._deliver_channel(channel, notification, recipient)
+
+    @staticmethod
+    async def _deliver_channel(channel: str, notification: Any, recipient: Recipient) -> Dict[str, Any]:
+        sender = CHANNEL_SENDERS.get(channel)
+        if sender is None:
+            return {"status": ChannelStatus.FAILED, "error": f"Unsupported channel '{channel}'"}
+
+        timeout = settings.NOTIFICATION_CHANNEL_TIMEOUTS.get(channel, settings.NOTIFICATION_CHANNEL_TIMEOUT)
+        try:
+            # The timeout runs inside the breaker so hung providers trip it too
+            await channel_breakers[channel].call(
+                lambda: asyncio.wait_for(sender(notification, recipient), timeout)
+            )
+        except CircuitOpenError as e:
+            return {"status": ChannelStatus.SKIPPED, "error": str(e)}
+        except asyncio.TimeoutError:
+            return {"status": ChannelStatus.TIMEOUT, "error": f"No response within {timeout}s"}
+        except Exception as e:
+            return {"status": ChannelStatus.FAILED, "error": str(e)}
+        return {"status": ChannelStatus.SENT, "sent_at": datetime.utcnow().isoformat()}
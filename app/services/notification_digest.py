@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.notification_templates import template_registry
+
+# Sorted set of "user_id:channel" buffers, scored by the time they are due
+DIGEST_DUE_KEY = "notification-digest:due"
+DIGEST_BUFFER_KEY = "notification-digest:{}"
+
+# Channels that cost an outbound message; in-app rows are always written individually
+DIGEST_CHANNELS = {"email", "sms", "push"}
+
+class DigestNotification(NamedTuple):
+    """What the channel senders need to send one digest; addresses are looked up when it is sent."""
+    user_id: int
+    title: str
+    message: str
+    organization_id: Optional[int]
+
+class _MemoryBackend:
+    """Buffers in this process only. For development and tests."""
+
+    def __init__(self):
+        self._items: Dict[str, List[str]] = defaultdict(list)
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, item: str, due_at: float) -> None:
+        with self._lock:
+            self._items[key].append(item)
+            self._due.setdefault(key, due_at)
+
+    def take_due(self, now: float) -> List[Tuple[str, List[str]]]:
+        with self._lock:
+            keys = [key for key, due_at in self._due.items() if due_at <= now]
+            taken = []
+            for key in keys:
+                del self._due[key]
+                taken.append((key, self._items.pop(key, [])))
+            return taken
+
+class _RedisBackend:
+    """Buffers shared by every worker, so a digest covers all of a user's traffic."""
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def add(self, key: str, item: str, due_at: float) -> None:
+        pipe = self._redis.pipeline()
+        pipe.rpush(DIGEST_BUFFER_KEY.format(key), item)
+        # NX keeps the due time of the first item in the window
+        pipe.zadd(DIGEST_DUE_KEY, {key: due_at}, nx=True)
+        pipe.execute()
+
+    def take_due(self, now: float) -> List[Tuple[str, List[str]]]:
+        taken = []
+        for key in self._redis.zrangebyscore(DIGEST_DUE_KEY, 0, now):
+            key = key.decode()
+            pipe = self._redis.pipeline()
+            pipe.lrange(DIGEST_BUFFER_KEY.format(key), 0, -1)
+            pipe.delete(DIGEST_BUFFER_KEY.format(key))
+            pipe.zrem(DIGEST_DUE_KEY, key)
+            items, _, removed = pipe.execute()
+            # Another flusher got here first
+            if removed:
+                taken.append((key, [item.decode() for item in items]))
+        return taken
+
+class DigestBuffer:
+    """Coalesces low-priority notifications into one message per user and channel.
+
+    The first buffered notification for a ``(user, channel)`` opens a window
+    of ``window`` seconds; everything that arrives before it closes is sent
+    as a single digest by ``take_due``. Priorities outside ``priorities``
+    are never buffered.
+    """
+
+    def __init__(self, window: int, priorities: List[str], redis_url: Optional[str] = None):
+        self.window = window
+        self.priorities = set(priorities)
+        self._backend = _RedisBackend(redis_url) if redis_url else _MemoryBackend()
+
+    def accepts(self, notification: Any, channel: str) -> bool:
+        priority = getattr(notification.priority, "value", notification.priority)
+        return bool(self.window) and channel in DIGEST_CHANNELS and priority in self.priorities
+
+    def add(self, notification: Any, channel: str) -> None:
+        item = json.dumps({
+            "id": notification.id,
+            "title": notification.title,
+            "message": notification.message,
+            "organization_id": getattr(notification, "organization_id", None),
+            "locale": (getattr(notification, "data", None) or {}).get("locale")
+        }, ensure_ascii=False)
+        self._backend.add(f"{notification.user_id}:{channel}", item, time.time() + self.window)
+
+    def take_due(self, now: Optional[float] = None) -> List[Tuple[str, DigestNotification]]:
+        """Remove every buffer whose window has closed and render it as one notification per channel."""
+        digests = []
+        for key, items in self._backend.take_due(time.time() if now is None else now):
+            if not items:
+                continue
+            user_id, channel = key.split(":", 1)
+            digests.append((channel, self._render(int(user_id), [json.loads(item) for item in items])))
+        return digests
+
+    @staticmethod
+    def _render(user_id: int, items: List[Dict[str, Any]]) -> DigestNotification:
+        first = items[0]
+        if len(items) == 1:
+            title, message = first["title"], first["message"]
+        else:
+            template = template_registry.get("digest", first["locale"], first["organization_id"])
+            title, message, _ = template.render({
+                "count": len(items),
+                "items": "\n".join(f"- {item['title']}: {item['message']}" for item in items)
+            })
+        return DigestNotification(user_id, title, message, first["organization_id"])
+
+digest_buffer = DigestBuffer(
+    window=settings.NOTIFICATION_DIGEST_WINDOW,
+    priorities=settings.NOTIFICATION_DIGEST_PRIORITIES,
+    redis_url=settings.REDIS_URL
+)
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Put on a connection's queue when it is closed by the gateway
+CLOSED = (0, "")
+
+def notification_event(notification: Any) -> Dict[str, Any]:
+    """The payload pushed to clients for one notification."""
+    created_at = getattr(notification, "created_at", None)
+    return {
+        "id": notification.id,
+        "title": notification.title,
+        "message": notification.message,
+        "notification_type": getattr(notification.notification_type, "value", notification.notification_type),
+        "priority": getattr(notification.priority, "value", notification.priority),
+        "created_at": created_at.isoformat() if created_at else None
+    }
+
+class Connection:
+    """One subscribed client.
+
+    Events wait in a bounded queue; a client that lets it fill up is
+    disconnected instead of buffering without limit, and picks up what it
+    missed by reconnecting with the last id it received.
+    """
+
+    __slots__ = ("user_id", "queue", "last_id", "closed", "_pending")
+
+    def __init__(self, user_id: int, last_id: int, size: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue(size)
+        self.last_id = last_id
+        self.closed = False
+        # Live events that arrive while missed ones are still being replayed
+        self._pending: Optional[List[Tuple[int, str]]] = None
+
+    def offer(self, event_id: int, data: str) -> bool:
+        """Queue an event; False when the client is too slow to keep up."""
+        if self.closed:
+            return True
+        if self._pending is not None:
+            self._pending.append((event_id, data))
+            return len(self._pending) <= self.queue.maxsize
+        if event_id <= self.last_id:
+            return True
+        try:
+            self.queue.put_nowait((event_id, data))
+        except asyncio.QueueFull:
+            return False
+        self.last_id = event_id
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Drop whatever is queued; the client resumes from its last id
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSED)
+
+class NotificationGateway:
+    """Pushes new notifications to the clients connected to this worker.
+
+    ``publish`` sends an event to the user's Redis channel (or straight to
+    this worker's connections without Redis). Each worker subscribes to
+    the channels of the users connected to it, and only those, and fans
+    every event out to those users' local connections.
+    """
+
+    def __init__(self, redis_url: Optional[str], channel_prefix: str, queue_size: int, replay_limit: int):
+        self.redis_url = redis_url
+        self.channel_prefix = channel_prefix
+        self.queue_size = queue_size
+        self.replay_limit = replay_limit
+        self._connections: Dict[int, Set[Connection]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._redis = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self.redis_url and self._listener is None:
+            self._listener = self._loop.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for connections in self._connections.values():
+            for connection in connections:
+                connection.close()
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        """Push an event to every connection of a user, on any worker. Safe from any thread."""
+        data = json.dumps(event, ensure_ascii=False, default=str)
+        if self.redis_url:
+            try:
+                self._get_redis().publish(self._channel(user_id), data)
+            except Exception:
+                # Clients still see it on their next resume or listing
+                logger.exception("Failed to publish notification %s", event.get("id"))
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self._dispatch, user_id, event["id"], data)
+
+    async def connect(self, user_id: int, last_id: Optional[int] = None) -> Connection:
+        """Register a client, replaying what it missed since ``last_id``."""
+        connection = Connection(user_id, last_id or 0, self.queue_size)
+        connections = self._connections.setdefault(user_id, set())
+        connections.add(connection)
+        if len(connections) == 1 and self._pubsub is not None:
+            await self._pubsub.subscribe(self._channel(user_id))
+        if last_id is not None:
+            await self._replay(connection)
+        return connection
+
+    async def disconnect(self, connection: Connection) -> None:
+        connections = self._connections.get(connection.user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self._connections[connection.user_id]
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(self._channel(connection.user_id))
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self._connections.values())
+
+    def _dispatch(self, user_id: int, event_id: int, data: str) -> None:
+        connections = self._connections.get(user_id)
+        if not connections:
+            return
+        for connection in list(connections):
+            if not connection.offer(event_id, data):
+                logger.info("Dropping slow notification client of user %s", user_id)
+                connection.close()
+                # Stop routing to it now; the endpoint unregisters it when it exits
+                connections.discard(connection)
+
+    async def _replay(self, connection: Connection) -> None:
+        from app.db.session import SessionLocal
+        from app.services.notification_service import NotificationService
+
+        def load() -> List[Dict[str, Any]]:
+            db = SessionLocal()
+            try:
+                return [
+                    notification_event(notification)
+                    for notification in NotificationService.get_notifications_since(
+                        db, connection.user_id, connection.last_id, self.replay_limit
+                    )
+                ]
+            finally:
+                db.close()
+
+        connection._pending = []
+        try:
+            missed = await asyncio.to_thread(load)
+        finally:
+            pending, connection._pending = connection._pending, None
+        events = [(event["id"], json.dumps(event, ensure_ascii=False)) for event in missed] + pending
+        for event_id, data in events:
+            if not connection.offer(event_id, data):
+                # The client resumes from the last event it did get
+                connection.close()
+                return
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        while True:
+            try:
+                client = aioredis.Redis.from_url(self.redis_url)
+                self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+                channels = [self._channel(user_id) for user_id in self._connections]
+                if channels:
+                    await self._pubsub.subscribe(*channels)
+                    # Events published while we were disconnected
+                    for connections in list(self._connections.values()):
+                        for connection in list(connections):
+                            if connection.last_id:
+                                await self._replay(connection)
+                else:
+                    # redis-py will not listen before the first subscription
+                    await self._pubsub.subscribe(self.channel_prefix)
+                async for message in self._pubsub.listen():
+                    if message["channel"].decode() == self.channel_prefix:
+                        continue
+                    user_id = int(message["channel"].decode().rsplit(":", 1)[1])
+                    data = message["data"].decode()
+                    self._dispatch(user_id, json.loads(data)["id"], data)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification gateway lost its Redis connection")
+                self._pubsub = None
+                await asyncio.sleep(5)
+
+    def _channel(self, user_id: int) -> str:
+        return f"{self.channel_prefix}:{user_id}"
+
+    def _get_redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+notification_gateway = NotificationGateway(
+    redis_url=settings.REDIS_URL,
+    channel_prefix=settings.WS_MESSAGE_QUEUE,
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    replay_limit=settings.WS_REPLAY_LIMIT
+)
@@ -0,0 +1,202 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import distinct, func, select, update
+
+from app.core import invalidation
+from app.core.config import settings
+from app.models.notification import Notification, NotificationStatus
+from app.services.delivery_queue import delivery_queue, requeue_stale_pending
+
+logger = logging.getLogger(__name__)
+
+# Redis channel announcing newly scheduled notifications to every dispatcher
+SCHEDULED_CHANNEL = "notifications:scheduled"
+
+class ScheduledNotificationDispatcher:
+    """Dispatches scheduled notifications when they fall due.
+
+    Upcoming due times are held in a min-heap and the dispatcher sleeps
+    until the earliest one, woken early only when a notification is
+    scheduled sooner than anything in the heap. The heap covers the next
+    ``lookahead`` seconds and is refilled from the table once per window,
+    so the table is not polled for due rows.
+
+    Due rows are claimed with ``FOR UPDATE SKIP LOCKED``, which lets any
+    number of dispatchers run side by side without sending a notification
+    twice, and claimed ids are handed to the delivery queue in batches on
+    their priority's lane. A claimed row is PENDING before its batch is on
+    the queue, so a dispatcher that dies in between would strand it; each
+    refill therefore also re-enqueues scheduled rows that have been PENDING,
+    and on no lane, for longer than ``claim_grace`` seconds.
+    """
+
+    def __init__(self, lookahead: int = 300, batch_size: int = 500, claim_grace: int = 300):
+        self.lookahead = lookahead
+        self.batch_size = batch_size
+        self.claim_grace = claim_grace
+        self._heap: List[float] = []
+        self._horizon = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Run the dispatcher on the current event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, due_at: datetime) -> None:
+        """Make sure the dispatcher wakes up by ``due_at``. Safe from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._push, _timestamp(due_at))
+
+    def reload(self) -> None:
+        """Re-read due times from the table on the next iteration."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._expire_window)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduled notification dispatcher failed")
+                await asyncio.sleep(5)
+
+    async def _tick(self) -> None:
+        now = time.time()
+        if now >= self._horizon:
+            await self._refill(now)
+
+        if self._heap and self._heap[0] <= now:
+            while self._heap and self._heap[0] <= now:
+                heapq.heappop(self._heap)
+            await self._dispatch_due()
+            return
+
+        wake_at = min(self._heap[0], self._horizon) if self._heap else self._horizon
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(wake_at - now, 0))
+        except asyncio.TimeoutError:
+            pass
+
+    def _push(self, due_at: float) -> None:
+        # Anything past the current window is picked up by the next refill
+        if due_at < self._horizon:
+            heapq.heappush(self._heap, due_at)
+            self._wakeup.set()
+
+    def _expire_window(self) -> None:
+        self._horizon = 0.0
+        self._wakeup.set()
+
+    async def _refill(self, now: float) -> None:
+        horizon = now + self.lookahead
+        await asyncio.to_thread(requeue_stale_pending, self.claim_grace, self.batch_size, True)
+        due_times = await asyncio.to_thread(self._load_due_times, horizon)
+        self._heap = [_timestamp(due_at) for due_at in due_times]
+        heapq.heapify(self._heap)
+        self._horizon = horizon
+
+    async def _dispatch_due(self) -> None:
+        while True:
+            claimed = await asyncio.to_thread(self._claim_due)
+            by_priority: Dict[str, List[int]] = defaultdict(list)
+            for notification_id, priority in claimed:
+                by_priority[priority].append(notification_id)
+            for priority, notification_ids in by_priority.items():
+                delivery_queue.enqueue(notification_ids, priority, batch_size=self.batch_size)
+            if len(claimed) < self.batch_size:
+                return
+
+    def _load_due_times(self, horizon: float) -> List[datetime]:
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return db.scalars(
+                select(distinct(Notification.scheduled_for))
+                .where(
+                    Notification.status == NotificationStatus.SCHEDULED.value,
+                    Notification.scheduled_for < datetime.fromtimestamp(horizon, timezone.utc)
+                )
+            ).all()
+        finally:
+            db.close()
+
+    def _claim_due(self) -> List[Tuple[int, str]]:
+        """
+        Move one batch of due notifications from SCHEDULED to PENDING and
+        return their ids and priorities. Rows locked by another dispatcher
+        are skipped.
+        """
+        from app.db.session import SessionLocal
+
+        due = (
+            select(Notification.id)
+            .where(
+                Notification.status == NotificationStatus.SCHEDULED.value,
+                Notification.scheduled_for <= datetime.now(timezone.utc)
+            )
+            .order_by(Notification.scheduled_for)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        db = SessionLocal()
+        try:
+            claimed = db.execute(
+                update(Notification)
+                .where(Notification.id.in_(due.scalar_subquery()))
+                # queued_at marks the claim; see requeue_stale_pending
+                .values(status=NotificationStatus.PENDING.value, queued_at=func.now())
+                .returning(Notification.id, Notification.priority)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+            return [tuple(row) for row in claimed]
+        finally:
+            db.close()
+
+def _timestamp(value: datetime) -> float:
+    # Naive datetimes are stored and compared as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+scheduled_dispatcher = ScheduledNotificationDispatcher(
+    lookahead=settings.NOTIFICATION_SCHEDULER_LOOKAHEAD,
+    batch_size=settings.NOTIFICATION_DELIVERY_BATCH_SIZE,
+    claim_grace=settings.NOTIFICATION_SCHEDULER_CLAIM_GRACE
+)
+
+def notify_scheduled(due_at: datetime) -> None:
+    """Wake the dispatcher in this process and in every other one."""
+    scheduled_dispatcher.schedule(due_at)
+    invalidation.publish(SCHEDULED_CHANNEL, repr(_timestamp(due_at)))
+
+invalidation.register(
+    SCHEDULED_CHANNEL,
+    lambda payload: scheduled_dispatcher.schedule(datetime.fromtimestamp(float(payload), timezone.utc)),
+    # Announcements missed while disconnected are recovered from the table
+    on_reconnect=scheduled_dispatcher.reload
+)
@@ -2,28 +2,34 @@ from fastapi import BackgroundTasks
 from typing import List, Dict, Optional, Union, Any
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from app.core.config import settings
 import json
-import aiohttp
 import asyncio
 from enum import Enum
+from sqlalchemy import JSON, Integer, String, any_, bindparam, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
 from app.models.notification import Notification, NotificationStatus
-import requests
+from app.models.notification import Notification as NotificationModel
+from app.models.enrollment import Enrollment
+from app.models.student import Student
+from app.models.user import User
 from fastapi import HTTPException
 
 from app.schemas.notification import (
+    NotificationAudience,
+    NotificationAudienceType,
     NotificationCreate,
+    NotificationFanoutCreate,
     NotificationResponse,
     NotificationType,
     NotificationUpdate
 )
-from app.core.email import send_email
-from app.core.sms import send_sms
-from app.core.push import send_push_notification
+from app.core.pagination import paginate
+from app.services.delivery_queue import delivery_queue
+from app.services.notification_delivery import NotificationDelivery
+from app.services.notification_scheduler import notify_scheduled
+from app.services.notification_stats import NotificationStatsService
 from app.core.tenant import get_tenant_id
 
 class NotificationType(str, Enum):
@@ -62,94 +68,190 @@ class Notification(BaseModel):
 class NotificationService:
     def __init__(self, db: Session):
         self.db = db
-        self.templates = self._load_templates()
-
-    def _load_templates(self) -> Dict[str, Dict[str, Any]]:
-        """Load notification templates from configuration."""
-        return {
-            "welcome": {
-                "subject": "Welcome to Smart Education ERP",
-                "body": "Welcome {name}! We're excited to have you on board.",
-                "channels": [NotificationChannel.EMAIL]
-            },
-            "password_reset": {
-                "subject": "Password Reset Request",
-                "body": "Click here to reset your password: {reset_link}",
-                "channels": [NotificationChannel.EMAIL]
-            },
-            "assignment_due": {
-                "subject": "Assignment Due Soon",
-                "body": "Your assignment '{assignment_name}' is due on {due_date}",
-                "channels": [NotificationChannel.EMAIL, NotificationChannel.IN_APP]
-            }
-        }
 
     @staticmethod
-    def create_notification(db: Session, notification_in: NotificationCreate) -> Notification:
+    def create_notification(db: Session, notification_in: NotificationCreate) -> NotificationModel:
         """
         Create a new notification.
         """
-        # Get tenant ID from context
+        # Get tenant ID from context, falling back to the recipient's organization
         tenant_id = get_tenant_id()
-        
+        organization_id = tenant_id or select(User.organization_id).where(
+            User.id == notification_in.user_id
+        ).scalar_subquery()
+
         # Create notification
-        notification = Notification(
+        notification = NotificationModel(
             user_id=notification_in.user_id,
             title=notification_in.title,
             message=notification_in.message,
             notification_type=notification_in.notification_type,
             priority=notification_in.priority,
             metadata=notification_in.metadata,
-            organization_id=tenant_id or notification_in.organization_id
+            organization_id=organization_id,
+            channels=notification_in.channels,
+            scheduled_for=notification_in.scheduled_for,
+            status=NotificationStatus.SCHEDULED if notification_in.scheduled_for else NotificationStatus.PENDING,
+            queued_at=None if notification_in.scheduled_for else func.now()
         )
         db.add(notification)
+        NotificationStatsService.adjust_unread(db, notification.user_id, 1)
         db.commit()
         db.refresh(notification)
+        if notification.scheduled_for:
+            notify_scheduled(notification.scheduled_for)
+        else:
+            NotificationService.enqueue_delivery([notification.id], notification_in.priority)
         return notification
 
     @staticmethod
-    def get_notification(db: Session, notification_id: int) -> Optional[Notification]:
+    def _audience_recipients(organization_id: int, audience: NotificationAudience):
+        """
+        SELECT of the active user ids an audience selector resolves to.
+        """
+        if audience.type == NotificationAudienceType.COURSE:
+            query = (
+                select(User.id)
+                .join(Student, Student.user_id == User.id)
+                .join(Enrollment, Enrollment.student_id == Student.id)
+                .where(
+                    Enrollment.course_id == audience.course_id,
+                    Enrollment.organization_id == organization_id,
+                    Enrollment.status == "active"
+                )
+            )
+        elif audience.type == NotificationAudienceType.ROLE:
+            query = select(User.id).where(
+                User.organization_id == organization_id,
+                User.role == audience.role
+            )
+        else:
+            query = select(User.id).where(User.organization_id == organization_id)
+        return query.where(User.is_active == True).distinct()
+
+    @staticmethod
+    def fan_out(
+        db: Session,
+        organization_id: int,
+        fanout_in: NotificationFanoutCreate
+    ) -> Dict[str, int]:
+        """
+        Create one notification per member of an audience.
+
+        Recipients are resolved and the rows written by a single
+        INSERT ... SELECT, the unread counters by one upsert, all in one
+        transaction. Delivery is queued afterwards in batches.
+        """
+        recipients = NotificationService._audience_recipients(
+            organization_id, fanout_in.audience
+        ).subquery()
+        notifications = NotificationModel.__table__
+        rows = select(
+            recipients.c.id,
+            literal(organization_id),
+            literal(fanout_in.title, String),
+            literal(fanout_in.message, String),
+            literal(fanout_in.notification_type.value, String),
+            literal(fanout_in.priority.value, String),
+            literal(fanout_in.metadata, JSON),
+            literal([channel.value for channel in fanout_in.channels], JSON),
+            literal(False),
+            literal(False),
+            func.now()
+        )
+        created = db.execute(
+            notifications.insert()
+            .from_select(
+                [
+                    "user_id", "organization_id", "title", "message", "notification_type",
+                    "priority", "metadata", "channels", "is_read", "is_delivered", "queued_at"
+                ],
+                rows
+            )
+            .returning(notifications.c.id, notifications.c.user_id)
+        ).all()
+        NotificationStatsService.increment_unread_many(db, [row.user_id for row in created])
+        db.commit()
+
+        ids = [row.id for row in created]
+        batches = NotificationService.enqueue_delivery(ids, fanout_in.priority)
+        return {"recipients": len(ids), "batches": batches}
+
+    @staticmethod
+    def enqueue_delivery(notification_ids: List[int], priority: NotificationPriority) -> int:
+        """
+        Queue delivery of notifications on their priority's lane in batches
+        of NOTIFICATION_DELIVERY_BATCH_SIZE. Returns the number of batches.
+        """
+        return delivery_queue.enqueue(
+            notification_ids, priority, batch_size=settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+        )
+
+    @staticmethod
+    def get_notification(db: Session, notification_id: int) -> Optional[NotificationModel]:
         """
         Get a notification by ID.
         """
         tenant_id = get_tenant_id()
-        query = db.query(Notification).filter(Notification.id == notification_id)
+        query = db.query(NotificationModel).filter(NotificationModel.id == notification_id)
         
         # If tenant context is set, filter by tenant
         if tenant_id:
-            query = query.filter(Notification.organization_id == tenant_id)
+            query = query.filter(NotificationModel.organization_id == tenant_id)
             
         return query.first()
 
+    @staticmethod
+    def get_notifications_since(
+        db: Session,
+        user_id: int,
+        last_id: int,
+        limit: int = 100
+    ) -> List[NotificationModel]:
+        """
+        A user's notifications newer than last_id, oldest first, for clients
+        resuming a real-time stream.
+        """
+        return (
+            db.query(NotificationModel)
+            .filter(NotificationModel.user_id == user_id, NotificationModel.id > last_id)
+            .order_by(NotificationModel.id)
+            .limit(limit)
+            .all()
+        )
+
     @staticmethod
     def get_user_notifications(
         db: Session,
         user_id: int,
         skip: int = 0,
         limit: int = 10,
-        unread_only: bool = False
-    ) -> List[Notification]:
+        unread_only: bool = False,
+        cursor: Optional[str] = None
+    ) -> List[NotificationModel]:
         """
-        Get notifications for a specific user.
+        Get notifications for a specific user, newest first. Pass the cursor
+        returned for the previous page to continue from it; skip is used
+        without one.
         """
         tenant_id = get_tenant_id()
-        query = db.query(Notification).filter(Notification.user_id == user_id)
+        query = db.query(NotificationModel).filter(NotificationModel.user_id == user_id)
         
         # If tenant context is set, filter by tenant
         if tenant_id:
-            query = query.filter(Notification.organization_id == tenant_id)
+            query = query.filter(NotificationModel.organization_id == tenant_id)
             
         if unread_only:
-            query = query.filter(Notification.is_read == False)
+            query = query.filter(NotificationModel.is_read == False)
             
-        return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+        return paginate(query, NotificationModel, skip=skip, limit=limit, cursor=cursor)
 
     @staticmethod
     def update_notification(
         db: Session,
         notification_id: int,
         notification_in: NotificationUpdate
-    ) -> Notification:
+    ) -> NotificationModel:
         """
         Update a notification.
         """
@@ -164,15 +266,18 @@ class NotificationService:
         if tenant_id and "organization_id" in update_data:
             del update_data["organization_id"]
             
+        was_read = bool(notification.is_read)
         for field, value in update_data.items():
             setattr(notification, field, value)
+        if bool(notification.is_read) != was_read:
+            NotificationStatsService.adjust_unread(db, notification.user_id, 1 if was_read else -1)
 
         db.commit()
         db.refresh(notification)
         return notification
 
     @staticmethod
-    def mark_as_read(db: Session, notification_id: int) -> Notification:
+    def mark_as_read(db: Session, notification_id: int) -> NotificationModel:
         """
         Mark a notification as read.
         """
@@ -180,13 +285,85 @@ class NotificationService:
         if not notification:
             raise HTTPException(status_code=404, detail="Notification not found")
 
-        notification.is_read = True
+        # Conditional UPDATE so concurrent requests decrement the counter only once
+        marked = db.execute(
+            update(NotificationModel)
+            .where(NotificationModel.id == notification.id, NotificationModel.is_read == False)
+            .values(is_read=True)
+        ).rowcount
+        if marked:
+            NotificationStatsService.adjust_unread(db, notification.user_id, -1)
         db.commit()
         db.refresh(notification)
         return notification
 
     @staticmethod
-    def mark_as_delivered(db: Session, notification_id: int) -> Notification:
+    def _owned_by(user_id: int, ids: Optional[List[int]], all_before: Optional[datetime]) -> list:
+        """
+        WHERE conditions selecting a user's notifications by id or creation time.
+        Ownership is part of the statement, so no row needs to be fetched first.
+        """
+        conditions = [NotificationModel.user_id == user_id]
+        tenant_id = get_tenant_id()
+        if tenant_id:
+            conditions.append(NotificationModel.organization_id == tenant_id)
+        if ids is not None:
+            # One array parameter, so the statement is the same for any number of ids
+            conditions.append(NotificationModel.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+        if all_before is not None:
+            conditions.append(NotificationModel.created_at <= all_before)
+        return conditions
+
+    @staticmethod
+    def mark_many_as_read(
+        db: Session,
+        user_id: int,
+        ids: Optional[List[int]] = None,
+        all_before: Optional[datetime] = None
+    ) -> List[int]:
+        """
+        Mark a user's notifications as read in one UPDATE ... RETURNING.
+        Returns the ids that were unread; ids the user does not own are ignored.
+        """
+        marked = db.scalars(
+            update(NotificationModel)
+            .where(
+                *NotificationService._owned_by(user_id, ids, all_before),
+                NotificationModel.is_read == False
+            )
+            .values(is_read=True)
+            .returning(NotificationModel.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        NotificationStatsService.adjust_unread(db, user_id, -len(marked))
+        db.commit()
+        return marked
+
+    @staticmethod
+    def delete_many(
+        db: Session,
+        user_id: int,
+        ids: Optional[List[int]] = None,
+        all_before: Optional[datetime] = None
+    ) -> List[int]:
+        """
+        Delete a user's notifications in one DELETE ... RETURNING.
+        Returns the deleted ids; ids the user does not own are ignored.
+        """
+        deleted = db.execute(
+            delete(NotificationModel)
+            .where(*NotificationService._owned_by(user_id, ids, all_before))
+            .returning(NotificationModel.id, NotificationModel.is_read)
+            .execution_options(synchronize_session=False)
+        ).all()
+        NotificationStatsService.adjust_unread(
+            db, user_id, -sum(1 for row in deleted if row.is_read is False)
+        )
+        db.commit()
+        return [row.id for row in deleted]
+
+    @staticmethod
+    def mark_as_delivered(db: Session, notification_id: int) -> NotificationModel:
         """
         Mark a notification as delivered.
         """
@@ -208,11 +385,22 @@ class NotificationService:
         if not notification:
             raise HTTPException(status_code=404, detail="Notification not found")
 
+        if not notification.is_read:
+            NotificationStatsService.adjust_unread(db, notification.user_id, -1)
         db.delete(notification)
         db.commit()
 
+    @staticmethod
+    def get_unread_count(db: Session, user_id: int) -> int:
+        """
+        Get the number of unread notifications of a user from its counter.
+        """
+        return NotificationStatsService.get_unread_count(db, user_id)
+
     async def send_notification(self, notification_id: int) -> NotificationResponse:
-        notification = await self.get_notification(self.db, notification_id)
+        notification = self.get_notification(self.db, notification_id)
+        if not notification:
+            raise HTTPException(status_code=404, detail="Notification not found")
         
         if notification.status != NotificationStatus.PENDING:
             raise HTTPException(
@@ -220,164 +408,12 @@ class NotificationService:
                 detail="Notification is not in pending status"
             )
 
-        try:
-            for channel in notification.channels:
-                if channel == "email":
-                    await send_email(
-                        notification.recipient_email,
-                        notification.title,
-                        notification.message
-                    )
-                elif channel == "sms":
-                    await send_sms(
-                        notification.recipient_email,
-                        notification.message
-                    )
-                elif channel == "push":
-                    await send_push_notification(
-                        notification.recipient_id,
-                        notification.title,
-                        notification.message
-                    )
-
-            notification.status = NotificationStatus.SENT
-            notification.sent_at = datetime.utcnow()
-            self.db.commit()
-            self.db.refresh(notification)
-            return notification
-
-        except Exception as e:
-            notification.status = NotificationStatus.FAILED
-            self.db.commit()
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to send notification: {str(e)}"
-            )
-
-    def create_notification(
-        self,
-        recipient_id: int,
-        recipient_email: str,
-        notification_type: NotificationType,
-        template_name: str,
-        template_data: Dict[str, Any],
-        priority: NotificationPriority = NotificationPriority.MEDIUM,
-        channels: List[NotificationChannel] = None,
-        scheduled_for: Optional[datetime] = None
-    ) -> Notification:
-        """Create a new notification."""
-        if template_name not in self.templates:
-            raise ValueError(f"Template '{template_name}' not found")
-
-        if channels is None:
-            channels = self.templates[template_name]["channels"]
-
-        notification = Notification(
-            recipient_id=recipient_id,
-            recipient_email=recipient_email,
-            notification_type=notification_type,
-            template_name=template_name,
-            template_data=template_data,
-            priority=priority,
-            channels=channels,
-            data=self.templates[template_name],
-            scheduled_for=scheduled_for,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            status=NotificationStatus.SCHEDULED if scheduled_for else NotificationStatus.PENDING
+        recipients = NotificationDelivery.load_recipients(self.db, [notification.user_id])
+        results = await NotificationDelivery.deliver(
+            notification, notification.channels, recipients.get(notification.user_id)
         )
-
-        self.db.add(notification)
+        # One provider failing no longer fails the channels that got through
+        NotificationDelivery.record(notification, results)
         self.db.commit()
         self.db.refresh(notification)
         return notification
-
-    def send_notification(self, notification_id: int) -> bool:
-        """Send a notification through all specified channels."""
-        notification = self.db.query(Notification).filter(Notification.id == notification_id).first()
-        if not notification:
-            return False
-
-        try:
-            for channel in notification.channels:
-                if channel == NotificationChannel.EMAIL:
-                    self._send_email(notification)
-                elif channel == NotificationChannel.SMS:
-                    self._send_sms(notification)
-                elif channel == NotificationChannel.PUSH:
-                    self._send_push(notification)
-                elif channel == NotificationChannel.IN_APP:
-                    self._send_in_app(notification)
-
-            notification.status = NotificationStatus.SENT
-            notification.updated_at = datetime.utcnow()
-            self.db.commit()
-            return True
-
-        except Exception as e:
-            notification.status = NotificationStatus.FAILED
-            notification.error_message = str(e)
-            notification.updated_at = datetime.utcnow()
-            self.db.commit()
-            return False
-
-    def _send_email(self, notification: Notification) -> None:
-        """Send email notification."""
-        msg = MIMEMultipart()
-        msg["From"] = settings.SMTP_USER
-        msg["To"] = notification.recipient_email
-        msg["Subject"] = notification.data["subject"].format(**notification.template_data)
-
-        body = notification.data["body"].format(**notification.template_data)
-        msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-
-    def _send_sms(self, notification: Notification) -> None:
-        """Send SMS notification using a third-party service."""
-        # Implement SMS sending logic here
-        pass
-
-    def _send_push(self, notification: Notification) -> None:
-        """Send push notification."""
-        # Implement push notification logic here
-        pass
-
-    def _send_in_app(self, notification: Notification) -> None:
-        """Send in-app notification."""
-        # Implement in-app notification logic here
-        pass
-
-    def get_notification_status(self, notification_id: int) -> Optional[Dict[str, Any]]:
-        """Get the status of a notification."""
-        notification = self.db.query(Notification).filter(Notification.id == notification_id).first()
-        if not notification:
-            return None
-
-        return {
-            "id": notification.id,
-            "status": notification.status,
-            "error_message": notification.error_message,
-            "created_at": notification.created_at,
-            "updated_at": notification.updated_at
-        }
-
-    def get_user_notifications(
-        self,
-        user_id: int,
-        skip: int = 0,
-        limit: int = 100,
-        status: Optional[NotificationStatus] = None
-    ) -> List[Notification]:
-        """Get notifications for a specific user."""
-        query = self.db.query(Notification).filter(Notification.recipient_id == user_id)
-        
-        if status:
-            query = query.filter(Notification.status == status)
-        
-        return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
-
-notification_service = NotificationService() 
\ No newline at end of file
@@ -0,0 +1,96 @@
+from typing import List
+
+from sqlalchemy import Integer, bindparam, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification, UserNotificationStats
+
+class NotificationStatsService:
+    @staticmethod
+    def adjust_unread(db: Session, user_id: int, delta: int) -> None:
+        """
+        Add delta to a user's unread counter inside the caller's transaction,
+        so the counter commits or rolls back together with the notification
+        change that caused it.
+        """
+        if not delta:
+            return
+        stmt = insert(UserNotificationStats).values(user_id=user_id, unread_count=max(delta, 0))
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserNotificationStats.user_id],
+                set_={
+                    "unread_count": func.greatest(UserNotificationStats.unread_count + delta, 0),
+                    "updated_at": func.now()
+                }
+            )
+        )
+
+    @staticmethod
+    def increment_unread_many(db: Session, user_ids: List[int]) -> None:
+        """
+        Add one unread notification to each user in user_ids with a single
+        upsert, inside the caller's transaction.
+        """
+        if not user_ids:
+            return
+        recipients = select(
+            func.unnest(bindparam("user_ids", user_ids, type_=ARRAY(Integer))).label("user_id"),
+            literal(1).label("unread_count")
+        )
+        stmt = insert(UserNotificationStats).from_select(["user_id", "unread_count"], recipients)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserNotificationStats.user_id],
+                set_={
+                    "unread_count": UserNotificationStats.unread_count + 1,
+                    "updated_at": func.now()
+                }
+            )
+        )
+
+    @staticmethod
+    def get_unread_count(db: Session, user_id: int) -> int:
+        """
+        Read a user's unread counter: a single primary-key lookup.
+        """
+        count = db.scalar(
+            select(UserNotificationStats.unread_count).where(UserNotificationStats.user_id == user_id)
+        )
+        return count or 0
+
+    @staticmethod
+    def reconcile(db: Session) -> int:
+        """
+        Recompute every counter from the notifications table to repair drift.
+        Returns the number of counters that were wrong.
+        """
+        actual = (
+            select(Notification.user_id, func.count().label("unread_count"))
+            .where(Notification.is_read == False)
+            .group_by(Notification.user_id)
+            .subquery()
+        )
+        stmt = insert(UserNotificationStats).from_select(
+            ["user_id", "unread_count"],
+            select(actual.c.user_id, actual.c.unread_count)
+        )
+        fixed = db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserNotificationStats.user_id],
+                set_={"unread_count": stmt.excluded.unread_count, "updated_at": func.now()},
+                where=UserNotificationStats.unread_count != stmt.excluded.unread_count
+            )
+        ).rowcount
+        # Users whose unread notifications are all gone
+        fixed += db.execute(
+            update(UserNotificationStats)
+            .where(
+                UserNotificationStats.unread_count != 0,
+                UserNotificationStats.user_id.not_in(select(actual.c.user_id))
+            )
+            .values(unread_count=0, updated_at=func.now())
+        ).rowcount
+        db.commit()
+        return fixed
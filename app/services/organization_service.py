@@ -1,6 +1,7 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from app.core.tenant_cache import invalidate_tenant
 from app.models.organization import Organization
 from app.schemas.organization import OrganizationCreate, OrganizationUpdate
 
@@ -41,6 +42,7 @@ class OrganizationService:
         db.add(organization)
         db.commit()
         db.refresh(organization)
+        invalidate_tenant(organization.id)
         return organization
 
     @staticmethod
@@ -98,6 +100,7 @@ class OrganizationService:
 
         db.commit()
         db.refresh(organization)
+        invalidate_tenant(organization_id)
         return organization
 
     @staticmethod
@@ -110,4 +113,5 @@ class OrganizationService:
             raise HTTPException(status_code=404, detail="Organization not found")
 
         db.delete(organization)
-        db.commit() 
\ No newline at end of file
+        db.commit()
+        invalidate_tenant(organization_id) 
\ No newline at end of file
@@ -0,0 +1,110 @@
+from typing import Any, Dict, Iterator, List, Sequence
+import numpy as np
+from sqlalchemy import select, func, case, distinct
+from sqlalchemy.orm import Session
+from app.ml.performance_predictor import FEATURES
+from app.ml.registry import model_registry
+from app.models.assignment import Assignment, AssignmentSubmission
+from app.models.attendance import Attendance
+from app.models.grade import Grade
+from app.models.student import Student
+
+# Attendance statuses that count towards the attendance rate
+ATTENDED_STATUSES = ("present", "late")
+
+class PerformanceService:
+    @staticmethod
+    def _cohort_query(organization_id: int):
+        """
+        Aggregate the model features for every active student of an organization
+        in a single query, one row per student in id order.
+        """
+        attendance = (
+            select(
+                Attendance.student_id,
+                (
+                    func.sum(case((Attendance.status.in_(ATTENDED_STATUSES), 1), else_=0)) * 1.0
+                    / func.count(Attendance.id)
+                ).label("attendance_rate")
+            )
+            .where(Attendance.organization_id == organization_id)
+            .group_by(Attendance.student_id)
+            .subquery()
+        )
+        total_assignments = (
+            select(func.count(Assignment.id))
+            .where(Assignment.organization_id == organization_id, Assignment.is_active == True)
+            .scalar_subquery()
+        )
+        submissions = (
+            select(
+                AssignmentSubmission.student_id,
+                func.count(distinct(AssignmentSubmission.assignment_id)).label("submitted")
+            )
+            .join(Assignment, Assignment.id == AssignmentSubmission.assignment_id)
+            .where(Assignment.organization_id == organization_id, Assignment.is_active == True)
+            .group_by(AssignmentSubmission.student_id)
+            .subquery()
+        )
+        grades = (
+            select(Grade.student_id, func.avg(Grade.score).label("quiz_average"))
+            .where(Grade.organization_id == organization_id)
+            .group_by(Grade.student_id)
+            .subquery()
+        )
+
+        query = (
+            select(
+                Student.id,
+                Student.student_id,
+                attendance.c.attendance_rate,
+                (
+                    func.coalesce(submissions.c.submitted, 0) * 1.0
+                    / func.nullif(total_assignments, 0)
+                ).label("assignment_completion"),
+                grades.c.quiz_average
+            )
+            .outerjoin(attendance, attendance.c.student_id == Student.id)
+            .outerjoin(submissions, submissions.c.student_id == Student.id)
+            .outerjoin(grades, grades.c.student_id == Student.id)
+            .where(Student.organization_id == organization_id, Student.is_active == True)
+            .order_by(Student.id)
+        )
+        return query
+
+    @staticmethod
+    def _feature_matrix(rows: Sequence[Any]) -> np.ndarray:
+        """Feature matrix in FEATURES order, with NaN where a student has no data yet."""
+        # Study hours are not tracked yet; NaN makes the model treat them as average
+        X = np.full((len(rows), len(FEATURES)), np.nan)
+        if rows:
+            X[:, :3] = np.array([row[2:] for row in rows], dtype=float)
+        return X
+
+    @staticmethod
+    def iter_cohort_predictions(
+        db: Session,
+        organization_id: int,
+        chunk_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Predict performance for every active student of an organization, one
+        chunk of up to chunk_size students at a time. Rows come from a
+        server-side cursor and each chunk is scored with a single model call
+        before the next one is fetched, so memory does not grow with the
+        cohort.
+        """
+        model = model_registry.get("performance_model")
+        result = db.execute(
+            PerformanceService._cohort_query(organization_id).execution_options(yield_per=chunk_size)
+        )
+        for rows in result.partitions():
+            predictions = model.predict_many(PerformanceService._feature_matrix(rows))
+            yield [
+                {
+                    "student_id": row.id,
+                    "student_number": row.student_id,
+                    **prediction
+                }
+                for row, prediction in zip(rows, predictions)
+            ]
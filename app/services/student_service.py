@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.student import Student
 from app.schemas.student import StudentCreate, StudentUpdate
+from app.core.pagination import paginate
 from app.core.tenant import get_tenant_id
 
 class StudentService:
@@ -53,10 +54,12 @@ class StudentService:
         db: Session,
         skip: int = 0,
         limit: int = 100,
-        active_only: bool = False
+        active_only: bool = False,
+        cursor: Optional[str] = None
     ) -> List[Student]:
         """
-        Get all students.
+        Get all students, newest first. Pass the cursor returned for the
+        previous page to continue from it; skip is used without one.
         """
         tenant_id = get_tenant_id()
         query = db.query(Student)
@@ -68,7 +71,7 @@ class StudentService:
         if active_only:
             query = query.filter(Student.is_active == True)
             
-        return query.offset(skip).limit(limit).all()
+        return paginate(query, Student, skip=skip, limit=limit, cursor=cursor)
 
     @staticmethod
     def create_student(db: Session, student_in: StudentCreate) -> Student:
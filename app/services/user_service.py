@@ -1,9 +1,11 @@
 from typing import List, Optional, Union, Dict, Any
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from app.core.principal_cache import invalidate_user
 from app.core.security import get_password_hash, verify_password
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.core.pagination import paginate
 from app.core.tenant import get_tenant_id
 
 class UserService:
@@ -40,10 +42,12 @@ class UserService:
         db: Session,
         skip: int = 0,
         limit: int = 100,
-        active_only: bool = False
+        active_only: bool = False,
+        cursor: Optional[str] = None
     ) -> List[User]:
         """
-        Get all users.
+        Get all users, newest first. Pass the cursor returned for the
+        previous page to continue from it; skip is used without one.
         """
         tenant_id = get_tenant_id()
         query = db.query(User)
@@ -55,7 +59,7 @@ class UserService:
         if active_only:
             query = query.filter(User.is_active == True)
             
-        return query.offset(skip).limit(limit).all()
+        return paginate(query, User, skip=skip, limit=limit, cursor=cursor)
 
     @staticmethod
     def create_user(db: Session, user_in: UserCreate) -> User:
@@ -116,6 +120,7 @@ class UserService:
         
         db.commit()
         db.refresh(user)
+        invalidate_user(user_id)
         return user
 
     @staticmethod
@@ -129,6 +134,7 @@ class UserService:
         
         db.delete(user)
         db.commit()
+        invalidate_user(user_id)
 
     @staticmethod
     def authenticate(db: Session, email: str, password: str) -> Optional[User]:
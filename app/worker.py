@@ -0,0 +1,51 @@
+import asyncio
+
+from celery import Celery
+
+from app.core.config import settings
+from app.ml.jobs import run_training
+
+celery_app = Celery(
+    "app",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
+)
+celery_app.conf.task_track_started = True
+celery_app.conf.beat_schedule = {
+    "reconcile-unread-notification-counts": {
+        "task": "notifications.reconcile_unread_counts",
+        "schedule": settings.NOTIFICATION_UNREAD_RECONCILE_INTERVAL
+    },
+    "flush-notification-digests": {
+        "task": "notifications.flush_digests",
+        "schedule": settings.NOTIFICATION_DIGEST_FLUSH_INTERVAL
+    }
+}
+
+@celery_app.task(bind=True, name="ml.train_model")
+def train_model(self, model_name: str, n_samples: int = 100) -> dict:
+    """Train a model in the Celery worker and publish its artifact."""
+    def report(progress: float) -> None:
+        self.update_state(state="PROGRESS", meta={"model_name": model_name, "progress": progress})
+
+    result = run_training(model_name, n_samples, report)
+    return {"model_name": model_name, "progress": 1.0, **result}
+
+@celery_app.task(name="notifications.reconcile_unread_counts")
+def reconcile_unread_counts() -> int:
+    """Repair drift in the per-user unread notification counters."""
+    from app.db.session import SessionLocal
+    from app.services.notification_stats import NotificationStatsService
+
+    db = SessionLocal()
+    try:
+        return NotificationStatsService.reconcile(db)
+    finally:
+        db.close()
+
+@celery_app.task(name="notifications.flush_digests")
+def flush_notification_digests() -> int:
+    """Send the digests whose coalescing window has closed."""
+    from app.services.notification_delivery import NotificationDelivery
+
+    return asyncio.run(NotificationDelivery.flush_digests())
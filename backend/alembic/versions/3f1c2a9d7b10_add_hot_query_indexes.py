@@ -0,0 +1,82 @@
+"""add indexes for hot notification, message, attendance and grade queries
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2024-05-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _notification_key() -> list:
+    # The multi-tenant schema scopes notifications by organization; the
+    # single-tenant one does not have the column.
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("notifications")}
+    return ["organization_id", "user_id"] if "organization_id" in columns else ["user_id"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    key = _notification_key()
+    # CONCURRENTLY keeps these hot tables writable while the indexes build;
+    # it cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_user_created_at',
+            'notifications',
+            key + [sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_notifications_unread',
+            'notifications',
+            key + [sa.text('created_at DESC')],
+            postgresql_where=sa.text('is_read = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_messages_chat_id_created_at',
+            'messages',
+            ['chat_id', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_attendance_course_id_date',
+            'attendance',
+            ['course_id', 'date'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_grades_student_id_course_id',
+            'grades',
+            ['student_id', 'course_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in (
+            ('ix_grades_student_id_course_id', 'grades'),
+            ('ix_attendance_course_id_date', 'attendance'),
+            ('ix_messages_chat_id_created_at', 'messages'),
+            ('ix_notifications_unread', 'notifications'),
+            ('ix_notifications_user_created_at', 'notifications'),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,64 @@
+"""add (organization_id, created_at, id) indexes for keyset pagination of users, students and courses
+
+Revision ID: 9d3b7f2e6a41
+Revises: e41a8c3b59d2
+Create Date: 2024-06-10 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b7f2e6a41'
+down_revision: Union[str, None] = 'e41a8c3b59d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_users_organization_id_created_at', 'users'),
+    ('ix_students_organization_id_created_at', 'students'),
+    ('ix_courses_organization_id_created_at', 'courses'),
+)
+
+
+def _tenant_tables() -> set:
+    # Only the multi-tenant schema has organization_id on these tables;
+    # the single-tenant one pages them without it.
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table for _, table in INDEXES
+        if inspector.has_table(table)
+        and "organization_id" in {c["name"] for c in inspector.get_columns(table)}
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = _tenant_tables()
+    # CONCURRENTLY keeps the tables writable while the indexes build;
+    # it cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            if table in tables:
+                op.create_index(
+                    name,
+                    table,
+                    ['organization_id', 'created_at', 'id'],
+                    postgresql_concurrently=True,
+                    if_not_exists=True
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
@@ -0,0 +1,46 @@
+"""add notification queued_at for the stale delivery sweep
+
+Revision ID: b52f0c8d7e19
+Revises: 9d3b7f2e6a41
+Create Date: 2024-06-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b52f0c8d7e19'
+down_revision: Union[str, None] = '9d3b7f2e6a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Left NULL on existing rows: the pipeline never queued them, so the
+    # stale sweep must not send them
+    op.add_column('notifications', sa.Column('queued_at', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_queued_at',
+            'notifications',
+            ['queued_at'],
+            postgresql_where=sa.text("status = 'pending'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notifications_queued_at',
+            table_name='notifications',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+    op.drop_column('notifications', 'queued_at')
@@ -0,0 +1,30 @@
+"""add per-channel notification delivery status
+
+Revision ID: c7d2e94f1a60
+Revises: 8b4e6d21c5a3
+Create Date: 2024-05-29 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e94f1a60'
+down_revision: Union[str, None] = '8b4e6d21c5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notifications', sa.Column('channels', sa.JSON(), nullable=True))
+    op.add_column('notifications', sa.Column('delivery_status', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notifications', 'delivery_status')
+    op.drop_column('notifications', 'channels')
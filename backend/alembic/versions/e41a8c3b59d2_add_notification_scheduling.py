@@ -0,0 +1,55 @@
+"""add notification status and scheduled_for
+
+Revision ID: e41a8c3b59d2
+Revises: c7d2e94f1a60
+Create Date: 2024-06-03 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a8c3b59d2'
+down_revision: Union[str, None] = 'c7d2e94f1a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows from before this revision were handled by the old pipeline, so
+    # they get a terminal status; only rows created from now on start out
+    # pending and are picked up by the delivery queue.
+    op.add_column('notifications', sa.Column('status', sa.String(length=20), nullable=True))
+    op.execute(
+        "UPDATE notifications SET status = CASE "
+        "WHEN is_delivered OR is_read THEN 'sent' ELSE 'failed' END"
+    )
+    op.alter_column('notifications', 'status', server_default='pending', nullable=False)
+    op.add_column('notifications', sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=True))
+    # Only rows still waiting to be dispatched are indexed
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_scheduled_for',
+            'notifications',
+            ['scheduled_for'],
+            postgresql_where=sa.text("status = 'scheduled'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notifications_scheduled_for',
+            table_name='notifications',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+    op.drop_column('notifications', 'scheduled_for')
+    op.drop_column('notifications', 'status')
@@ -1,8 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+import asyncio
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.core.auth import get_current_user
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.services.chat_gateway import ChatConnection, chat_gateway
 from app.services.chat_service import ChatService
 from app.schemas.chat import (
     ChatCreate,
@@ -18,7 +23,7 @@ router = APIRouter()
 @router.post("/", response_model=ChatInDB)
 async def create_chat(
     chat_data: ChatCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new chat"""
@@ -26,7 +31,7 @@ async def create_chat(
 
 @router.get("/", response_model=List[ChatInDB])
 async def get_chats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all chats for the current user"""
@@ -37,7 +42,7 @@ async def get_chat(
     chat_id: int,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific chat with its messages"""
@@ -51,7 +56,7 @@ async def send_message(
     chat_id: int,
     message_data: MessageCreate,
     files: List[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Send a message in a chat"""
@@ -63,7 +68,7 @@ async def send_message(
 @router.post("/{chat_id}/read")
 async def mark_messages_as_read(
     chat_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark all messages in a chat as read"""
@@ -75,11 +80,63 @@ async def mark_messages_as_read(
 @router.delete("/messages/{message_id}")
 async def delete_message(
     message_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a message"""
     success = await ChatService.delete_message(db, message_id, current_user)
     if not success:
         raise HTTPException(status_code=404, detail="Message not found")
-    return {"status": "success"} 
\ No newline at end of file
+    return {"status": "success"}
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, token: Optional[str] = None):
+    """Receive new messages of all the user's chats as they are sent"""
+    # Browsers cannot set headers on a WebSocket handshake, so the token comes as a query parameter
+    user, chat_ids = None, []
+    if token:
+        async with AsyncSessionLocal() as db:
+            try:
+                user = await get_current_user(db=db, token=token)
+                chat_ids = await ChatService.get_user_chat_ids(db, user.id)
+            except HTTPException:
+                user = None
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = await chat_gateway.connect(user.id, chat_ids)
+    writer = asyncio.create_task(_write_frames(websocket, connection))
+    try:
+        while True:
+            # Clients answer pings; silence for two intervals means a dead peer
+            await asyncio.wait_for(websocket.receive_text(), timeout=settings.WS_HEARTBEAT_INTERVAL * 2)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.cancel()
+        await chat_gateway.disconnect(connection)
+
+async def _write_frames(websocket: WebSocket, connection: ChatConnection) -> None:
+    # Pings go out every interval even while messages are flowing: the reader
+    # drops clients that have not answered one within two intervals
+    next_ping = time.monotonic() + settings.WS_HEARTBEAT_INTERVAL
+    try:
+        while True:
+            timeout = next_ping - time.monotonic()
+            if timeout <= 0:
+                await websocket.send_text('{"type":"ping"}')
+                next_ping = time.monotonic() + settings.WS_HEARTBEAT_INTERVAL
+                continue
+            try:
+                data = await asyncio.wait_for(connection.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                continue
+            if data is None:
+                # Dropped for falling behind; the client refetches and reconnects
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await websocket.send_text(data)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.core.deps import get_current_active_user, get_db
+from app.core.principal_cache import invalidate_user
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.crud.user import user as user_crud
 
@@ -58,6 +59,7 @@ def update_user(
             detail="The user with this ID does not exist in the system",
         )
     user = user_crud.update(db, db_obj=user, obj_in=user_in)
+    invalidate_user(user_id)
     return user
 
 @router.get("/{user_id}", response_model=User)
@@ -95,4 +97,5 @@ def delete_user(
             detail="The user with this ID does not exist in the system",
         )
     user = user_crud.remove(db, id=user_id)
+    invalidate_user(user_id)
     return {"status": "success"} 
\ No newline at end of file
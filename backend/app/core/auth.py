@@ -3,9 +3,11 @@ from typing import Any, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.principal_cache import CurrentUser, cache_principal, get_principal
+from app.db.session import get_async_db
 from app.models.user import User
 from app.schemas.token import TokenData
 
@@ -23,9 +25,14 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
     return encoded_jwt
 
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+) -> CurrentUser:
+    # Tokens verified recently skip both the signature check and the user query
+    principal = get_principal(token)
+    if principal:
+        return principal.user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -39,14 +46,16 @@ async def get_current_user(
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = await db.scalar(select(User).where(User.email == token_data.email))
     if user is None:
         raise credentials_exception
-    return user
+    current_user = CurrentUser.from_user(user)
+    cache_principal(token, payload, current_user)
+    return current_user
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user 
\ No newline at end of file
@@ -28,6 +28,18 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "education_erp")
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # Same database through asyncpg, for async def routes
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Recycle connections before server/load balancer idle timeouts close them
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Transaction-pooling PgBouncer in front of Postgres: no app-side pool, no prepared statements
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
     
     # Security Settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -42,6 +54,10 @@ class Settings(BaseSettings):
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD")
 
+    # Authenticated principal cache (decoded JWT claims + user snapshot)
+    PRINCIPAL_CACHE_SIZE: int = 50000
+    PRINCIPAL_CACHE_TTL: int = 60
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
 
@@ -59,6 +75,10 @@ class Settings(BaseSettings):
     # WebSocket Configuration
     WS_MESSAGE_QUEUE: str = "ws_messages"
     WS_HEARTBEAT_INTERVAL: int = 30
+    # Frames buffered per session before a slow client is dropped
+    WS_SEND_BUFFER_SIZE: int = 256
+    # "redis" to fan chat messages out across workers, "local" for a single process
+    CHAT_BROKER: str = os.getenv("CHAT_BROKER", "redis")
     
     # Email Settings
     SMTP_TLS: bool = True
@@ -79,6 +99,16 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             return v
         return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: dict) -> str:
+        if isinstance(v, str):
+            return v
+        uri = values.get("SQLALCHEMY_DATABASE_URI") or ""
+        scheme, _, rest = uri.partition("://")
+        if scheme.split("+")[0] == "postgresql":
+            return f"postgresql+asyncpg://{rest}"
+        return uri
     
     class Config:
         case_sensitive = True
@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# channel -> (handler for each message, callback run after every (re)connect)
+_handlers: Dict[str, Tuple[Callable[[str], None], Optional[Callable[[], None]]]] = {}
+_listener: Optional[threading.Thread] = None
+_redis = None
+
+def register(
+    channel: str,
+    handler: Callable[[str], None],
+    on_reconnect: Optional[Callable[[], None]] = None
+) -> None:
+    """Call ``handler`` with the payload of every message published on ``channel``.
+
+    ``on_reconnect`` runs whenever the subscription is (re)established; messages
+    published while disconnected are lost, so caches should drop everything.
+    """
+    _handlers[channel] = (handler, on_reconnect)
+
+def publish(channel: str, payload: str) -> None:
+    """Tell every worker about a change."""
+    try:
+        _get_redis().publish(channel, payload)
+    except Exception:
+        # Other workers fall back to their cache TTLs
+        logger.exception("Failed to publish invalidation on %s", channel)
+
+def start_invalidation_listener() -> None:
+    """Subscribe to invalidations from other workers."""
+    global _listener
+    if not _handlers or _listener is not None:
+        return
+    _listener = threading.Thread(target=_listen, name="cache-invalidation", daemon=True)
+    _listener.start()
+
+def _listen() -> None:
+    while True:
+        try:
+            pubsub = _get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(*_handlers)
+            for _, on_reconnect in _handlers.values():
+                if on_reconnect:
+                    on_reconnect()
+            for message in pubsub.listen():
+                channel = message["channel"].decode()
+                handler, _ = _handlers[channel]
+                try:
+                    handler(message["data"].decode())
+                except Exception:
+                    logger.exception("Failed to handle invalidation %r on %s", message["data"], channel)
+        except Exception:
+            logger.exception("Invalidation listener lost its Redis connection")
+            time.sleep(5)
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD
+        )
+    return _redis
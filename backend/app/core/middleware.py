@@ -1,22 +1,42 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        logger.info(
-            f"{request.method} {request.url.path} "
-            f"completed in {process_time:.2f}s "
-            f"with status {response.status_code}"
-        )
-        
-        return response 
\ No newline at end of file
+class RequestLoggingMiddleware:
+    """Pure ASGI middleware that logs method, path, duration and status.
+
+    It only observes the ``http.response.start`` message on its way out, so
+    responses, including streaming ones, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            process_time = time.perf_counter() - start_time
+            logger.info(
+                "%s %s completed in %.2fs with status %s",
+                scope["method"],
+                scope["path"],
+                process_time,
+                status_code
+            )
@@ -1,13 +1,16 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+from slowapi.middleware import SlowAPIASGIMiddleware
 
 from app.core.config import settings
+from app.core.invalidation import start_invalidation_listener
 from app.api.v1.api import api_router
 from app.core.middleware import RequestLoggingMiddleware
+from app.services.chat_gateway import chat_gateway
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -24,7 +27,7 @@ app = FastAPI(
 # Add rate limiter to app
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(SlowAPIASGIMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -41,6 +44,22 @@ app.add_middleware(RequestLoggingMiddleware)
 # Include API router with version prefix
 app.include_router(api_router, prefix="/api/v1")
 
+# Prometheus metrics (connection pool gauges, ...)
+app.mount("/metrics", make_asgi_app())
+
+@app.on_event("startup")
+def start_cache_invalidation():
+    # Drop cached principals when another worker changes a user
+    start_invalidation_listener()
+
+@app.on_event("startup")
+async def start_chat_gateway():
+    await chat_gateway.start()
+
+@app.on_event("shutdown")
+async def stop_chat_gateway():
+    await chat_gateway.stop()
+
 @app.get("/api/v1/health")
 @limiter.limit("5/minute")
 async def health_check(request: Request):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -6,6 +6,9 @@ from app.db.base_class import Base
 
 class Grade(Base):
     __tablename__ = "grades"
+    __table_args__ = (
+        Index("ix_grades_student_id_course_id", "student_id", "course_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("student.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Enum, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -17,6 +17,14 @@ class NotificationPriority(str, enum.Enum):
     MEDIUM = "medium"
     LOW = "low"
 
+class NotificationStatus(str, enum.Enum):
+    PENDING = "pending"
+    SCHEDULED = "scheduled"
+    SENT = "sent"
+    DELIVERED = "delivered"
+    READ = "read"
+    FAILED = "failed"
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -28,8 +36,42 @@ class Notification(Base):
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     is_delivered = Column(Boolean, default=False)
+    # Channels to deliver on, and the outcome of each: {"email": {"status": "sent", ...}}
+    channels = Column(JSON, nullable=True)
+    delivery_status = Column(JSON, nullable=True)
+    status = Column(String(20), nullable=False, default=NotificationStatus.PENDING.value, server_default="pending")
+    scheduled_for = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="notifications") 
\ No newline at end of file
+    user = relationship("User", back_populates="notifications")
+
+class UserNotificationStats(Base):
+    """Per-user notification counters, maintained alongside the notifications themselves."""
+    __tablename__ = "user_notification_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Listing a user's notifications newest first, with (created_at, id) keyset pagination
+Index(
+    "ix_notifications_user_created_at",
+    Notification.user_id,
+    Notification.created_at.desc(),
+    Notification.id.desc()
+)
+# Unread badge and unread-only listings only ever touch unread rows
+Index(
+    "ix_notifications_unread",
+    Notification.user_id,
+    Notification.created_at.desc(),
+    postgresql_where=Notification.is_read == False
+)
+# Scheduled notifications still waiting to be dispatched, in due order
+Index(
+    "ix_notifications_scheduled_for",
+    Notification.scheduled_for,
+    postgresql_where=Notification.status == NotificationStatus.SCHEDULED.value
+)
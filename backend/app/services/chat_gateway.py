@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Handler for one message on a subscribed channel: (channel, data)
+Callback = Callable[[str, str], None]
+
+class LocalBroker:
+    """In-process pub/sub with the same interface as RedisBroker.
+
+    Every gateway attached to one instance sees the others' messages, so
+    it stands in for Redis in a single process and in load tests.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Callback]] = defaultdict(set)
+
+    async def start(self, on_reconnect: Optional[Callable[[], None]] = None) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, channel: str, data: str) -> None:
+        for callback in list(self._subscribers.get(channel, ())):
+            callback(channel, data)
+
+    async def subscribe(self, channel: str, callback: Callback) -> None:
+        self._subscribers[channel].add(callback)
+
+    async def unsubscribe(self, channel: str, callback: Callback) -> None:
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(callback)
+            if not subscribers:
+                del self._subscribers[channel]
+
+class RedisBroker:
+    """Redis pub/sub on one connection per worker, resubscribing after a disconnect."""
+
+    def __init__(self, host: str, port: int, password: Optional[str] = None):
+        import redis.asyncio as aioredis
+        self._client = aioredis.Redis(host=host, port=port, password=password)
+        self._callbacks: Dict[str, Callback] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._on_reconnect: Optional[Callable[[], None]] = None
+
+    async def start(self, on_reconnect: Optional[Callable[[], None]] = None) -> None:
+        self._on_reconnect = on_reconnect
+        if self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._client.close()
+
+    async def publish(self, channel: str, data: str) -> None:
+        await self._client.publish(channel, data)
+
+    async def subscribe(self, channel: str, callback: Callback) -> None:
+        self._callbacks[channel] = callback
+        if self._pubsub is not None:
+            await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str, callback: Callback) -> None:
+        self._callbacks.pop(channel, None)
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(channel)
+
+    async def _listen(self) -> None:
+        connected_before = False
+        while True:
+            try:
+                self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await self._pubsub.subscribe(*self._callbacks)
+                if connected_before and self._on_reconnect:
+                    self._on_reconnect()
+                connected_before = True
+                async for message in self._pubsub.listen():
+                    channel = message["channel"].decode()
+                    callback = self._callbacks.get(channel)
+                    if callback is not None:
+                        callback(channel, message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Chat gateway lost its Redis connection")
+                self._pubsub = None
+                await asyncio.sleep(5)
+
+class ChatConnection:
+    """One user session. Outgoing frames wait in a bounded buffer."""
+
+    __slots__ = ("user_id", "queue", "closed")
+
+    def __init__(self, user_id: int, size: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(size)
+        self.closed = False
+
+    def offer(self, data: str) -> bool:
+        """Buffer a frame; False when the client is too slow to keep up."""
+        if self.closed:
+            return True
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        # None tells the socket writer to close
+        self.queue.put_nowait(None)
+
+class ChatGateway:
+    """Fans chat messages out to the WebSocket sessions on this worker.
+
+    Each message is published once on its chat's channel. A worker is
+    subscribed to the channels of the chats that have a participant
+    connected to it, and delivers each message through a
+    chat -> participants -> connections index, so its cost is one
+    serialization per message and one queue put per receiving session.
+    A session whose buffer fills up is dropped rather than buffered
+    without limit.
+    """
+
+    def __init__(self, broker, channel_prefix: str, buffer_size: int):
+        self.broker = broker
+        self.channel_prefix = channel_prefix
+        self.buffer_size = buffer_size
+        self._connections: Dict[int, Set[ChatConnection]] = {}
+        self._chat_members: Dict[int, Set[int]] = {}
+        self._user_chats: Dict[int, Set[int]] = {}
+        self.dropped = 0
+
+    @property
+    def members_channel(self) -> str:
+        return f"{self.channel_prefix}:chat-members"
+
+    async def start(self) -> None:
+        await self.broker.subscribe(self.members_channel, self._on_members)
+        await self.broker.start(on_reconnect=self._on_reconnect)
+
+    async def stop(self) -> None:
+        for connections in self._connections.values():
+            for connection in connections:
+                connection.close()
+        await self.broker.stop()
+
+    async def connect(self, user_id: int, chat_ids: Iterable[int]) -> ChatConnection:
+        connection = ChatConnection(user_id, self.buffer_size)
+        connections = self._connections.setdefault(user_id, set())
+        connections.add(connection)
+        if len(connections) == 1:
+            for chat_id in chat_ids:
+                await self._join(user_id, chat_id)
+        return connection
+
+    async def disconnect(self, connection: ChatConnection) -> None:
+        connections = self._connections.get(connection.user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if connections:
+            return
+        del self._connections[connection.user_id]
+        for chat_id in self._user_chats.pop(connection.user_id, ()):
+            members = self._chat_members.get(chat_id)
+            if members is None:
+                continue
+            members.discard(connection.user_id)
+            if not members:
+                del self._chat_members[chat_id]
+                await self.broker.unsubscribe(self._chat_channel(chat_id), self._on_message)
+
+    async def publish_message(self, chat_id: int, payload: dict) -> None:
+        """Send a new message to every participant's sessions, on any worker."""
+        data = json.dumps({"type": "message", "chat_id": chat_id, "data": payload}, default=str)
+        try:
+            await self.broker.publish(self._chat_channel(chat_id), data)
+        except Exception:
+            # The message is stored; clients see it on their next fetch
+            logger.exception("Failed to publish message to chat %s", chat_id)
+
+    async def add_participants(self, chat_id: int, user_ids: Iterable[int]) -> None:
+        """Start delivering a chat to participants who are already connected."""
+        data = json.dumps({"chat_id": chat_id, "user_ids": list(user_ids)})
+        try:
+            await self.broker.publish(self.members_channel, data)
+        except Exception:
+            logger.exception("Failed to announce participants of chat %s", chat_id)
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self._connections.values())
+
+    async def _join(self, user_id: int, chat_id: int) -> None:
+        self._user_chats.setdefault(user_id, set()).add(chat_id)
+        members = self._chat_members.setdefault(chat_id, set())
+        members.add(user_id)
+        if len(members) == 1:
+            await self.broker.subscribe(self._chat_channel(chat_id), self._on_message)
+
+    def _on_message(self, channel: str, data: str) -> None:
+        chat_id = int(channel.rsplit(":", 1)[1])
+        for user_id in self._chat_members.get(chat_id, ()):
+            connections = self._connections.get(user_id)
+            if not connections:
+                continue
+            for connection in list(connections):
+                if not connection.offer(data):
+                    logger.info("Dropping slow chat session of user %s", user_id)
+                    self.dropped += 1
+                    connection.close()
+                    connections.discard(connection)
+
+    def _on_members(self, channel: str, data: str) -> None:
+        event = json.loads(data)
+        for user_id in event["user_ids"]:
+            if user_id in self._connections:
+                asyncio.get_running_loop().create_task(self._join(user_id, event["chat_id"]))
+
+    def _on_reconnect(self) -> None:
+        # Messages published while disconnected were lost; tell clients to refetch
+        for connections in self._connections.values():
+            for connection in list(connections):
+                if not connection.offer('{"type":"resync"}'):
+                    connection.close()
+
+    def _chat_channel(self, chat_id: int) -> str:
+        return f"{self.channel_prefix}:chat:{chat_id}"
+
+chat_gateway = ChatGateway(
+    broker=RedisBroker(settings.REDIS_HOST, settings.REDIS_PORT, settings.REDIS_PASSWORD)
+    if settings.CHAT_BROKER == "redis" else LocalBroker(),
+    channel_prefix=settings.WS_MESSAGE_QUEUE,
+    buffer_size=settings.WS_SEND_BUFFER_SIZE
+)
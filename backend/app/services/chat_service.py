@@ -1,60 +1,84 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from fastapi import UploadFile
-from app.models.chat import Chat, Message, MessageAttachment
+from app.models.chat import Chat, Message, MessageAttachment, chat_participants
 from app.models.user import User
-from app.core.security import get_current_user
-from app.schemas.chat import ChatCreate, MessageCreate
+from app.schemas.chat import ChatCreate, MessageCreate, MessageInDB
+from app.services.chat_gateway import chat_gateway
 from app.core.storage import save_file
 
 class ChatService:
     @staticmethod
-    async def create_chat(db: Session, chat_data: ChatCreate, current_user: User) -> Chat:
+    async def is_participant(db: AsyncSession, chat_id: int, user_id: int) -> bool:
+        return await db.scalar(
+            select(chat_participants.c.chat_id).where(
+                chat_participants.c.chat_id == chat_id,
+                chat_participants.c.user_id == user_id
+            )
+        ) is not None
+
+    @staticmethod
+    async def get_user_chat_ids(db: AsyncSession, user_id: int) -> List[int]:
+        chat_ids = await db.scalars(
+            select(chat_participants.c.chat_id).where(chat_participants.c.user_id == user_id)
+        )
+        return list(chat_ids)
+
+    @staticmethod
+    async def create_chat(db: AsyncSession, chat_data: ChatCreate, current_user: User) -> Chat:
         chat = Chat(
             name=chat_data.name,
             is_group=chat_data.is_group
         )
-        chat.participants.append(current_user)
-        for participant_id in chat_data.participant_ids:
-            participant = db.query(User).filter(User.id == participant_id).first()
-            if participant:
-                chat.participants.append(participant)
-        
+        participant_ids = {current_user.id, *chat_data.participant_ids}
+        participants = await db.scalars(select(User).where(User.id.in_(participant_ids)))
+        chat.participants = list(participants)
+
         db.add(chat)
-        db.commit()
-        db.refresh(chat)
+        await db.commit()
+        await db.refresh(chat)
+        await chat_gateway.add_participants(chat.id, participant_ids)
         return chat
 
     @staticmethod
-    async def get_user_chats(db: Session, current_user: User) -> List[Chat]:
-        return db.query(Chat).filter(Chat.participants.contains(current_user)).all()
+    async def get_user_chats(db: AsyncSession, current_user: User) -> List[Chat]:
+        chats = await db.scalars(
+            select(Chat).where(Chat.participants.any(User.id == current_user.id))
+        )
+        return list(chats)
 
     @staticmethod
     async def get_chat_messages(
-        db: Session,
+        db: AsyncSession,
         chat_id: int,
         current_user: User,
         skip: int = 0,
         limit: int = 50
     ) -> List[Message]:
-        chat = db.query(Chat).filter(Chat.id == chat_id).first()
-        if not chat or current_user not in chat.participants:
+        if not await ChatService.is_participant(db, chat_id, current_user.id):
             return []
-        
-        return db.query(Message).filter(
-            Message.chat_id == chat_id
-        ).order_by(Message.created_at.desc()).offset(skip).limit(limit).all()
+
+        messages = await db.scalars(
+            select(Message)
+            .where(Message.chat_id == chat_id)
+            .options(selectinload(Message.attachments))
+            .order_by(Message.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(messages)
 
     @staticmethod
     async def send_message(
-        db: Session,
+        db: AsyncSession,
         chat_id: int,
         message_data: MessageCreate,
         current_user: User,
         files: List[UploadFile] = None
-    ) -> Message:
-        chat = db.query(Chat).filter(Chat.id == chat_id).first()
-        if not chat or current_user not in chat.participants:
+    ) -> Optional[Message]:
+        if not await ChatService.is_participant(db, chat_id, current_user.id):
             return None
 
         message = Message(
@@ -63,52 +87,57 @@ class ChatService:
             content=message_data.content
         )
         db.add(message)
-        db.commit()
-        db.refresh(message)
+        await db.flush()
 
-        if files:
-            for file in files:
-                file_url = await save_file(file)
-                attachment = MessageAttachment(
-                    message_id=message.id,
-                    file_name=file.filename,
-                    file_type=file.content_type,
-                    file_url=file_url,
-                    file_size=file.size
-                )
-                db.add(attachment)
-            db.commit()
+        for file in files or []:
+            file_url = await save_file(file)
+            db.add(MessageAttachment(
+                message_id=message.id,
+                file_name=file.filename,
+                file_type=file.content_type,
+                file_url=file_url,
+                file_size=file.size
+            ))
+        await db.commit()
 
+        # Load the attachments eagerly; lazy loads are not available on an AsyncSession
+        message = await db.scalar(
+            select(Message)
+            .where(Message.id == message.id)
+            .options(selectinload(Message.attachments))
+            .execution_options(populate_existing=True)
+        )
+        await chat_gateway.publish_message(chat_id, MessageInDB.model_validate(message).model_dump(mode="json"))
         return message
 
     @staticmethod
     async def mark_messages_as_read(
-        db: Session,
+        db: AsyncSession,
         chat_id: int,
         current_user: User
     ) -> bool:
-        messages = db.query(Message).filter(
-            Message.chat_id == chat_id,
-            Message.sender_id != current_user.id,
-            Message.is_read == False
-        ).all()
-        
-        for message in messages:
-            message.is_read = True
-        
-        db.commit()
+        await db.execute(
+            update(Message)
+            .where(
+                Message.chat_id == chat_id,
+                Message.sender_id != current_user.id,
+                Message.is_read == False
+            )
+            .values(is_read=True)
+        )
+        await db.commit()
         return True
 
     @staticmethod
     async def delete_message(
-        db: Session,
+        db: AsyncSession,
         message_id: int,
         current_user: User
     ) -> bool:
-        message = db.query(Message).filter(Message.id == message_id).first()
+        message = await db.get(Message, message_id)
         if not message or message.sender_id != current_user.id:
             return False
-        
-        db.delete(message)
-        db.commit()
-        return True 
\ No newline at end of file
+
+        await db.delete(message)
+        await db.commit()
+        return True
@@ -0,0 +1,127 @@
+"""Throughput of the chat list query on the sync and async SQLAlchemy engines.
+
+Fires N concurrent GET requests at two async routes: one runs the query
+on a sync Session (the blocking pattern the chat routes used to have),
+the other on an AsyncSession. The query is the one behind
+``ChatService.get_user_chats``. The database is a SQLite file (aiosqlite
+for the async engine); a SQL function that sleeps inside the driver
+and runs once per request stands in for network and query latency.
+
+    python benchmarks/async_engine.py [--requests 500] [--latency-ms 0 5 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models.chat import Chat, chat_participants  # noqa: E402
+
+USER_ID = 1
+
+def chats_query():
+    chats = Chat.__table__
+    return select(chats.c.id, chats.c.name).where(
+        exists().where(
+            chat_participants.c.chat_id == chats.c.id,
+            chat_participants.c.user_id == USER_ID
+        )
+    )
+
+def pause(ms: float) -> int:
+    time.sleep(ms / 1000)
+    return 1
+
+def build_app(path: str, latency_ms: float) -> FastAPI:
+    pool = {"pool_size": 20, "max_overflow": 500}
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, **pool)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **pool)
+    for sync_engine in (engine, async_engine.sync_engine):
+        event.listen(sync_engine, "connect", lambda dbapi, record: dbapi.create_function("pause", 1, pause))
+
+    SessionLocal = sessionmaker(bind=engine)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_chats(db: Session = Depends(get_db)):
+        db.execute(select(func.pause(latency_ms)))
+        return [row.id for row in db.execute(chats_query())]
+
+    @app.get("/async")
+    async def async_chats(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(select(func.pause(latency_ms)))
+        return [row.id for row in await db.execute(chats_query())]
+
+    return app
+
+def seed(path: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Chat.__table__.create(engine)
+    chat_participants.create(engine)
+    with engine.begin() as conn:
+        conn.execute(Chat.__table__.insert(), [{"name": f"chat {i}", "is_group": True} for i in range(200)])
+        conn.execute(chat_participants.insert(), [
+            {"chat_id": i + 1, "user_id": (i + k) % 50 + 1} for i in range(200) for k in range(3)
+        ])
+    engine.dispose()
+
+async def run(app: FastAPI, path: str, requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.get(path)
+        latencies = []
+
+        async def one():
+            sent = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - sent)
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, latencies[int(len(latencies) * 0.99)]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0, 5, 20])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat.db")
+        seed(path)
+        print(f"{args.requests} concurrent requests")
+        print(f"{'latency':>8} {'sync req/s':>11} {'sync p99':>9} {'async req/s':>12} {'async p99':>10}")
+        for latency_ms in args.latency_ms:
+            app = build_app(path, latency_ms)
+            sync_rps, sync_p99 = asyncio.run(run(app, "/sync", args.requests))
+            async_rps, async_p99 = asyncio.run(run(app, "/async", args.requests))
+            print(f"{latency_ms:6.0f}ms {sync_rps:11.0f} {sync_p99:8.2f}s {async_rps:12.0f} {async_p99:9.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Chat fan-out to ~5k concurrent WebSocket sessions spread over several workers.
+
+Each worker is a ``ChatGateway``, and all of them share a ``LocalBroker``,
+which stands in for Redis pub/sub in one process. Every client is a task
+draining its session buffer the way ``_write_frames`` does, minus the
+socket. Chats mix small groups, class-wide chats and one busy
+school-wide chat. Some members of the busy chat never read their
+socket, to check that they are dropped instead of buffering without
+bound. Reports delivery throughput, end-to-end latency and, with
+--memory, the traced memory at idle and at peak.
+
+    python benchmarks/chat_fanout.py [--clients 5000] [--workers 4] [--messages 20000] [--memory]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.chat_gateway import ChatGateway, LocalBroker  # noqa: E402
+
+BUSY_CHAT = 2000
+
+def build_chats(clients: int):
+    users = range(clients)
+    chats = {}
+    for chat_id in range(1000):
+        chats[chat_id] = random.sample(users, 5)
+    for chat_id in range(1000, 1040):
+        chats[chat_id] = random.sample(users, 150)
+    chats[BUSY_CHAT] = random.sample(users, 200)
+    user_chats = {user_id: [] for user_id in users}
+    for chat_id, members in chats.items():
+        for user_id in members:
+            user_chats[user_id].append(chat_id)
+    return chats, user_chats
+
+async def run(args) -> None:
+    chats, user_chats = build_chats(args.clients)
+    broker = LocalBroker()
+    gateways = [
+        ChatGateway(broker, settings.WS_MESSAGE_QUEUE, settings.WS_SEND_BUFFER_SIZE)
+        for _ in range(args.workers)
+    ]
+    for gateway in gateways:
+        await gateway.start()
+
+    slow = set(random.sample(chats[BUSY_CHAT], args.slow))
+    latencies = []
+
+    async def client(connection, is_slow: bool) -> None:
+        while True:
+            data = await connection.queue.get()
+            if data is None:
+                return
+            if is_slow:
+                await asyncio.sleep(3600)
+            latencies.append(time.perf_counter() - json.loads(data)["data"]["sent_at"])
+
+    if args.memory:
+        tracemalloc.start()
+    clients = []
+    for user_id in range(args.clients):
+        connection = await gateways[user_id % args.workers].connect(user_id, user_chats[user_id])
+        clients.append(asyncio.create_task(client(connection, user_id in slow)))
+    await asyncio.sleep(0.1)
+    idle_memory = tracemalloc.get_traced_memory()[0] if args.memory else 0
+
+    chat_ids = list(chats)
+    weights = [1 if chat_id < 1000 else 3 if chat_id < BUSY_CHAT else 280 for chat_id in chat_ids]
+    targets = 0
+    started = time.perf_counter()
+    for i in range(args.messages):
+        chat_id = random.choices(chat_ids, weights)[0]
+        targets += len(chats[chat_id])
+        await gateways[i % args.workers].publish_message(
+            chat_id, {"id": i, "content": "hello", "sent_at": time.perf_counter()}
+        )
+        if i % 200 == 0:
+            # Let clients drain, like a server interleaving other requests
+            await asyncio.sleep(0)
+    published = time.perf_counter() - started
+
+    delivered, finished = -1, time.perf_counter()
+    while len(latencies) != delivered:
+        delivered, finished = len(latencies), time.perf_counter()
+        for _ in range(20):
+            await asyncio.sleep(0)
+    elapsed = finished - started
+    peak_memory = tracemalloc.get_traced_memory()[1] if args.memory else 0
+    if args.memory:
+        tracemalloc.stop()
+
+    latencies.sort()
+    percentile = lambda p: latencies[int(p * (len(latencies) - 1))] * 1000  # noqa: E731
+    print(f"{args.clients} clients on {args.workers} workers, {len(chats)} chats")
+    print(f"{args.messages} messages published in {published:.2f} s, all delivered after {elapsed:.2f} s")
+    print(f"deliveries: {delivered:,} of {targets:,} fan-out targets ({delivered / elapsed:,.0f}/s), "
+          f"latency p50 {percentile(0.5):.1f} ms p99 {percentile(0.99):.1f} ms")
+    print(f"slow consumers dropped: {sum(gateway.dropped for gateway in gateways)} of {len(slow)}")
+    if args.memory:
+        print(f"traced memory: idle {idle_memory / 1e6:.0f} MB, peak {peak_memory / 1e6:.0f} MB")
+
+    for gateway in gateways:
+        await gateway.stop()
+    for task in clients:
+        task.cancel()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--slow", type=int, default=50, help="members of the busy chat that never read")
+    parser.add_argument("--memory", action="store_true", help="trace memory (slows the run down)")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
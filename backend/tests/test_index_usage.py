@@ -0,0 +1,182 @@
+"""The hot notification, message, attendance and grade queries must use the indexes
+added in migration 3f1c2a9d7b10 instead of scanning their tables.
+
+Bare tables are created, the migration is applied to them, and a dataset
+large enough for the planner to prefer an index is seeded before each
+query is EXPLAINed. Runs against the PostgreSQL database in
+TEST_DATABASE_URL and is skipped without one.
+"""
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+from alembic.runtime.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, text
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "3f1c2a9d7b10_add_hot_query_indexes.py"
+
+USERS = 2000
+ORGANIZATIONS = 20
+NOTIFICATIONS = 200_000
+CHATS = 1000
+MESSAGES = 100_000
+COURSES = 500
+ATTENDANCE = 100_000
+STUDENTS = 5000
+GRADES = 100_000
+
+def _tables(multi_tenant: bool) -> MetaData:
+    """The columns the hot queries touch, with no indexes beyond the primary keys."""
+    metadata = MetaData()
+    Table(
+        "notifications", metadata,
+        Column("id", Integer, primary_key=True),
+        *([Column("organization_id", Integer, nullable=False)] if multi_tenant else []),
+        Column("user_id", Integer, nullable=False),
+        Column("title", String, nullable=False),
+        Column("is_read", Boolean, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False)
+    )
+    Table(
+        "messages", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("chat_id", Integer, nullable=False),
+        Column("content", String, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False)
+    )
+    Table(
+        "attendance", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("course_id", Integer, nullable=False),
+        Column("student_id", Integer, nullable=False),
+        Column("date", DateTime(timezone=True), nullable=False)
+    )
+    Table(
+        "grades", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("student_id", Integer, nullable=False),
+        Column("course_id", Integer, nullable=False),
+        Column("score", Integer, nullable=False)
+    )
+    return metadata
+
+def _apply_migration(engine) -> None:
+    spec = importlib.util.spec_from_file_location("hot_query_indexes", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with context.begin_transaction(), Operations.context(context):
+            migration.upgrade()
+
+def _seed(engine, multi_tenant: bool) -> None:
+    organization = f"(i % {ORGANIZATIONS}) + 1, " if multi_tenant else ""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO notifications ({'organization_id, ' if multi_tenant else ''}user_id, title, is_read, created_at)
+            SELECT {organization}(i % {USERS}) + 1, 'Notification ' || i, i % 10 <> 0,
+                   now() - make_interval(mins => i)
+            FROM generate_series(1, {NOTIFICATIONS}) AS i
+        """))
+        conn.execute(text(f"""
+            INSERT INTO messages (chat_id, content, created_at)
+            SELECT (i % {CHATS}) + 1, 'Message ' || i, now() - make_interval(secs => i)
+            FROM generate_series(1, {MESSAGES}) AS i
+        """))
+        conn.execute(text(f"""
+            INSERT INTO attendance (course_id, student_id, date)
+            SELECT (i % {COURSES}) + 1, (i % {STUDENTS}) + 1, now() - make_interval(days => i % 365)
+            FROM generate_series(1, {ATTENDANCE}) AS i
+        """))
+        conn.execute(text(f"""
+            INSERT INTO grades (student_id, course_id, score)
+            SELECT (i % {STUDENTS}) + 1, (i % {COURSES}) + 1, i % 100
+            FROM generate_series(1, {GRADES}) AS i
+        """))
+        conn.execute(text("ANALYZE"))
+
+@pytest.fixture(scope="module", params=["single_tenant", "multi_tenant"])
+def seeded(request, make_pg_engine):
+    multi_tenant = request.param == "multi_tenant"
+    engine = make_pg_engine()
+    _tables(multi_tenant).create_all(engine)
+    _apply_migration(engine)
+    _seed(engine, multi_tenant)
+    return engine, multi_tenant
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+def _explain(engine, sql: str, **params):
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(_plan_nodes(plan[0]["Plan"]))
+
+def _assert_uses_index(engine, table: str, index: str, sql: str, **params) -> None:
+    nodes = _explain(engine, sql, **params)
+    seq_scans = [node for node in nodes if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == table]
+    assert not seq_scans, f"sequential scan on {table}: {sql}"
+    used = {node.get("Index Name") for node in nodes}
+    assert index in used, f"expected {index}, plan used {sorted(filter(None, used))}: {sql}"
+
+def _tenant_filter(multi_tenant: bool) -> str:
+    return "organization_id = :organization_id AND " if multi_tenant else ""
+
+def test_notification_listing_uses_index(seeded):
+    engine, multi_tenant = seeded
+    _assert_uses_index(
+        engine, "notifications", "ix_notifications_user_created_at",
+        f"SELECT * FROM notifications WHERE {_tenant_filter(multi_tenant)}user_id = :user_id "
+        "ORDER BY created_at DESC, id DESC LIMIT 20",
+        organization_id=8, user_id=7
+    )
+
+def test_notification_keyset_page_uses_index(seeded):
+    engine, multi_tenant = seeded
+    _assert_uses_index(
+        engine, "notifications", "ix_notifications_user_created_at",
+        f"SELECT * FROM notifications WHERE {_tenant_filter(multi_tenant)}user_id = :user_id "
+        "AND (created_at, id) < (now() - interval '30 days', 1000000) "
+        "ORDER BY created_at DESC, id DESC LIMIT 20",
+        organization_id=8, user_id=7
+    )
+
+def test_unread_notifications_use_partial_index(seeded):
+    engine, multi_tenant = seeded
+    _assert_uses_index(
+        engine, "notifications", "ix_notifications_unread",
+        f"SELECT count(*) FROM notifications WHERE {_tenant_filter(multi_tenant)}user_id = :user_id "
+        "AND is_read = false",
+        organization_id=8, user_id=7
+    )
+
+def test_chat_messages_use_index(seeded):
+    engine, _ = seeded
+    _assert_uses_index(
+        engine, "messages", "ix_messages_chat_id_created_at",
+        "SELECT * FROM messages WHERE chat_id = :chat_id ORDER BY created_at DESC LIMIT 50",
+        chat_id=42
+    )
+
+def test_course_attendance_uses_index(seeded):
+    engine, _ = seeded
+    _assert_uses_index(
+        engine, "attendance", "ix_attendance_course_id_date",
+        "SELECT * FROM attendance WHERE course_id = :course_id AND date >= now() - interval '30 days' "
+        "ORDER BY date",
+        course_id=42
+    )
+
+def test_student_course_grades_use_index(seeded):
+    engine, _ = seeded
+    _assert_uses_index(
+        engine, "grades", "ix_grades_student_id_course_id",
+        "SELECT * FROM grades WHERE student_id = :student_id AND course_id = :course_id",
+        student_id=42, course_id=42
+    )
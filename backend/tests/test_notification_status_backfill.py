@@ -0,0 +1,49 @@
+"""Migration e41a8c3b59d2 must give notifications that existed before it a
+terminal status, so the delivery queue does not send them again, while
+new rows still start out pending. Runs against the PostgreSQL database in
+TEST_DATABASE_URL and is skipped without one.
+"""
+import importlib.util
+from pathlib import Path
+
+from alembic.runtime.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Boolean, Column, Integer, MetaData, String, Table, text
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "e41a8c3b59d2_add_notification_scheduling.py"
+
+def _apply_migration(engine) -> None:
+    spec = importlib.util.spec_from_file_location("notification_scheduling", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with context.begin_transaction(), Operations.context(context):
+            migration.upgrade()
+
+def test_existing_notifications_get_a_terminal_status(make_pg_engine):
+    engine = make_pg_engine()
+    metadata = MetaData()
+    Table(
+        "notifications", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("title", String, nullable=False),
+        Column("is_read", Boolean),
+        Column("is_delivered", Boolean)
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO notifications (id, title, is_read, is_delivered) VALUES
+            (1, 'delivered', false, true),
+            (2, 'read', true, false),
+            (3, 'never delivered', false, false),
+            (4, 'unknown', NULL, NULL)
+        """))
+
+    _apply_migration(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO notifications (id, title) VALUES (5, 'new')"))
+        statuses = dict(conn.execute(text("SELECT id, status FROM notifications")).all())
+    assert statuses == {1: "sent", 2: "sent", 3: "failed", 4: "failed", 5: "pending"}
@@ -0,0 +1,81 @@
+"""Keyset pages of users, students and courses within a tenant must use the
+(organization_id, created_at, id) indexes added in migration 9d3b7f2e6a41.
+
+Bare tables are created, the migration is applied to them, and enough rows
+are seeded for the planner to prefer an index. Runs against the PostgreSQL
+database in TEST_DATABASE_URL and is skipped without one.
+"""
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+from alembic.runtime.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "9d3b7f2e6a41_add_tenant_keyset_indexes.py"
+
+ORGANIZATIONS = 50
+ROWS = 100_000
+TABLES = ("users", "students", "courses")
+
+def _tables(multi_tenant: bool) -> MetaData:
+    metadata = MetaData()
+    for name in TABLES:
+        Table(
+            name, metadata,
+            Column("id", Integer, primary_key=True),
+            *([Column("organization_id", Integer, nullable=True)] if multi_tenant else []),
+            Column("name", String, nullable=False),
+            Column("created_at", DateTime(timezone=True), nullable=False)
+        )
+    return metadata
+
+def _apply_migration(engine) -> None:
+    spec = importlib.util.spec_from_file_location("tenant_keyset_indexes", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with context.begin_transaction(), Operations.context(context):
+            migration.upgrade()
+
+@pytest.fixture(scope="module")
+def seeded(make_pg_engine):
+    engine = make_pg_engine()
+    _tables(multi_tenant=True).create_all(engine)
+    _apply_migration(engine)
+    with engine.begin() as conn:
+        for table in TABLES:
+            conn.execute(text(f"""
+                INSERT INTO {table} (organization_id, name, created_at)
+                SELECT (i % {ORGANIZATIONS}) + 1, 'Row ' || i, now() - make_interval(mins => i)
+                FROM generate_series(1, {ROWS}) AS i
+            """))
+        conn.execute(text("ANALYZE"))
+    return engine
+
+def _index_names(plan):
+    yield plan.get("Index Name")
+    for child in plan.get("Plans", ()):
+        yield from _index_names(child)
+
+@pytest.mark.parametrize("table", TABLES)
+def test_keyset_page_uses_tenant_index(seeded, table):
+    with seeded.connect() as conn:
+        plan = conn.execute(text(
+            f"EXPLAIN (FORMAT JSON) SELECT * FROM {table} WHERE organization_id = 7 "
+            "AND (created_at, id) < (now() - interval '30 days', 1000000) "
+            "ORDER BY created_at DESC, id DESC LIMIT 20"
+        )).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    assert f"ix_{table}_organization_id_created_at" in set(_index_names(plan[0]["Plan"]))
+
+def test_single_tenant_schema_is_left_alone(make_pg_engine):
+    engine = make_pg_engine()
+    _tables(multi_tenant=False).create_all(engine)
+    _apply_migration(engine)
+    inspector = inspect(engine)
+    assert all(not inspector.get_indexes(table) for table in TABLES)
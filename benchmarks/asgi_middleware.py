@@ -0,0 +1,89 @@
+"""Requests/sec and p99 latency of TenantMiddleware as pure ASGI vs BaseHTTPMiddleware.
+
+Both variants resolve the tenant from X-Tenant-ID through the tenant
+cache (pre-warmed, so no database is needed) and set the tenant context.
+The BaseHTTPMiddleware variant is the shape the middleware had before it
+was rewritten, so the difference is the cost of the wrapper itself.
+Requests go through httpx's ASGI transport, sequentially, after a warm-up.
+
+    python benchmarks/asgi_middleware.py [--requests 3000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.tenant import reset_tenant_context, set_tenant_context  # noqa: E402
+from app.core.tenant_cache import TenantInfo, get_tenant, tenant_cache  # noqa: E402
+from app.middleware.tenant import SKIP_PATHS, TenantMiddleware  # noqa: E402
+
+class BaseHTTPTenantMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path.startswith(SKIP_PATHS):
+            return await call_next(request)
+        tenant_id = int(request.headers["X-Tenant-ID"])
+        tenant = get_tenant(tenant_id)
+        if not tenant or not tenant.is_active:
+            raise RuntimeError("tenant not cached")
+        token = set_tenant_context(tenant_id)
+        try:
+            return await call_next(request)
+        finally:
+            reset_tenant_context(token)
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to Smart Education ERP System"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+async def run(app: FastAPI, path: str, requests: int):
+    headers = {"X-Tenant-ID": "1"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(requests // 10):
+            await client.get(path, headers=headers)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(requests):
+            sent = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - sent)
+            response.raise_for_status()
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, latencies[int(len(latencies) * 0.99)] * 1000
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    tenant_cache.set(1, TenantInfo(True, {}))
+    apps = [
+        ("BaseHTTPMiddleware", build_app(BaseHTTPTenantMiddleware)),
+        ("pure ASGI", build_app(TenantMiddleware)),
+    ]
+    print(f"{'route':8} {'middleware':20} {'req/s':>8} {'p99 ms':>8}")
+    for path in ("/", "/health"):
+        for label, app in apps:
+            throughput, p99 = await run(app, path, args.requests)
+            print(f"{path:8} {label:20} {throughput:8.0f} {p99:8.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""How long a password reset waits behind a 50k-recipient newsletter:
+one FIFO queue vs the DeliveryQueue priority lanes.
+
+The newsletter is enqueued as low-priority batches of
+NOTIFICATION_DELIVERY_BATCH_SIZE, then urgent single-recipient
+notifications keep arriving while it drains. The handler sleeps for a
+fixed cost per batch plus a cost per recipient, standing in for provider
+calls. The FIFO case is the same DeliveryQueue with a single lane and
+NOTIFICATION_QUEUE_MAX_IN_FLIGHT slots, so only the lane scheduling
+differs. Reports the urgent notifications' wait from enqueue to handler
+and how long the newsletter took to drain.
+
+    python benchmarks/delivery_lanes.py [--recipients 50000] [--urgent 40] [--per-recipient-ms 0.4]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.delivery_queue import DeliveryQueue, MemoryQueueBackend  # noqa: E402
+
+URGENT_IDS = 10_000_000
+
+async def run(queue: DeliveryQueue, args):
+    enqueued_at, urgent_waits = {}, []
+    newsletter_left = args.recipients
+    drained = asyncio.Event()
+
+    async def handler(ids):
+        nonlocal newsletter_left
+        if ids[0] >= URGENT_IDS:
+            urgent_waits.extend(time.perf_counter() - enqueued_at[i] for i in ids)
+        await asyncio.sleep((args.per_batch_ms + args.per_recipient_ms * len(ids)) / 1000)
+        if ids[0] < URGENT_IDS:
+            newsletter_left -= len(ids)
+            if not newsletter_left:
+                drained.set()
+
+    started = time.perf_counter()
+    queue.enqueue(list(range(args.recipients)), "low", batch_size=settings.NOTIFICATION_DELIVERY_BATCH_SIZE)
+    queue.start(handler)
+    for i in range(args.urgent):
+        await asyncio.sleep(args.urgent_every_ms / 1000)
+        enqueued_at[URGENT_IDS + i] = time.perf_counter()
+        queue.enqueue([URGENT_IDS + i], "urgent")
+    await drained.wait()
+    drain = time.perf_counter() - started
+    while len(urgent_waits) < args.urgent:
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    urgent_waits.sort()
+    return urgent_waits[len(urgent_waits) // 2], urgent_waits[-1], drain
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=50000)
+    parser.add_argument("--urgent", type=int, default=40, help="urgent notifications arriving during the drain")
+    parser.add_argument("--urgent-every-ms", type=float, default=50)
+    parser.add_argument("--per-batch-ms", type=float, default=20)
+    parser.add_argument("--per-recipient-ms", type=float, default=0.4)
+    args = parser.parse_args()
+
+    slots = settings.NOTIFICATION_QUEUE_MAX_IN_FLIGHT
+    fifo = DeliveryQueue({"fifo": 1}, {"fifo": slots}, MemoryQueueBackend(), max_in_flight=slots)
+    lanes = DeliveryQueue(
+        settings.NOTIFICATION_QUEUE_WEIGHTS,
+        settings.NOTIFICATION_QUEUE_CONCURRENCY,
+        MemoryQueueBackend(),
+        max_in_flight=slots
+    )
+    print(f"{args.recipients:,}-recipient newsletter in batches of {settings.NOTIFICATION_DELIVERY_BATCH_SIZE}, "
+          f"{args.urgent} urgent notifications every {args.urgent_every_ms:.0f} ms, {slots} batches in flight")
+    for label, queue in (("before: one FIFO queue", fifo), ("after:  priority lanes", lanes)):
+        p50, worst, drain = asyncio.run(run(queue, args))
+        print(f"{label}  urgent wait p50 {p50 * 1000:8.1f} ms  max {worst * 1000:8.1f} ms  "
+              f"newsletter drained in {drain:5.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Page latency of OFFSET vs keyset pagination at page 1 and deep pages.
+
+Runs ``app.core.pagination.paginate`` against a SQLite table with the
+columns and (user_id, created_at, id) index that the notification list
+uses, filtered to one user. Cursors for deep pages are collected by
+walking the pages first; each page is then fetched repeatedly both ways
+and the median is reported.
+
+    python benchmarks/keyset_pagination.py [--rows 300000] [--pages 1 100 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.pagination import next_cursor, paginate  # noqa: E402
+
+Base = declarative_base()
+
+class Notification(Base):
+    __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    title = Column(String)
+    is_read = Column(Boolean, default=False)
+    created_at = Column(DateTime, nullable=False)
+
+USERS = 10
+PAGE_SIZE = 20
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 500])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'pagination.db')}")
+        Base.metadata.create_all(engine)
+        start = datetime(2024, 1, 1)
+        with engine.begin() as conn:
+            conn.execute(Notification.__table__.insert(), [
+                {"user_id": i % USERS, "title": f"Notification {i}", "created_at": start + timedelta(seconds=i // 3)}
+                for i in range(args.rows)
+            ])
+
+        with Session(engine) as db:
+            query = lambda: db.query(Notification).filter(Notification.user_id == 1)  # noqa: E731
+
+            cursors, cursor = {}, None
+            for page in range(1, max(args.pages) + 1):
+                cursors[page] = cursor
+                cursor = next_cursor(paginate(query(), Notification, limit=PAGE_SIZE, cursor=cursor), PAGE_SIZE)
+
+            print(f"{args.rows} rows, {args.rows // USERS} for the listed user, {PAGE_SIZE} per page")
+            print(f"{'page':>5} {'offset ms':>10} {'cursor ms':>10}")
+            for page in args.pages:
+                timings, pages = {}, {}
+                for mode in ("offset", "cursor"):
+                    samples = []
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        if mode == "offset":
+                            items = paginate(query(), Notification, skip=(page - 1) * PAGE_SIZE, limit=PAGE_SIZE)
+                        else:
+                            items = paginate(query(), Notification, limit=PAGE_SIZE, cursor=cursors[page])
+                        samples.append(time.perf_counter() - started)
+                    timings[mode] = statistics.median(samples) * 1000
+                    pages[mode] = [item.id for item in items]
+                assert pages["offset"] == pages["cursor"], f"page {page} differs between the two modes"
+                print(f"{page:5d} {timings['offset']:10.2f} {timings['cursor']:10.2f}")
+
+if __name__ == "__main__":
+    main()
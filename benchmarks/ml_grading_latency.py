@@ -0,0 +1,83 @@
+"""Per-prediction latency and memory of AutoGradingModel.
+
+Compares the fitted pipeline (TF-IDF fitted once in train, sparse
+features) against the old featurization, which refit TF-IDF on every
+prediction and densified the matrix. The old path could not feed the
+trained classifier at all, so only its featurization is timed.
+
+    python benchmarks/ml_grading_latency.py [--samples 2000] [--runs 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ml.grading_model import AutoGradingModel  # noqa: E402
+
+ANSWER = "The mitochondria produces energy for the cell"
+CORRECT = "The mitochondria is the powerhouse of the cell."
+
+def legacy_preprocess(model: AutoGradingModel, answers, correct_answers) -> np.ndarray:
+    """The featurization predict used before the pipeline was fitted once."""
+    features = [
+        [len(answer) / len(correct), len(set(answer.lower().split()) & set(correct.lower().split()))]
+        for answer, correct in zip(answers, correct_answers)
+    ]
+    text_features = model.vectorizer.fit_transform(answers).toarray()
+    return np.hstack((text_features, np.array(features)))
+
+def measure(fn, runs: int):
+    fn()
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    per_call_ms = (time.perf_counter() - start) / runs * 1000
+    tracemalloc.start()
+    fn()
+    peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return per_call_ms, peak_kib
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    np.random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = AutoGradingModel()
+        model.model_path = os.path.join(tmp, "grading_pipeline.joblib")
+        model.train(model.generate_sample_data(args.samples))
+
+        legacy = AutoGradingModel()
+        rows = [
+            ("before: featurize (refit, dense)", lambda: legacy_preprocess(legacy, [ANSWER], [CORRECT])),
+            ("after:  featurize (transform, sparse)", lambda: model.preprocess_data([ANSWER], [CORRECT])),
+            ("after:  predict", lambda: model.predict(ANSWER, CORRECT)),
+        ]
+        print(f"trained on {args.samples} samples, {args.runs} runs per row")
+        for label, fn in rows:
+            per_call_ms, peak_kib = measure(fn, args.runs)
+            print(f"{label:40} {per_call_ms:8.2f} ms/call  peak {peak_kib:8.1f} KiB")
+
+        batch = 400
+        start = time.perf_counter()
+        model.predict_many([ANSWER] * batch, [CORRECT] * batch)
+        print(f"{'after:  predict_many(' + str(batch) + ')':40} {(time.perf_counter() - start) * 1000:8.2f} ms total")
+
+        try:
+            legacy_features = legacy_preprocess(legacy, [ANSWER], [CORRECT])
+            model.model.predict(legacy_features)
+        except ValueError as exc:
+            print(f"before: predict fails: {exc}")
+
+if __name__ == "__main__":
+    main()
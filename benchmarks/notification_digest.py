@@ -0,0 +1,115 @@
+"""Outbound messages for a replayed week of school traffic, with and without digests.
+
+A synthetic week of notifications goes through ``DigestBuffer``, minute by
+minute, with ``take_due`` called every NOTIFICATION_DIGEST_FLUSH_INTERVAL
+seconds the way the flusher runs. Every class posts grades (low) and
+creates assignments (medium) in bursts during the school day, and now and
+then sends an urgent announcement (high), which bypasses the buffer. Each
+notification goes out by email and push. Without digests each one is its
+own message per channel; with them it is one message per digest plus the
+ones that bypass the buffer. Also reports how long a digested
+notification waited.
+
+    python benchmarks/notification_digest.py [--students 1500] [--classes 60] [--window 3600]
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services import notification_digest  # noqa: E402
+from app.services.notification_digest import DigestBuffer  # noqa: E402
+
+CHANNELS = ["email", "push"]
+DAY = 86400
+
+class ReplayClock:
+    """Stands in for the time module so the buffer runs on replayed time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+def synthetic_week(students: int, classes: int, rng: random.Random):
+    """Return (time, priority, title, student ids) for every burst of the week, in order."""
+    rosters = [rng.sample(range(students), 30) for _ in range(classes)]
+    events = []
+    for day in range(5):
+        school_day = day * DAY + 8 * 3600
+        for roster in rosters:
+            for _ in range(rng.randint(2, 6)):
+                events.append((school_day + rng.randrange(8 * 3600), "low", "Grade posted", roster))
+            for _ in range(rng.randint(1, 3)):
+                events.append((school_day + rng.randrange(8 * 3600), "medium", "Assignment created", roster))
+            if rng.random() < 0.1:
+                events.append((school_day + rng.randrange(8 * 3600), "high", "Class cancelled", roster))
+    return sorted(events, key=lambda event: event[0])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1500)
+    parser.add_argument("--classes", type=int, default=60)
+    parser.add_argument("--window", type=int, default=settings.NOTIFICATION_DIGEST_WINDOW)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    clock = ReplayClock()
+    notification_digest.time = clock
+    buffer = DigestBuffer(window=args.window, priorities=settings.NOTIFICATION_DIGEST_PRIORITIES)
+    flush_interval = settings.NOTIFICATION_DIGEST_FLUSH_INTERVAL
+
+    events = synthetic_week(args.students, args.classes, random.Random(args.seed))
+    notifications = bypassed = digests = 0
+    buffered_at = {}
+    waits = []
+
+    def flush() -> None:
+        nonlocal digests
+        for channel, digest in buffer.take_due(clock.now):
+            digests += 1
+            for added_at in buffered_at.pop((digest.user_id, channel)):
+                waits.append(clock.now - added_at)
+
+    next_flush = flush_interval
+    for at, priority, title, roster in events:
+        while next_flush <= at:
+            clock.now = next_flush
+            flush()
+            next_flush += flush_interval
+        clock.now = at
+        for user_id in roster:
+            notifications += 1
+            notification = SimpleNamespace(
+                id=notifications, user_id=user_id, title=title, message=title,
+                priority=priority, organization_id=None
+            )
+            for channel in CHANNELS:
+                if buffer.accepts(notification, channel):
+                    buffer.add(notification, channel)
+                    buffered_at.setdefault((user_id, channel), []).append(at)
+                else:
+                    bypassed += 1
+    while buffered_at:
+        clock.now = next_flush
+        flush()
+        next_flush += flush_interval
+
+    before = notifications * len(CHANNELS)
+    after = digests + bypassed
+    waits.sort()
+    print(f"{notifications:,} notifications to {args.students} students over a week, "
+          f"channels {', '.join(CHANNELS)}, {args.window} s window")
+    print(f"before: {before:,} outbound messages")
+    print(f"after:  {after:,} outbound messages ({digests:,} digests + {bypassed:,} high priority), "
+          f"{1 - after / before:.0%} fewer")
+    print(f"digested notifications waited p50 {waits[len(waits) // 2] / 60:.0f} min, "
+          f"max {waits[-1] / 60:.0f} min")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Throughput of notification fan-out: one row per request vs INSERT ... SELECT.
+
+The per-row path is what creating each recipient's notification through
+``NotificationService.create_notification`` costs: an INSERT, an unread
+counter upsert, a commit and a refresh per recipient. It is timed on a
+sample of recipients and extrapolated. The bulk path runs the statements
+``NotificationService.fan_out`` issues: one INSERT ... SELECT ... RETURNING
+over the audience and one unnest() counter upsert, in one transaction.
+Tables are created in a throwaway schema of the given PostgreSQL database
+and have the columns those statements touch.
+
+    python benchmarks/notification_fanout.py --database-url postgresql://... [--recipients 10000 100000]
+"""
+import argparse
+import os
+import time
+import uuid
+
+from sqlalchemy import (
+    JSON, Boolean, Column, DateTime, Integer, MetaData, String, Table, bindparam, create_engine,
+    func, literal, select, text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+ORGANIZATION_ID = 1
+TITLE = "Timetable change"
+MESSAGE = "Tomorrow's lectures start an hour later."
+CHANNELS = ["in_app", "email"]
+
+metadata = MetaData()
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("organization_id", Integer, nullable=False),
+    Column("role", String(50)),
+    Column("is_active", Boolean, default=True)
+)
+notifications = Table(
+    "notifications", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("organization_id", Integer, nullable=False),
+    Column("title", String(255), nullable=False),
+    Column("message", String, nullable=False),
+    Column("notification_type", String(50), nullable=False),
+    Column("priority", String(20), nullable=False),
+    Column("metadata", JSON),
+    Column("channels", JSON),
+    Column("is_read", Boolean),
+    Column("is_delivered", Boolean),
+    Column("status", String(20), nullable=False, server_default="pending"),
+    Column("created_at", DateTime(timezone=True), server_default=func.now())
+)
+stats = Table(
+    "user_notification_stats", metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("unread_count", Integer, nullable=False, server_default="0"),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now())
+)
+
+def increment_unread(db: Session, user_ids) -> None:
+    recipients = select(
+        func.unnest(bindparam("user_ids", user_ids, type_=ARRAY(Integer))).label("user_id"),
+        literal(1).label("unread_count")
+    )
+    stmt = insert(stats).from_select(["user_id", "unread_count"], recipients)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[stats.c.user_id],
+        set_={"unread_count": stats.c.unread_count + 1, "updated_at": func.now()}
+    ))
+
+def per_row(engine, user_ids) -> float:
+    started = time.perf_counter()
+    with Session(engine) as db:
+        for user_id in user_ids:
+            notification_id = db.execute(
+                notifications.insert().values(
+                    user_id=user_id, organization_id=ORGANIZATION_ID, title=TITLE, message=MESSAGE,
+                    notification_type="announcement", priority="medium", metadata={},
+                    channels=CHANNELS, is_read=False, is_delivered=False
+                ).returning(notifications.c.id)
+            ).scalar()
+            increment_unread(db, [user_id])
+            db.commit()
+            db.execute(select(notifications).where(notifications.c.id == notification_id)).first()
+    return time.perf_counter() - started
+
+def bulk(engine) -> tuple:
+    started = time.perf_counter()
+    with Session(engine) as db:
+        recipients = select(users.c.id).where(
+            users.c.organization_id == ORGANIZATION_ID,
+            users.c.is_active == True  # noqa: E712
+        ).distinct().subquery()
+        rows = select(
+            recipients.c.id,
+            literal(ORGANIZATION_ID),
+            literal(TITLE, String),
+            literal(MESSAGE, String),
+            literal("announcement", String),
+            literal("medium", String),
+            literal({}, JSON),
+            literal(CHANNELS, JSON),
+            literal(False),
+            literal(False)
+        )
+        created = db.execute(
+            notifications.insert()
+            .from_select(
+                [
+                    "user_id", "organization_id", "title", "message", "notification_type",
+                    "priority", "metadata", "channels", "is_read", "is_delivered"
+                ],
+                rows
+            )
+            .returning(notifications.c.id, notifications.c.user_id)
+        ).all()
+        increment_unread(db, [row.user_id for row in created])
+        db.commit()
+    return time.perf_counter() - started, len(created)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--recipients", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--sample", type=int, default=2000, help="recipients timed on the per-row path")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    schema = f"bench_{uuid.uuid4().hex[:12]}"
+    admin = create_engine(args.database_url)
+    with admin.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    engine = create_engine(args.database_url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        print(f"{'recipients':>10} {'per-row s':>10} {'bulk s':>8} {'bulk rows/s':>12}")
+        for count in args.recipients:
+            metadata.drop_all(engine)
+            metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(users.insert(), [
+                    {"id": i + 1, "organization_id": ORGANIZATION_ID, "role": "student", "is_active": True}
+                    for i in range(count)
+                ])
+            sample = min(count, args.sample)
+            per_row_seconds = per_row(engine, range(1, sample + 1)) / sample * count
+            with engine.begin() as conn:
+                conn.execute(notifications.delete())
+                conn.execute(stats.delete())
+
+            bulk_seconds, created = bulk(engine)
+            assert created == count, f"fan-out created {created} of {count} notifications"
+            print(f"{count:10d} {per_row_seconds:10.2f} {bulk_seconds:8.2f} {count / bulk_seconds:12,.0f}")
+        print(f"per-row times are extrapolated from {args.sample} recipients")
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        admin.dispose()
+
+if __name__ == "__main__":
+    main()
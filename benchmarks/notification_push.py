@@ -0,0 +1,85 @@
+"""Idle connections and push latency of one NotificationGateway worker.
+
+Connects --connections clients to an in-process gateway (no Redis) and
+reports the memory traced per idle connection. It then publishes
+--events notifications to random users from a worker thread, the way
+delivery does, and each client task drains its queue the way the
+WebSocket writer does. Reports delivery latency, and how many listing
+queries polling GET /notifications every --poll-interval seconds would
+cost the same clients instead. Memory covers the gateway's bookkeeping
+and the client tasks, not the server's socket buffers.
+
+    python benchmarks/notification_push.py [--connections 10000] [--events 20000] [--poll-interval 15]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.services.notification_gateway import CLOSED, NotificationGateway  # noqa: E402
+
+async def run(args) -> None:
+    gateway = NotificationGateway(None, "notifications", settings.WS_SEND_QUEUE_SIZE, settings.WS_REPLAY_LIMIT)
+    gateway.start()
+    latencies = []
+
+    async def client(connection) -> None:
+        while True:
+            event = await connection.queue.get()
+            if event == CLOSED:
+                return
+            latencies.append(time.perf_counter() - json.loads(event[1])["sent_at"])
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    connections = [await gateway.connect(user_id) for user_id in range(args.connections)]
+    clients = [asyncio.create_task(client(connection)) for connection in connections]
+    await asyncio.sleep(0.1)
+    idle = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    def publish() -> None:
+        for event_id in range(1, args.events + 1):
+            user_id = random.randrange(args.connections)
+            gateway.publish(user_id, {"id": event_id, "sent_at": time.perf_counter()})
+            if event_id % 500 == 0:
+                # Delivery hands batches over, not one endless burst
+                time.sleep(0.001)
+
+    started = time.perf_counter()
+    await asyncio.to_thread(publish)
+    while len(latencies) < args.events:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[int(p * (len(latencies) - 1))] * 1000  # noqa: E731
+    print(f"{args.connections:,} idle connections: {idle / 1e6:.1f} MB traced, "
+          f"{idle / args.connections / 1024:.2f} KiB each")
+    print(f"{args.events:,} pushes in {elapsed:.2f} s ({args.events / elapsed:,.0f}/s), "
+          f"latency p50 {percentile(0.5):.2f} ms p99 {percentile(0.99):.2f} ms")
+    print(f"polling every {args.poll_interval:.0f} s instead: "
+          f"{args.connections / args.poll_interval:,.0f} listing queries/s, idle or not")
+
+    await gateway.stop()
+    await asyncio.gather(*clients)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--poll-interval", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Batch latency and interval coverage of PerformancePredictor.predict_many.
+
+Compares the quantile GradientBoosting bounds against the old fixed
+interval of predicted_score ± 5, which only needed the point model.
+Latency is the best of --runs passes over each batch size. Coverage is
+the share of held-out students whose true score falls inside the
+interval; the quantile bounds target 80%.
+
+    python benchmarks/performance_intervals.py [--samples 2000] [--batches 1000 20000] [--runs 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ml.performance_predictor import FEATURES, PerformancePredictor  # noqa: E402
+
+def legacy_predict_many(model: PerformancePredictor, X: np.ndarray):
+    """What predict_many did before the quantile models: the point model and a fixed ± 5."""
+    X = np.where(np.isnan(X), model.scaler.mean_, X)
+    predicted_scores = model.model.predict(model.scaler.transform(X))
+    return [
+        {
+            'predicted_performance': float(score),
+            'confidence_interval': {'lower': float(score - 5), 'upper': float(score + 5)}
+        }
+        for score in predicted_scores
+    ]
+
+def best_of(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def coverage(predictions, y: np.ndarray) -> float:
+    lower = np.array([p['confidence_interval']['lower'] for p in predictions])
+    upper = np.array([p['confidence_interval']['upper'] for p in predictions])
+    return float(np.mean((y >= lower) & (y <= upper)))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000, help="training samples")
+    parser.add_argument("--holdout", type=int, default=2000, help="held-out samples for coverage")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1000, 20000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = PerformancePredictor()
+        model.model_path = os.path.join(tmp, "performance_model.joblib")
+        data = model.generate_sample_data(args.samples + args.holdout)
+        metrics = model.train(data[:args.samples])
+        print(f"trained on {args.samples} samples, interval_coverage on its split {metrics['interval_coverage']:.2f}")
+
+        holdout = data[args.samples:]
+        X_holdout = np.array([[row[feature] for feature in FEATURES] for row in holdout], dtype=float)
+        y_holdout = np.array([row['performance_score'] for row in holdout])
+        print(f"coverage on {args.holdout} held-out students: "
+              f"before (± 5) {coverage(legacy_predict_many(model, X_holdout), y_holdout):.2f}, "
+              f"after (quantile) {coverage(model.predict_many(X_holdout), y_holdout):.2f}")
+
+        rng = np.random.default_rng(42)
+        for rows in args.batches:
+            X = X_holdout[rng.integers(0, len(X_holdout), rows)]
+            before = best_of(lambda: legacy_predict_many(model, X), args.runs)
+            after = best_of(lambda: model.predict_many(X), args.runs)
+            print(f"predict_many({rows:>6}): before {before:8.1f} ms  after {after:8.1f} ms  {after / before:.2f}x")
+
+if __name__ == "__main__":
+    main()
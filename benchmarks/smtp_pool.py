@@ -0,0 +1,114 @@
+"""Email throughput: a new SMTP connection per message vs SMTPConnectionPool.
+
+Messages go to a stand-in SMTP server on localhost that accepts anything
+and answers each new connection after --connect-delay seconds. The delay
+stands in for the TCP, STARTTLS and AUTH round trips a real provider costs.
+The unpooled path is what the old sender did, one connect, login, send and
+quit per message; it runs on as many threads as the pool has connections,
+so both sides get the same concurrency. The pooled paths send a MIME
+message with ``send_message_async`` and a compiled template's bytes with
+``sendmail_async``, which is what notification delivery uses.
+
+    python benchmarks/smtp_pool.py [--messages 400] [--connections 4] [--connect-delay 0.03]
+"""
+import argparse
+import asyncio
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.email import build_message  # noqa: E402
+from app.core.notification_templates import template_registry  # noqa: E402
+from app.core.smtp_pool import SMTPConnectionPool  # noqa: E402
+
+TO = "student@example.com"
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    connect_delay = 0.0
+
+    def handle(self) -> None:
+        time.sleep(self.connect_delay)
+        self.reply("220 localhost ESMTP")
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250-localhost", "250-AUTH PLAIN", "250 8BITMIME")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authenticated")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.reply("250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+    def reply(self, *lines: str) -> None:
+        self.wfile.write(b"".join(line.encode() + b"\r\n" for line in lines))
+
+class StubSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+async def unpooled(port: int, messages: int, connections: int) -> float:
+    def send() -> None:
+        with smtplib.SMTP("127.0.0.1", port) as smtp:
+            smtp.login("user", "password")
+            smtp.send_message(build_message(TO, "Grade posted", "Your grade is in."))
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(connections) as executor:
+        started = time.perf_counter()
+        await asyncio.gather(*[loop.run_in_executor(executor, send) for _ in range(messages)])
+        return messages / (time.perf_counter() - started)
+
+async def pooled(port: int, messages: int, connections: int, serialized: bool) -> float:
+    pool = SMTPConnectionPool("127.0.0.1", port, "user", "password", use_tls=False, size=connections)
+    template = template_registry.get("notification")
+    data = {"title": "Grade posted", "message": "Your grade is in."}
+    try:
+        started = time.perf_counter()
+        if serialized:
+            await asyncio.gather(*[
+                pool.sendmail_async(template.sender or "noreply@example.com", [TO], template.render_email(TO, data))
+                for _ in range(messages)
+            ])
+        else:
+            await asyncio.gather(*[
+                pool.send_message_async(build_message(TO, "Grade posted", "Your grade is in."))
+                for _ in range(messages)
+            ])
+        return messages / (time.perf_counter() - started)
+    finally:
+        pool.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--connect-delay", type=float, default=0.03, help="seconds per new connection")
+    args = parser.parse_args()
+
+    StubSMTPHandler.connect_delay = args.connect_delay
+    server = StubSMTPServer(("127.0.0.1", 0), StubSMTPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    print(f"{args.messages} messages over {args.connections} connections, "
+          f"{args.connect_delay * 1000:.0f} ms per new connection")
+    print(f"before: connection per message    {asyncio.run(unpooled(port, args.messages, args.connections)):8.0f} msg/s")
+    print(f"after:  pool, send_message_async  {asyncio.run(pooled(port, args.messages, args.connections, False)):8.0f} msg/s")
+    print(f"after:  pool, template + sendmail {asyncio.run(pooled(port, args.messages, args.connections, True)):8.0f} msg/s")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
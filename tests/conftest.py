@@ -0,0 +1,34 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+@pytest.fixture(scope="session")
+def postgres_url() -> str:
+    """A PostgreSQL database the tests may create schemas in, from TEST_DATABASE_URL."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+@pytest.fixture(scope="module")
+def make_pg_engine(postgres_url):
+    """Return a factory of engines that each work in a fresh schema, dropped afterwards."""
+    admin = create_engine(postgres_url)
+    created = []
+
+    def make():
+        schema = f"test_{uuid.uuid4().hex[:12]}"
+        with admin.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        engine = create_engine(postgres_url, connect_args={"options": f"-csearch_path={schema}"})
+        created.append((schema, engine))
+        return engine
+
+    yield make
+    for schema, engine in created:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+    admin.dispose()
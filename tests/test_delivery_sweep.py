@@ -0,0 +1,74 @@
+"""The startup sweep must only queue again the pending notifications whose
+batch the delivery pipeline itself lost, never the history in the table.
+
+Runs ``requeue_stale_pending`` against rows seeded in the PostgreSQL
+database in TEST_DATABASE_URL and is skipped without one.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.models.base import Base
+from app.models.notification import Notification
+from app.models.organization import Organization
+from app.models.user import User
+from app.services import delivery_queue as delivery_queue_module
+from app.services.delivery_queue import DeliveryQueue, MemoryQueueBackend, requeue_stale_pending
+
+STALE_AFTER = 900
+
+@pytest.fixture
+def engine(make_pg_engine, monkeypatch):
+    engine = make_pg_engine()
+    Base.metadata.create_all(engine, tables=[Organization.__table__, User.__table__, Notification.__table__])
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO organizations (id, name, code) VALUES (1, 'School', 'school')"))
+        conn.execute(text("INSERT INTO users (id, email, hashed_password, organization_id) VALUES (1, 'a@example.com', 'x', 1)"))
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(
+        delivery_queue_module, "delivery_queue",
+        DeliveryQueue(settings.NOTIFICATION_QUEUE_WEIGHTS, settings.NOTIFICATION_QUEUE_CONCURRENCY, MemoryQueueBackend())
+    )
+    return engine
+
+def _seed(engine, rows) -> None:
+    with engine.begin() as conn:
+        for id, status, queued_ago, created_ago in rows:
+            conn.execute(
+                text(
+                    "INSERT INTO notifications (id, user_id, organization_id, title, message, notification_type, "
+                    "priority, is_read, is_delivered, status, queued_at, created_at) "
+                    "VALUES (:id, 1, 1, 'Title', 'Message', 'system', 'medium', false, :delivered, :status, "
+                    "now() - make_interval(secs => :queued_ago), now() - make_interval(secs => :created_ago))"
+                ),
+                {"id": id, "status": status, "delivered": status == "sent", "queued_ago": queued_ago, "created_ago": created_ago}
+            )
+
+def test_old_notifications_are_not_sent_again(engine):
+    # Two years of history: delivered rows, and rows from before the queue
+    # existed that were never queued by it
+    _seed(engine, [
+        (id, "sent" if id % 2 else "pending", None, 86400 * (1 + id))
+        for id in range(1, 201)
+    ])
+
+    assert requeue_stale_pending(STALE_AFTER) == 0
+    assert delivery_queue_module.delivery_queue.queued_ids() == set()
+
+def test_only_lost_batches_within_the_window_are_requeued(engine):
+    _seed(engine, [
+        (1, "pending", 3600, 3600),                            # batch lost an hour ago
+        (2, "pending", 60, 60),                                # queued a minute ago, still in flight
+        (3, "pending", settings.NOTIFICATION_QUEUE_SWEEP_WINDOW + 3600, 86400 * 3),  # given up on
+        (4, "sent", 3600, 3600),                               # delivered
+        (5, "pending", 3600, 3600),                            # still on a lane
+    ])
+    queue = delivery_queue_module.delivery_queue
+    queue.enqueue([5], "medium")
+
+    assert requeue_stale_pending(STALE_AFTER) == 1
+    assert queue.queued_ids() == {1, 5}
+    # The claim moved queued_at, so a second sweep finds nothing
+    assert requeue_stale_pending(STALE_AFTER) == 0
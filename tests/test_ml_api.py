@@ -0,0 +1,117 @@
+"""The ML endpoints run inference off the event loop and stream cohorts chunk by chunk."""
+import asyncio
+from collections import namedtuple
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.api.v1.endpoints import ml
+from app.core.config import settings
+
+class LoopCheckingModel:
+    """Stands in for a trained model and records whether it ran on the event loop."""
+
+    def __init__(self):
+        self.on_event_loop = []
+
+    def _record(self) -> None:
+        try:
+            asyncio.get_running_loop()
+            self.on_event_loop.append(True)
+        except RuntimeError:
+            self.on_event_loop.append(False)
+
+    def predict(self, *args):
+        self._record()
+        if len(args) == 2:
+            return {"predicted_grade": 80, "confidence": 0.9}
+        return {"predicted_performance": 75.0, "confidence_interval": {"lower": 70.0, "upper": 80.0}}
+
+    def predict_many(self, answers, correct_answers):
+        self._record()
+        return [{"predicted_grade": 80, "confidence": 0.9} for _ in answers]
+
+@pytest.fixture
+def model(monkeypatch):
+    model = LoopCheckingModel()
+    monkeypatch.setattr(ml.model_registry, "get", lambda name: model)
+    return model
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(ml.router, prefix=f"{settings.API_V1_STR}/ml")
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1}
+    with TestClient(app) as client:
+        yield client
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict/grade", {"answer": "a", "correct_answer": "b"}),
+    ("/predict/grade/batch", {"items": [{"answer": "a", "correct_answer": "b"}] * 3}),
+    ("/predict/performance", {
+        "attendance_rate": 0.9, "assignment_completion": 0.8, "quiz_average": 75, "study_hours": 10
+    }),
+])
+def test_prediction_runs_in_the_threadpool(client, model, path, body):
+    response = client.post(f"{settings.API_V1_STR}/ml{path}", json=body)
+    assert response.status_code == 200, response.text
+    assert model.on_event_loop == [False]
+
+CohortRow = namedtuple("CohortRow", "id student_id attendance_rate assignment_completion quiz_average")
+
+class StreamingSession:
+    """Hands out cohort rows a partition at a time and logs each fetch."""
+
+    def __init__(self, students: int, events: list):
+        self.students = students
+        self.events = events
+
+    def execute(self, query):
+        chunk_size = query.get_execution_options()["yield_per"]
+        session = self
+
+        class Result:
+            def partitions(self):
+                for start in range(0, session.students, chunk_size):
+                    session.events.append("fetch")
+                    yield [
+                        CohortRow(i, f"S{i}", 0.9, 0.8, 75.0)
+                        for i in range(start, min(start + chunk_size, session.students))
+                    ]
+
+        return Result()
+
+    def close(self):
+        self.events.append("close")
+
+class CohortModel:
+    is_trained = True
+
+    def __init__(self, events: list):
+        self.events = events
+
+    def predict_many(self, X):
+        self.events.append("predict")
+        return [
+            {"predicted_performance": 75.0, "confidence_interval": {"lower": 70.0, "upper": 80.0}}
+            for _ in X
+        ]
+
+@pytest.mark.parametrize("format", ["json", "csv"])
+def test_cohort_is_fetched_and_scored_chunk_by_chunk(client, monkeypatch, format):
+    events = []
+    students = 2 * ml.COHORT_EXPORT_CHUNK_SIZE + 1
+    monkeypatch.setattr(ml.model_registry, "get", lambda name: CohortModel(events))
+    monkeypatch.setattr(ml, "SessionLocal", lambda: StreamingSession(students, events))
+    client.app.dependency_overrides[deps.get_current_tenant_id] = lambda: 1
+
+    response = client.get(f"{settings.API_V1_STR}/ml/predict/performance/cohort", params={"format": format})
+
+    assert response.status_code == 200, response.text
+    assert events == ["fetch", "predict"] * 3 + ["close"]
+    if format == "json":
+        assert [item["student_id"] for item in response.json()] == list(range(students))
+    else:
+        assert len(response.text.strip().splitlines()) == students + 1
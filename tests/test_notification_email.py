@@ -0,0 +1,30 @@
+"""The email channel renders through the compiled template and sends the
+serialized bytes on the SMTP pool."""
+import asyncio
+import base64
+import email
+
+from app.services import notification_delivery
+from app.services.notification_delivery import CHANNEL_SENDERS, Recipient
+from app.services.notification_digest import DigestNotification
+
+class FakePool:
+    def __init__(self):
+        self.sent = []
+
+    async def sendmail_async(self, from_addr, to_addrs, message):
+        self.sent.append((from_addr, to_addrs, message))
+
+def test_email_is_rendered_by_the_template_and_sent_as_bytes(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(notification_delivery, "smtp_pool", pool)
+    notification = DigestNotification(7, "Grade posted", "Your grade for Algebra is {A}", None)
+
+    asyncio.run(CHANNEL_SENDERS["email"](notification, Recipient(7, "student@example.com", None)))
+
+    [(from_addr, to_addrs, raw)] = pool.sent
+    assert to_addrs == ["student@example.com"]
+    message = email.message_from_bytes(raw)
+    assert message["To"] == "student@example.com"
+    assert message["Subject"] == "Grade posted"
+    assert base64.b64decode(message.get_payload()).decode() == "Your grade for Algebra is {A}"
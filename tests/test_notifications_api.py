@@ -0,0 +1,114 @@
+"""The notification endpoints, called through the real router.
+
+Requests go through ``TenantMiddleware`` into ``app.api.v1.endpoints.notifications``
+with only the database session and the authenticated user overridden, so
+the services the routes resolve at import time are the ones exercised.
+Runs against the PostgreSQL database in TEST_DATABASE_URL and is skipped
+without one.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.api.v1.endpoints import notifications
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.principal_cache import CurrentUser
+from app.core.tenant_cache import TenantInfo, tenant_cache
+from app.middleware.tenant import TenantMiddleware
+from app.models.base import Base
+from app.models.notification import Notification, UserNotificationStats
+from app.models.organization import Organization
+from app.models.user import User
+
+ORGANIZATION_ID = 1
+USER_ID = 1
+
+@pytest.fixture
+def client(make_pg_engine):
+    engine = make_pg_engine()
+    Base.metadata.create_all(
+        engine,
+        tables=[Organization.__table__, User.__table__, Notification.__table__, UserNotificationStats.__table__]
+    )
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO organizations (id, name, code) VALUES (:id, 'School', 'school')"), {"id": ORGANIZATION_ID})
+        conn.execute(
+            text(
+                "INSERT INTO users (id, email, hashed_password, organization_id, is_active) "
+                "VALUES (:id, 'student@example.com', 'x', :organization_id, true)"
+            ),
+            {"id": USER_ID, "organization_id": ORGANIZATION_ID}
+        )
+    Session = sessionmaker(bind=engine)
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.add_middleware(TenantMiddleware)
+    app.include_router(notifications.router, prefix=f"{settings.API_V1_STR}/notifications")
+    app.dependency_overrides[deps.get_db] = get_db
+    app.dependency_overrides[deps.get_current_user] = lambda: CurrentUser(
+        USER_ID, "student@example.com", ORGANIZATION_ID, "student", True, False
+    )
+    tenant_cache.set(ORGANIZATION_ID, TenantInfo(True, {}))
+    with TestClient(app, headers={"X-Tenant-ID": str(ORGANIZATION_ID)}) as client:
+        yield client
+    tenant_cache.invalidate(ORGANIZATION_ID)
+
+def _create(client, title: str):
+    response = client.post(
+        f"{settings.API_V1_STR}/notifications/",
+        json={"user_id": USER_ID, "title": title, "message": "Hello", "notification_type": "system"}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_create_and_list_notifications(client):
+    created = _create(client, "Welcome")
+    assert created["status"] == "pending"
+
+    response = client.get(f"{settings.API_V1_STR}/notifications/")
+    assert response.status_code == 200, response.text
+    assert [n["id"] for n in response.json()] == [created["id"]]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+def test_templates_route_is_not_shadowed_by_notification_id(client):
+    response = client.get(f"{settings.API_V1_STR}/notifications/templates")
+    assert response.status_code == 200, response.text
+    assert isinstance(response.json(), list)
+
+def test_unread_count_follows_created_and_read_notifications(client):
+    url = f"{settings.API_V1_STR}/notifications/unread-count"
+    assert client.get(url).json() == {"unread_count": 0}
+
+    first = _create(client, "First")
+    _create(client, "Second")
+    assert client.get(url).json() == {"unread_count": 2}
+
+    response = client.post(f"{settings.API_V1_STR}/notifications/{first['id']}/mark-read")
+    assert response.status_code == 200, response.text
+    assert client.get(url).json() == {"unread_count": 1}
+
+def test_listing_pages_with_the_next_cursor(client):
+    created = [_create(client, f"Notification {i}")["id"] for i in range(25)]
+
+    url = f"{settings.API_V1_STR}/notifications/"
+    seen, params = [], {"limit": 10}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        seen += [n["id"] for n in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        params = {"limit": 10, "cursor": cursor}
+    assert seen == created[::-1]